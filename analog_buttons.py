@@ -6,20 +6,51 @@ from PySide6.QtWidgets import (
 
 from PySide6.QtGui import (
 	QPainter,
-	QColor,
-	QBrush,
-	QPen,
-	QFont
+	QFont,
+	QFontMetrics,
+	QPixmap
 )
 
 from PySide6.QtCore import (
 	Qt,
+	QEvent,
 	QPoint,
 	QRect,
 	QSize
 )
 
 from button_specs import *
+from theme import shadow_brush, theme_for
+
+# Making a QFont is slow: Qt has to look the family up, and fall back to
+# another font when it isn't installed ("Arial Black" often isn't on
+# Linux). So each family and size is made once, and shared by every
+# button. Fonts are never changed after they're made, so nothing in here
+# goes out of date: a button whose font size changes just looks up the
+# new size.
+_fonts = {} # (family, point size) -> (QFont, QFontMetrics)
+_text_bounds = {} # (family, point size, text) -> the text's bounding QRect
+
+def cached_font(family, size):
+	"""A QFont and its metrics for a family and point size. Don't change the font: copy it first."""
+	key = (family, size)
+	font = _fonts.get(key)
+
+	if font is None:
+		font = QFont(family, size)
+		font = _fonts[key] = (font, QFontMetrics(font))
+
+	return font
+
+def text_bounds(family, size, text):
+	"""The bounding rectangle of text in a family and point size, as QFontMetrics.boundingRect() gives it."""
+	key = (family, size, text)
+	bounds = _text_bounds.get(key)
+
+	if bounds is None:
+		bounds = _text_bounds[key] = cached_font(family, size)[1].boundingRect(text)
+
+	return bounds
 
 class ResizableButton(QPushButton):
 	def __init__(self, text, properties, parent = None):
@@ -30,6 +61,10 @@ class ResizableButton(QPushButton):
 		self._current_font_size = self.font_size # Store the current font_size
 		self._first_resize = True  # New flag
 
+		# Set by a window that rescales all its widgets' fonts at once (see
+		# MainWindow): then it's called instead of rescaling the font here.
+		self.font_rescaler = None
+
 		# Set the initial font
 		font = self.font()
 		font.setPointSize(self.font_size)
@@ -43,10 +78,19 @@ class ResizableButton(QPushButton):
 
 		if self._first_resize:
 			self._first_resize = False
+		elif self.font_rescaler is not None:
+			self.font_rescaler()
 		else:
 			self.adjust_font_size()
 
 	def adjust_font_size(self):
+		new_font_size = self.new_font_size()
+
+		if new_font_size is not None:
+			self.apply_font_size(new_font_size)
+
+	def new_font_size(self):
+		"""The font size the button's size calls for, or None if it has it already."""
 		button_width = self.width()
 		button_height = self.height()
 		available_space = min(button_width, button_height)
@@ -57,11 +101,16 @@ class ResizableButton(QPushButton):
 			new_font_size = minimum_font_size
 
 		if new_font_size != self._current_font_size:
-			font = self.font()
-			font.setPointSize(new_font_size)
-			self.setFont(font)
-			self._current_font_size = new_font_size
-			self.update()
+			return new_font_size
+
+		return None
+
+	def apply_font_size(self, new_font_size):
+		font = self.font()
+		font.setPointSize(new_font_size)
+		self.setFont(font)
+		self._current_font_size = new_font_size
+		self.update()
 			
 	def set_font_size(self, size):
 		if size > 0:
@@ -76,6 +125,12 @@ class ResizableButton(QPushButton):
 '''
 class AnalogButton(ResizableButton):
 	def __init__(self, properties, parent = None):
+		# Rendered faces, keyed by _face_key(). Drawing a face (shadow, top,
+		# outline, text) is slow, so each look the button can have at its
+		# current size is drawn once and copied to the screen after that.
+		# (Made first: setting the font in ResizableButton already clears it.)
+		self._faces = {}
+
 		# Initialize with empty text - we'll handle text separately
 		super().__init__("", properties, parent)
 		self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -90,7 +145,8 @@ class AnalogButton(ResizableButton):
 		self._is_active = properties.get("state", "active") == "active"
 		self._active_palette = properties["palette"]
 		self._inactive_palette = properties.get("inactive_palette", self._active_palette)
-		
+		self._make_themes()
+
 		# Adjust font factor if needed
 		self.font_factor = properties["font_factor"]
 
@@ -109,6 +165,16 @@ class AnalogButton(ResizableButton):
 		self._top_width = self.width() - self.properties["specs"]["offset"]
 		self._top_height = self.height() - self.properties["specs"]["offset"]
 
+		# faces drawn at the old size are no use any more
+		self._faces.clear()
+
+	def changeEvent(self, event):
+		# the faces were drawn with the old palette, font or style
+		if event.type() in (QEvent.PaletteChange, QEvent.FontChange, QEvent.StyleChange):
+			self._faces.clear()
+
+		super().changeEvent(event)
+
 	def mousePressEvent(self, event):
 		if event.button() == Qt.LeftButton:
 			self._is_pressed = True
@@ -126,63 +192,113 @@ class AnalogButton(ResizableButton):
 			self._is_active = is_active
 			self.update()
 
+	def set_palettes(self, active_palette, inactive_palette = None):
+		"""Changes the button's colours (C64Palette colours by "bg", "outline", "font"...)."""
+		self._active_palette = active_palette
+		self._inactive_palette = inactive_palette or active_palette
+		self._make_themes()
+		self._faces.clear()
+		self.update()
+
+	def _make_themes(self):
+		# the brushes and pens for both palettes (see theme.py)
+		outline_width = self.properties.get("specs", {}).get("outline", 4)
+		self._active_theme = theme_for(self._active_palette, outline_width)
+		self._inactive_theme = theme_for(self._inactive_palette, outline_width)
+
 	def _get_palette(self):
 		return self._inactive_palette if not self._is_active else self._active_palette
 
-	def _get_color(self, key):
-		palette = self._get_palette()
-		return QColor(palette.get(key, "#000000")) # Default to black if key not found
+	def _get_theme(self):
+		return self._inactive_theme if not self._is_active else self._active_theme
+
+	def _face_label(self):
+		"""The text on the button's face."""
+		return self.text()
+
+	def _face_key(self):
+		"""Everything the button's face depends on. Faces with the same key look the same."""
+		return (self._face_label(), self._get_theme().colours, self._is_active, self._is_pressed,
+				  self.width(), self.height(), self.devicePixelRatioF())
 
 	def paintEvent(self, event):
+		key = self._face_key()
+		face = self._faces.get(key)
+
+		if face is None:
+			# draw the face at the screen's resolution, so it's as sharp as drawing it directly
+			pixel_ratio = self.devicePixelRatioF()
+			face = QPixmap(self.size() * pixel_ratio)
+			face.setDevicePixelRatio(pixel_ratio)
+			face.fill(Qt.transparent)
+
+			painter = QPainter(face)
+			painter.setRenderHint(QPainter.Antialiasing)
+			painter.setFont(self.font())
+
+			try:
+				self._paint_face(painter)
+			finally:
+				painter.end()
+
+			self._faces[key] = face
+
 		painter = QPainter(self)
-		painter.setRenderHint(QPainter.Antialiasing)
-		try:
-			radius = master_radius
-			button_rect = self.rect()
-			
-			# Calculate dynamic dimensions (95% of current size)
-			top_width = button_rect.width() * 0.95
-			top_height = button_rect.height() * 0.95
-			
-			# Create size and point objects correctly
-			top_size = QSize(int(top_width), int(top_height))
-			offset = QPoint(int(top_width), int(top_height))
-			
-			# Calculate rectangles
-			shadow_rect = QRect(button_rect.bottomRight() - offset, top_size)
-			top_rect = QRect(button_rect.topLeft() if not self._is_pressed else 
-									button_rect.bottomRight() - offset, top_size)
-			
-			# Rest of your painting code...
-			top_color = self._get_color("bg")
-			outline_color = self._get_color("outline")
-			shadow_colour = C64Palette().shadow
-			outline_width = self.properties.get("specs", {}).get("outline", 4)
-
-			# Draw shadow
-			painter.setPen(Qt.NoPen)
-			painter.setBrush(QBrush(shadow_colour))
-			painter.drawRoundedRect(shadow_rect, radius, radius)
-
-			# Draw top
-			painter.setBrush(QBrush(top_color))
-			painter.drawRoundedRect(top_rect, radius, radius)
-
-			# Draw outline
-			painter.setPen(QPen(outline_color, outline_width))
-			painter.setBrush(Qt.NoBrush)
-			area = outline_width // 2
-			corner_r = radius - 2
-			adjusted_outline = top_rect.adjusted(area, area, -area, -area)
-			painter.drawRoundedRect(adjusted_outline, corner_r, corner_r)
-
-			# Draw text
-			if self.text():
-					painter.setPen(QPen(self._get_color("text")))
-					painter.drawText(button_rect, Qt.AlignCenter, self.text())
-					
-		finally:
-			painter.end()  # Crucial - ensures painter is always properly ended
+		painter.drawPixmap(0, 0, face)
+		painter.end()
+
+	def _face_rects(self):
+		"""The shadow and top rectangles, for the button's size and whether it's pressed."""
+		button_rect = self.rect()
+		
+		# Calculate dynamic dimensions (95% of current size)
+		top_width = button_rect.width() * 0.95
+		top_height = button_rect.height() * 0.95
+		
+		# Create size and point objects correctly
+		top_size = QSize(int(top_width), int(top_height))
+		offset = QPoint(int(top_width), int(top_height))
+		
+		# Calculate rectangles
+		shadow_rect = QRect(button_rect.bottomRight() - offset, top_size)
+		top_rect = QRect(button_rect.topLeft() if not self._is_pressed else 
+								button_rect.bottomRight() - offset, top_size)
+
+		return shadow_rect, top_rect
+
+	def _paint_face(self, painter):
+		# Every kind of button draws its face here, in one pass: the
+		# geometry is worked out once, then the shadow, top and outline are
+		# drawn, and then the label, by _paint_label().
+		radius = master_radius
+		shadow_rect, top_rect = self._face_rects()
+		theme = self._get_theme()
+		outline_width = self.properties.get("specs", {}).get("outline", 4)
+
+		# Draw shadow
+		painter.setPen(Qt.NoPen)
+		painter.setBrush(shadow_brush)
+		painter.drawRoundedRect(shadow_rect, radius, radius)
+
+		# Draw top
+		painter.setBrush(theme.bg)
+		painter.drawRoundedRect(top_rect, radius, radius)
+
+		# Draw outline
+		painter.setPen(theme.outline)
+		painter.setBrush(Qt.NoBrush)
+		area = outline_width // 2
+		corner_r = radius - 2
+		adjusted_outline = top_rect.adjusted(area, area, -area, -area)
+		painter.drawRoundedRect(adjusted_outline, corner_r, corner_r)
+
+		self._paint_label(painter, top_rect)
+
+	def _paint_label(self, painter, top_rect):
+		# Draw text
+		if self.text():
+				painter.setPen(self._get_theme().text)
+				painter.drawText(self.rect(), Qt.AlignCenter, self.text())
 
 class OneLineButton(AnalogButton):
 	def __init__(self, properties, parent=None):
@@ -191,59 +307,34 @@ class OneLineButton(AnalogButton):
 		self._font_size = properties["font_size"]
 		self._text = properties["label"]
 
-	def paintEvent(self, event):
-		painter = QPainter(self)
-		painter.setRenderHint(QPainter.Antialiasing)
+	def _face_label(self):
+		return self._text
 
-		top_color = self._get_color("bg")
-		outline_color = self._get_color("outline")
-		text_color = self._get_color("font")
-
-		radius = master_radius
+	def _face_rects(self):
 		button_area_rect = self.rect()
 		top_size = QSize(self._top_width, self._top_height)
 
 		# shadow size calculation
-		bottom_right = button_area_rect.bottomRight()
 		offset = QPoint(self._top_width, self._top_height)
-		adjusted_point = bottom_right - offset
+		adjusted_point = button_area_rect.bottomRight() - offset
 		shadow_rect = QRect(adjusted_point, top_size)
 
 		if not self._is_pressed:
 			top_rect = QRect(button_area_rect.topLeft(), top_size)
 		else:
-			bottom_right = button_area_rect.bottomRight()
-			offset = QPoint(self._top_width, self._top_height)
-			adjusted_point = bottom_right - offset
 			top_rect = QRect(adjusted_point, top_size)
 
-		# Draw the shadow
-		painter.setPen(Qt.NoPen)
-		painter.setBrush(QBrush(C64Palette().shadow))
-		painter.drawRoundedRect(shadow_rect, radius, radius)
-
-		# Draw the top (background)
-		painter.setBrush(QBrush(top_color))
-		painter.drawRoundedRect(top_rect, radius, radius)
-
-		# Draw the outline
-		painter.setPen(QPen(outline_color, self.properties["specs"]["outline"]))
-		painter.setBrush(Qt.NoBrush)
-		area = self.properties["specs"]["outline"] // 2
-		corner_r = radius - 2
-		adjusted_outline = top_rect.adjusted(area, area, -area, -area)
-		painter.drawRoundedRect(adjusted_outline, corner_r, corner_r)
+		return shadow_rect, top_rect
 
+	def _paint_label(self, painter, top_rect):
 		# Draw the text using the dedicated method
 		self._draw_centered_text(painter, top_rect)
 
 	def _draw_centered_text(self, painter, rect):
-		colour = self._get_color("font")
-		painter.setPen(colour)
-		font = QFont(self._font_family, self._font_size)
+		painter.setPen(self._get_theme().font)
+		font, metrics = cached_font(self._font_family, self._font_size)
 		painter.setFont(font)
-		metrics = painter.fontMetrics()
-		text_rect = metrics.boundingRect(self._text)
+		text_rect = text_bounds(self._font_family, self._font_size, self._text)
 		text_x = rect.center().x() - text_rect.width() / 2
 		baseline_y = rect.center().y() + metrics.ascent() / 2 - baseline_offset # adjust up
 		painter.drawText(int(text_x), int(baseline_y), self._text)
@@ -254,11 +345,13 @@ class TwoLineButton(AnalogButton):
 		self._font_family1 = properties["specs"]["font"] # Correct key for font family
 		self._font_size1 = properties["specs"]["font_size"]   # Correct key for font_size
 		self._text_line1 = properties["label"]
-		self._color_line1 = properties["palette"]["font"]
 		self._font_family2 = properties["specs"]["font"]
 		self._font_size2 = properties["specs"]["subfont_size"]
 		self._text_line2 = properties.get("sublabel", "")
 
+	def _face_label(self):
+		return (self._text_line1, self._text_line2)
+
 	def _draw_centered_text(self, painter, rect, text, font_family, color):
 		painter.setPen(color)
 		font = self.font()  # Use the resizable font
@@ -266,107 +359,38 @@ class TwoLineButton(AnalogButton):
 		painter.setFont(font)
 		painter.drawText(rect, Qt.AlignCenter, text)
 
-	def paintEvent(self, event):
-		super().paintEvent(event) # Draw the base button (shadow, top, outline)
-
-		painter = QPainter(self)
-		painter.setRenderHint(QPainter.Antialiasing)
-
-		# Determine the current top_rect position
-		button_area_rect = self.rect()
-		top_size = QSize(self._top_width, self._top_height)
-
-		# top rectangle shape
-		if not self._is_pressed:
-			start_point = button_area_rect.topLeft()
-		else:
-			offset = QPoint(self._top_width, self._top_height)
-			start_point = button_area_rect.bottomRight() - offset
-
-		top_rect = QRect(start_point, top_size)
+	def _paint_label(self, painter, top_rect):
+		# Draw the two lines of text relative to top_rect, always in the active palette's font colour
+		painter.setPen(self._active_theme.font)
 
-		# Draw the two lines of text relative to the current top_rect
 		# Font for the first line
-		_font1 = QFont(self._font_family1, self._font_size1)
-		painter.setFont(_font1)
-		metrics_line1 = painter.fontMetrics()
-		text_rect_line1 = metrics_line1.boundingRect(self._text_line1)
+		painter.setFont(cached_font(self._font_family1, self._font_size1)[0])
+		text_rect_line1 = text_bounds(self._font_family1, self._font_size1, self._text_line1)
 		text_x_line1 = top_rect.center().x() - text_rect_line1.width() / 2
 		line1_baseline_y = top_rect.top() + (top_rect.height() / 2 + self.properties["specs"]["offset"])
-		painter.setPen(self._color_line1)
 		painter.drawText(int(text_x_line1), int(line1_baseline_y), self._text_line1)
 
 		# Font for the second line
-		_font2 = QFont(self._font_family2, self._font_size2)
-		painter.setFont(_font2)
-		metrics_line2 = painter.fontMetrics()
-		text_rect_line2 = metrics_line2.boundingRect(self._text_line2)
+		painter.setFont(cached_font(self._font_family2, self._font_size2)[0])
+		text_rect_line2 = text_bounds(self._font_family2, self._font_size2, self._text_line2)
 		text_x_line2 = top_rect.center().x() - text_rect_line2.width() / 2
 		line2_baseline_y = top_rect.bottom() - (top_rect.height() / 4 - self.properties["specs"]["offset"])
-		painter.setPen(self._color_line1)
 		painter.drawText(int(text_x_line2), int(line2_baseline_y), self._text_line2)
 
 class AngledButton(OneLineButton):
 	def __init__(self, properties, parent = None):
 		super().__init__(properties, parent)
 		self._angle = properties["specs"]["angle"]
-		self._color = properties["palette"]["font"]
-		self._text_color = properties["palette"]["font"]
-
-	def paintEvent(self, event):
-		painter = QPainter(self)
-		painter.setRenderHint(QPainter.Antialiasing)
-
-		top_color = self.properties["palette"]["bg"]
-		outline_color = self.properties["palette"]["outline"]
-		text_color = self._color # Inherited from AngledButton
-
-		radius = master_radius
-		button_area_rect = self.rect()
-		top_size = QSize(self._top_width, self._top_height)
-
-		# Break down shadow_rect
-		bottom_right = button_area_rect.bottomRight()
-		shadow_offset = QPoint(self._top_width, self._top_height)
-		shadow_start_point = bottom_right - shadow_offset
-		shadow_rect = QRect(shadow_start_point, top_size)
-
-		# Break down top_rect
-		if not self._is_pressed:
-			top_start_point = button_area_rect.topLeft()
-		else:
-			top_offset = QPoint(self._top_width, self._top_height)
-			top_start_point = button_area_rect.bottomRight() - top_offset
 
-		top_rect = QRect(top_start_point, top_size)
+	def _get_theme(self):
+		# always drawn in its active palette
+		return self._active_theme
 
-		# Draw the shadow
-		painter.setPen(Qt.NoPen)
-		painter.setBrush(QBrush(QColor(C64Palette().shadow)))
-		painter.drawRoundedRect(shadow_rect, radius, radius)
-
-		# Draw the top (background)
-		painter.setBrush(QBrush(top_color))
-		painter.drawRoundedRect(top_rect, radius, radius)
-
-		# Draw the button top outline
-		specs = self.properties.get("specs", {})
-		outline_width = specs["outline"]
-		pen = QPen(outline_color, outline_width)
-		painter.setPen(pen)
-
-		painter.setBrush(Qt.NoBrush)
-		area = self.properties["specs"]["outline"] // 2
-		corner_r = radius - 2
-		adjusted_outline = top_rect.adjusted(area, area, -area, -area)
-		painter.drawRoundedRect(adjusted_outline, corner_r, corner_r)
-
-		# Draw the angled text (logic from AngledButton's paintEvent should still apply)
-		painter.setPen(text_color)
-		font = QFont(self._font_family, self._font_size) # Inherited from AngledButton
-		painter.setFont(font)
-		metrics = painter.fontMetrics()
-		text_rect = metrics.boundingRect(self._text) # Inherited from AngledButton
+	def _paint_label(self, painter, top_rect):
+		# Draw the angled text
+		painter.setPen(self._get_theme().font)
+		painter.setFont(cached_font(self._font_family, self._font_size)[0])
+		text_rect = text_bounds(self._font_family, self._font_size, self._text)
 
 		angle = self.properties["specs"]["angle"]
 		painter.translate(top_rect.center())
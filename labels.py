@@ -16,10 +16,12 @@ from PySide6.QtGui import (
 	QPen,
 	QFont,
 	QPainterPath,
+	QPixmap,
 	QKeyEvent,
 )
 from PySide6.QtCore import (
 	Qt,
+	QEvent,
 	QRect,
 	QRectF,
 	QPointF,
@@ -38,6 +40,10 @@ class ResizableLabel(QLabel):
 		self._current_font_size = self.font_size  # Store the current font size
 		self._first_resize = True  # New flag
 
+		# Set by a window that rescales all its widgets' fonts at once (see
+		# MainWindow): then it's called instead of rescaling the font here.
+		self.font_rescaler = None
+
 		# Set the initial font
 		font = self.font()
 		font.setPointSize(self.font_size)
@@ -51,10 +57,19 @@ class ResizableLabel(QLabel):
 
 		if self._first_resize:
 			self._first_resize = False
+		elif self.font_rescaler is not None:
+			self.font_rescaler()
 		else:
 			self.adjust_font_size()
 
 	def adjust_font_size(self):
+		new_font_size = self.new_font_size()
+
+		if new_font_size is not None:
+			self.apply_font_size(new_font_size)
+
+	def new_font_size(self):
+		"""The font size the label's size calls for, or None if it has it already."""
 		label_width = self.width()
 		label_height = self.height()
 
@@ -65,15 +80,25 @@ class ResizableLabel(QLabel):
 			new_font_size = minimum_font_size
 
 		if new_font_size != self._current_font_size:
-			font = self.font()
-			font.setPointSize(new_font_size)
-			self.setFont(font)
-			self._current_font_size = new_font_size
+			return new_font_size
+
+		return None
+
+	def apply_font_size(self, new_font_size):
+		font = self.font()
+		font.setPointSize(new_font_size)
+		self.setFont(font)
+		self._current_font_size = new_font_size
 
 class LineEditColourLabel(ResizableLabel):
 	clicked = Signal()
 
 	def __init__(self, properties, text = "", parent = None):
+		# The background and outline, drawn once for each size (see
+		# _background_pixmap()). Only the text is drawn on every repaint.
+		# (Made first: Qt sends change events while ResizableLabel sets up.)
+		self._background = None
+
 		super().__init__(text, properties, parent)
 
 		# Initialize custom drawing properties
@@ -98,8 +123,40 @@ class LineEditColourLabel(ResizableLabel):
 		for key, value in self.properties.items():
 			print("key: ", key, ", value: ", value)
 
-	def paintEvent(self, event):
-		painter = QPainter(self)
+	def resizeEvent(self, event):
+		super().resizeEvent(event)
+		self._background = None
+
+	def changeEvent(self, event):
+		# the background was drawn in the old parent's (or palette's) colour
+		if event.type() in (QEvent.PaletteChange, QEvent.ParentChange):
+			self._background = None
+
+		super().changeEvent(event)
+
+	def _text_rect(self):
+		return QRectF(
+			self.contentsMargins().left(),
+			0,
+			self.width() - self.contentsMargins().right() - 8,  # Right padding
+			self.height()
+		)
+
+	def setText(self, text):
+		# QLabel repaints all of itself even when the text hasn't changed
+		if text != self.text():
+			super().setText(text)
+
+	def _background_pixmap(self):
+		"""The background and outline at the label's size, drawn when it was last changed."""
+		pixel_ratio = self.devicePixelRatioF()
+
+		if self._background is not None and self._background.devicePixelRatio() == pixel_ratio:
+			return self._background
+
+		background = QPixmap(self.size() * pixel_ratio)
+		background.setDevicePixelRatio(pixel_ratio)
+		painter = QPainter(background)
 		painter.setRenderHint(QPainter.Antialiasing)
 
 		# 1. Get parent background (with fallback)
@@ -129,16 +186,20 @@ class LineEditColourLabel(ResizableLabel):
 		pen.setJoinStyle(Qt.RoundJoin)
 		painter.setPen(pen)
 		painter.drawPath(outline_path)
+		painter.end()
 
-		# 6. Draw text with proper alignment
-		text_rect = QRectF(
-			self.contentsMargins().left(),
-			0,
-			self.width() - self.contentsMargins().right() - 8,  # Right padding
-			self.height()
-		)
+		self._background = background
+
+		return background
+
+	def paintEvent(self, event):
+		painter = QPainter(self)
+		painter.drawPixmap(0, 0, self._background_pixmap())
+		painter.setRenderHint(QPainter.Antialiasing)
+
+		# Draw text with proper alignment
 		painter.setPen(self.text_color)
-		painter.drawText(text_rect, Qt.AlignRight | Qt.AlignVCenter, self.text())
+		painter.drawText(self._text_rect(), Qt.AlignRight | Qt.AlignVCenter, self.text())
 
 		painter.end()
 
@@ -157,6 +218,7 @@ class LineEditColourLabel(ResizableLabel):
 	def set_outline_color(self, color):
 		if isinstance(color, QColor):
 			self.outline_color = color
+			self._background = None
 			self.update()
 
 	def set_text_color(self, color):
@@ -167,11 +229,13 @@ class LineEditColourLabel(ResizableLabel):
 	def set_background_color(self, color):
 		if isinstance(color, QColor):
 			self.background_color = color
+			self._background = None
 			self.update()
 
 	def set_outline_width(self, width):
 		if width >= 0:
 			self.outline_width = width
+			self._background = None
 			self.update()
 
 	def set_font_size(self, size):
@@ -183,6 +247,7 @@ class LineEditColourLabel(ResizableLabel):
 	def set_corner_radius(self, radius):
 		if radius >= 0:
 			self.corner_radius = radius
+			self._background = None
 			self.update()
 		
 if __name__ == '__main__':
@@ -6,6 +6,7 @@ from PySide6.QtWidgets import (
 		QPushButton,
 		QLabel
 ) 
+from PySide6.QtCore import QTimer
 
 # Assume all support files exist in the same directory
 from button_data import *
@@ -14,6 +15,9 @@ from callbacks import *
 from analog_buttons import *
 from labels import LineEditColourLabel
 
+# how long the window has to stay the same size before the fonts are rescaled (ms)
+font_rescale_delay = 50
+
 class MainWindow(QMainWindow):
 	def __init__(self):
 		super().__init__()
@@ -47,9 +51,8 @@ class MainWindow(QMainWindow):
 		self.equals_label.setFont(font)
 		self.remainder_label.setFont(font)
 
-		# Let callbacks know about the labels so their text can be manipulated.
-		register_labels(self.first_input, self.second_input, self.operation_label,
-							 self.results_label, self.remainder_label)
+		# This window's calculator state. The callbacks work on it, then update the labels.
+		self.session = CalculatorSession()
 
 		# Initialize button dictionaries
 		self.buttons = {}
@@ -73,6 +76,7 @@ class MainWindow(QMainWindow):
 		for column in range(columns):
 			self.button_layout.setColumnStretch(column, 1)
 
+		self._set_up_font_rescaling()
 		self.set_initial_size()
 
 		self._update_initial_button_states()
@@ -178,6 +182,44 @@ class MainWindow(QMainWindow):
 		self.buttons["t64_logo"] = t64_button
 		'''
 
+
+	def _set_up_font_rescaling(self):
+		# While the window's being dragged to a new size, every button and
+		# input gets resized many times a second. Instead of each one
+		# changing its font every time, they all start (or restart) the
+		# timer, and when the window has stayed the same size for
+		# font_rescale_delay, rescale_fonts() does them all at once.
+		self._font_rescale_timer = QTimer(self)
+		self._font_rescale_timer.setSingleShot(True)
+		self._font_rescale_timer.setInterval(font_rescale_delay)
+		self._font_rescale_timer.timeout.connect(self.rescale_fonts)
+
+		self._font_scaled_widgets = [self.first_input, self.second_input, self.results_label]
+		self._font_scaled_widgets += [button for button in self.buttons.values() if isinstance(button, ResizableButton)]
+
+		for widget in self._font_scaled_widgets:
+			widget.font_rescaler = self._font_rescale_timer.start
+
+
+	def rescale_fonts(self):
+		# the font size each widget's size calls for, for the ones that need a new one
+		changes = [(widget, widget.new_font_size()) for widget in self._font_scaled_widgets]
+		changes = [(widget, size) for widget, size in changes if size is not None]
+
+		# no widget's size has changed enough to round to another font size
+		if not changes:
+			return
+
+		# one repaint (and layout) for all of them, not one each
+		self.setUpdatesEnabled(False)
+
+		try:
+			for widget, size in changes:
+				widget.apply_font_size(size)
+		finally:
+			self.setUpdatesEnabled(True)
+
+
 	def set_sign_proxy(self):
 		from callbacks import set_sign
 		set_sign(self)
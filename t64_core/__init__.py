@@ -0,0 +1,83 @@
+from importlib import import_module
+
+'''
+T-64 calculator engine
+
+Everything the calculator works out, with no GUI attached: the math and
+bitwise operations at every bit width, rotates, base conversions, the
+6502 ALU, BCD, multi-byte and fixed-point arithmetic, expressions, PRG
+files, the table every operation is dispatched through, and the
+calculator's own state machine (CalculatorSession). Scripts can use it
+without PySide6:
+	from t64_core import add_bits
+	add_bits(250, 10, 8)  ->  (4, True)
+
+The names below are the package's API. Importing the package loads
+none of its modules: each one is imported the first time one of its
+names is used. The plain integer functions load in a few milliseconds.
+Anything that needs NumPy (the batch functions, the lookup tables, the
+ALU, BCD, multi-byte, fixed-point and PRG code) only costs NumPy's
+import time when it's actually used, and expressions only need
+parsimonious when they're used.
+
+Each module's tests run with python -m, e.g.:
+	python -m t64_core.math_functions_bits
+'''
+
+# module -> the names it provides
+_modules = \
+{
+	"bit_widths": ("BitWidth", "bit_widths", "get_bit_width", "supported_bit_widths"),
+	"twos_complement": ("sign_extend", "to_unsigned", "wrap_signed", "resign"),
+	"math_functions_bits": ("add_bits", "subtract_bits", "multiply_bits", "divide_bits"),
+	"math_functions_signed_bits": ("add_signed_bits", "subtract_signed_bits", "multiply_signed_bits", "divide_signed_bits"),
+	"bit_wise_operations_unsigned": ("bitwise_and", "bitwise_or", "bitwise_xor", "bitwise_not", "shift_left", "shift_right"),
+	"bit_wise_operations_signed": ("bitwise_and_signed", "bitwise_or_signed", "bitwise_xor_signed", "bitwise_not_signed",
+											 "shift_left_signed", "shift_right_signed"),
+	"bit_wise_operations_batch": ("bitwise_and_batch", "bitwise_or_batch", "bitwise_xor_batch", "bitwise_not_batch",
+											"shift_left_batch", "shift_right_batch", "bitwise_and_signed_batch",
+											"bitwise_or_signed_batch", "bitwise_xor_signed_batch", "bitwise_not_signed_batch",
+											"shift_left_signed_batch", "shift_right_signed_batch"),
+	"rol_ror": ("rol", "ror"),
+	"base_converters": ("decimal_to_hexadecimal", "decimal_to_binary", "hexadecimal_to_decimal", "hexadecimal_to_binary",
+							  "binary_to_hexadecimal", "binary_to_decimal", "select_conversion"),
+	"math_functions_bits_batch": ("add_bits_batch", "subtract_bits_batch", "multiply_bits_batch", "divide_bits_batch"),
+	"math_functions_signed_bits_batch": ("add_signed_bits_batch", "subtract_signed_bits_batch",
+													 "multiply_signed_bits_batch", "divide_signed_bits_batch"),
+	"lookup_tables_8bit": ("LookupTable", "table_functions"),
+	"alu_6502": ("FLAG_C", "FLAG_Z", "FLAG_V", "FLAG_N", "AluTable", "describe_flags", "merge_flags",
+					 "alu_adc", "alu_sbc", "alu_cmp", "alu_and", "alu_ora", "alu_eor",
+					 "alu_asl", "alu_lsr", "alu_rol", "alu_ror", "alu_instructions"),
+	"bcd": ("bcd_add", "bcd_subtract", "bcd_add_bytes", "bcd_subtract_bytes", "binary_to_bcd", "bcd_to_binary",
+			  "is_valid_bcd", "bcd_add_batch", "bcd_subtract_batch", "bcd_add_rows", "bcd_subtract_rows",
+			  "bcd_to_binary_rows", "binary_to_bcd_rows"),
+	"multi_byte": ("add_bytes", "subtract_bytes", "compare_bytes", "shift_left_bytes", "shift_right_bytes",
+						"add_rows", "subtract_rows", "compare_rows", "shift_left_rows", "shift_right_rows"),
+	"fixed_point": ("FixedPointFormat", "fixed_8_8", "fixed_16_16", "fixed_point_formats", "fixed_point_formats_by_width",
+						 "fixed_add", "fixed_subtract", "fixed_multiply", "fixed_divide",
+						 "fixed_add_batch", "fixed_subtract_batch", "fixed_multiply_batch", "fixed_divide_batch",
+						 "to_fixed", "from_fixed", "parse_fixed", "format_fixed", "convert_fixed",
+						 "to_fixed_batch", "from_fixed_batch", "format_fixed_batch"),
+	"formatting": ("format_number", "format_table", "format_bytes"),
+	"number_field": ("NumberField",),
+	"dispatch": ("OperationDescriptor", "operations", "fixed_point_operations", "RESULT_FLAG", "QUOTIENT_REMAINDER"),
+	"expressions": ("parse_number", "parse_expression", "compile_expression", "evaluate_expression"),
+	"prg": ("PrgFile",),
+	"session": ("CalculatorSession",),
+}
+
+_module_of = {name: module for module, names in _modules.items() for name in names}
+
+__all__ = list(_module_of)
+
+def __getattr__(name):
+	if name not in _module_of:
+		raise AttributeError(f"module 't64_core' has no attribute '{name}'")
+
+	value = getattr(import_module(f"t64_core.{_module_of[name]}"), name)
+	globals()[name] = value # only look it up once
+
+	return value
+
+def __dir__():
+	return __all__
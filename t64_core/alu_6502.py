@@ -0,0 +1,292 @@
+from functools import wraps
+
+import numpy as np
+
+from t64_core.math_functions_bits_batch import add_bits_batch, subtract_bits_batch
+from t64_core.math_functions_signed_bits_batch import add_signed_bits_batch, subtract_signed_bits_batch
+
+'''
+6502 ALU
+
+Results and processor status flags for the 6502 ALU instructions:
+	ADC, SBC, CMP, AND, ORA, EOR, ASL, LSR, ROL, ROR
+
+Every instruction only ever sees 8-bit operands and a carry bit, so the
+answers are worked out once for every possible input (on first use) and
+looked up after that. Each function returns (result, flags), where flags
+uses the same bit positions as the 6502's P register:
+	FLAG_N  FLAG_V  -  -  -  -  FLAG_Z  FLAG_C
+
+Only the flags an instruction changes are reported; use merge_flags()
+to apply them to a full status byte:
+	result, flags = alu_adc(0x50, 0x50, 0)   # -> (0xA0, FLAG_N | FLAG_V)
+	status = merge_flags(status, flags, alu_adc)
+
+Every function also has a batch version for whole arrays of operands:
+	results, flags = alu_adc.batch(a_array, m_array, carry_array)
+
+CMP returns the comparison result (A - M) as its result, so that it can
+be checked, although the real CPU throws it away.
+
+Decimal mode (SED) isn't handled here; see bcd.py.
+'''
+
+FLAG_C = 0x01
+FLAG_Z = 0x02
+FLAG_V = 0x40
+FLAG_N = 0x80
+
+# every (carry, a, m) combination in table order
+_all_carry = np.arange(131072, dtype = np.int64) >> 16
+_all_a = (np.arange(131072, dtype = np.int64) >> 8) & 0xFF
+_all_m = np.arange(131072, dtype = np.int64) & 0xFF
+
+def _zn_flags(result):
+	"""The zero and negative flags for an array of 8-bit results."""
+	return np.where(result == 0, FLAG_Z, 0) | (result & FLAG_N)
+
+def _pack_flags(result, carry = None, overflow = None):
+	"""Builds a flags array from an array of results and optional carry/overflow arrays."""
+	flags = _zn_flags(result)
+
+	if carry is not None:
+		flags = flags | np.where(carry, FLAG_C, 0)
+
+	if overflow is not None:
+		flags = flags | np.where(overflow, FLAG_V, 0)
+
+	return flags.astype(np.uint8)
+
+# --- Table builders ---
+
+def _build_adc(a, m, carry):
+	# A + M first, then the carry, exactly as a chain of two additions
+	partial, carry_out1 = add_bits_batch(a, m, 8)
+	result, carry_out2 = add_bits_batch(partial, carry, 8)
+
+	# a signed overflow in one step can be undone by the other
+	# (-128 + -1 + 1 fits), so V is set when exactly one of them overflows
+	signed_partial, overflow1 = add_signed_bits_batch(a, m, 8)
+	_, overflow2 = add_signed_bits_batch(signed_partial, carry, 8)
+
+	result = result.astype(np.int64)
+
+	return result, _pack_flags(result, carry_out1 | carry_out2, overflow1 ^ overflow2)
+
+def _build_sbc(a, m, carry):
+	# A - M - borrow, where the borrow is the inverse of the carry
+	borrow = 1 - carry
+	partial, borrow_out1 = subtract_bits_batch(a, m, 8)
+	result, borrow_out2 = subtract_bits_batch(partial, borrow, 8)
+
+	signed_partial, overflow1 = subtract_signed_bits_batch(a, m, 8)
+	_, overflow2 = subtract_signed_bits_batch(signed_partial, borrow, 8)
+
+	result = result.astype(np.int64)
+
+	return result, _pack_flags(result, ~(borrow_out1 | borrow_out2), overflow1 ^ overflow2)
+
+def _build_cmp(a, m):
+	result, borrow = subtract_bits_batch(a, m, 8)
+	result = result.astype(np.int64)
+
+	return result, _pack_flags(result, ~borrow)
+
+def _build_logic(result):
+	return result, _pack_flags(result)
+
+def _build_asl(a):
+	result = (a << 1) & 0xFF
+
+	return result, _pack_flags(result, (a & 0x80) != 0)
+
+def _build_lsr(a):
+	result = a >> 1
+
+	return result, _pack_flags(result, (a & 0x01) != 0)
+
+def _build_rol(a, carry):
+	result = ((a << 1) & 0xFF) | carry
+
+	return result, _pack_flags(result, (a & 0x80) != 0)
+
+def _build_ror(a, carry):
+	result = (a >> 1) | (carry << 7)
+
+	return result, _pack_flags(result, (a & 0x01) != 0)
+
+class AluTable:
+	"""Result and flag tables for one instruction, built the first time they're needed."""
+	def __init__(self, build):
+		self._build = build
+		self._arrays = None # NumPy arrays for batch lookups
+		self.answers = [] # one (result, flags) tuple per index
+
+	def load(self):
+		self._arrays = tuple(np.asarray(column, dtype = np.uint8) for column in self._build())
+
+		distinct = {}
+		columns = [array.tolist() for array in self._arrays]
+		self.answers[:] = [distinct.setdefault(answer, answer) for answer in zip(*columns)]
+
+	@property
+	def arrays(self):
+		if self._arrays is None:
+			self.load()
+
+		return self._arrays
+
+	def batch(self, index):
+		return tuple(np.take(array, index) for array in self.arrays)
+
+def _as_index(values):
+	return np.asarray(values).astype(np.int64)
+
+def _carry_operand_instruction(name, build, affected):
+	"""An instruction that takes A, an operand and the carry: ADC, SBC."""
+	table = AluTable(lambda: build(_all_a, _all_m, _all_carry))
+	answers = table.answers
+
+	def instruction(a, m, carry):
+		if not answers:
+			table.load()
+
+		return answers[((carry & 1) << 16) | ((a & 0xFF) << 8) | (m & 0xFF)]
+
+	def batch(a, m, carry):
+		return table.batch(((_as_index(carry) & 1) << 16) | ((_as_index(a) & 0xFF) << 8) | (_as_index(m) & 0xFF))
+
+	return _finish(instruction, name, table, batch, affected)
+
+def _operand_instruction(name, build, affected):
+	"""An instruction that takes A and an operand: CMP, AND, ORA, EOR."""
+	table = AluTable(lambda: build(_all_a[:65536], _all_m[:65536]))
+	answers = table.answers
+
+	def instruction(a, m):
+		if not answers:
+			table.load()
+
+		return answers[((a & 0xFF) << 8) | (m & 0xFF)]
+
+	def batch(a, m):
+		return table.batch(((_as_index(a) & 0xFF) << 8) | (_as_index(m) & 0xFF))
+
+	return _finish(instruction, name, table, batch, affected)
+
+def _carry_instruction(name, build, affected):
+	"""A one-operand instruction that also takes the carry: ROL, ROR."""
+	table = AluTable(lambda: build(_all_m[:512], _all_a[:512] & 1))
+	answers = table.answers
+
+	def instruction(a, carry):
+		if not answers:
+			table.load()
+
+		return answers[((carry & 1) << 8) | (a & 0xFF)]
+
+	def batch(a, carry):
+		return table.batch(((_as_index(carry) & 1) << 8) | (_as_index(a) & 0xFF))
+
+	return _finish(instruction, name, table, batch, affected)
+
+def _single_instruction(name, build, affected):
+	"""A one-operand instruction: ASL, LSR."""
+	table = AluTable(lambda: build(_all_m[:256]))
+	answers = table.answers
+
+	def instruction(a):
+		if not answers:
+			table.load()
+
+		return answers[a & 0xFF]
+
+	def batch(a):
+		return table.batch(_as_index(a) & 0xFF)
+
+	return _finish(instruction, name, table, batch, affected)
+
+def _finish(instruction, name, table, batch, affected):
+	instruction.__name__ = instruction.__qualname__ = f"alu_{name.lower()}"
+	instruction.__doc__ = f"{name}: returns (result, flags). Affects {describe_flags(affected)}."
+	instruction.mnemonic = name
+	instruction.affected_flags = affected
+	instruction.table = table
+	instruction.batch = batch
+
+	return instruction
+
+def describe_flags(flags):
+	"""Formats a flags byte the way a monitor shows P, e.g. 'N.....ZC'."""
+	return "".join(letter if flags & bit else "." for letter, bit in
+						(("N", FLAG_N), ("V", FLAG_V), (".", 0), (".", 0), (".", 0), (".", 0), ("Z", FLAG_Z), ("C", FLAG_C)))
+
+def merge_flags(status, flags, instruction):
+	"""Applies an instruction's flags to a full status byte, leaving the flags it doesn't touch alone."""
+	return (status & ~instruction.affected_flags & 0xFF) | flags
+
+alu_adc = _carry_operand_instruction("ADC", _build_adc, FLAG_N | FLAG_V | FLAG_Z | FLAG_C)
+alu_sbc = _carry_operand_instruction("SBC", _build_sbc, FLAG_N | FLAG_V | FLAG_Z | FLAG_C)
+alu_cmp = _operand_instruction("CMP", _build_cmp, FLAG_N | FLAG_Z | FLAG_C)
+alu_and = _operand_instruction("AND", lambda a, m: _build_logic(a & m), FLAG_N | FLAG_Z)
+alu_ora = _operand_instruction("ORA", lambda a, m: _build_logic(a | m), FLAG_N | FLAG_Z)
+alu_eor = _operand_instruction("EOR", lambda a, m: _build_logic(a ^ m), FLAG_N | FLAG_Z)
+alu_asl = _single_instruction("ASL", _build_asl, FLAG_N | FLAG_Z | FLAG_C)
+alu_lsr = _single_instruction("LSR", _build_lsr, FLAG_N | FLAG_Z | FLAG_C)
+alu_rol = _carry_instruction("ROL", _build_rol, FLAG_N | FLAG_Z | FLAG_C)
+alu_ror = _carry_instruction("ROR", _build_ror, FLAG_N | FLAG_Z | FLAG_C)
+
+# mnemonic -> instruction
+alu_instructions = {instruction.mnemonic: instruction for instruction in
+						  (alu_adc, alu_sbc, alu_cmp, alu_and, alu_ora, alu_eor, alu_asl, alu_lsr, alu_rol, alu_ror)}
+
+def test_alu():
+	print("--- Testing 6502 ALU ---")
+	# ADC
+	assert alu_adc(0x50, 0x10, 0) == (0x60, 0)
+	assert alu_adc(0x50, 0x50, 0) == (0xA0, FLAG_N | FLAG_V)
+	assert alu_adc(0xFF, 0x01, 0) == (0x00, FLAG_Z | FLAG_C)
+	assert alu_adc(0xFF, 0x00, 1) == (0x00, FLAG_Z | FLAG_C)
+	assert alu_adc(0x80, 0xFF, 1) == (0x80, FLAG_N | FLAG_C) # -128 + -1 + 1 doesn't overflow
+	assert alu_adc(0x7F, 0x00, 1) == (0x80, FLAG_N | FLAG_V)
+	assert alu_adc(0xD0, 0x90, 0) == (0x60, FLAG_V | FLAG_C)
+
+	# SBC
+	assert alu_sbc(0x50, 0xF0, 1) == (0x60, 0)
+	assert alu_sbc(0x50, 0xB0, 1) == (0xA0, FLAG_N | FLAG_V)
+	assert alu_sbc(0x50, 0x30, 1) == (0x20, FLAG_C)
+	assert alu_sbc(0x50, 0x50, 0) == (0xFF, FLAG_N)
+	assert alu_sbc(0x00, 0x00, 1) == (0x00, FLAG_Z | FLAG_C)
+	assert alu_sbc(0x80, 0x00, 0) == (0x7F, FLAG_V | FLAG_C)
+
+	# CMP
+	assert alu_cmp(0x40, 0x40) == (0x00, FLAG_Z | FLAG_C)
+	assert alu_cmp(0x40, 0x41) == (0xFF, FLAG_N)
+	assert alu_cmp(0x41, 0x40) == (0x01, FLAG_C)
+
+	# logic
+	assert alu_and(0xF0, 0x0F) == (0x00, FLAG_Z)
+	assert alu_ora(0xF0, 0x0F) == (0xFF, FLAG_N)
+	assert alu_eor(0xFF, 0x0F) == (0xF0, FLAG_N)
+
+	# shifts and rotates
+	assert alu_asl(0x81) == (0x02, FLAG_C)
+	assert alu_lsr(0x01) == (0x00, FLAG_Z | FLAG_C)
+	assert alu_rol(0x80, 1) == (0x01, FLAG_C)
+	assert alu_rol(0x40, 0) == (0x80, FLAG_N)
+	assert alu_ror(0x01, 0) == (0x00, FLAG_Z | FLAG_C)
+	assert alu_ror(0x02, 1) == (0x81, FLAG_N)
+
+	# batch
+	results, flags = alu_adc.batch([0x50, 0xFF], [0x50, 0x01], [0, 0])
+	assert results.tolist() == [0xA0, 0x00] and flags.tolist() == [FLAG_N | FLAG_V, FLAG_Z | FLAG_C]
+
+	# flag merging: CMP leaves V alone
+	assert merge_flags(FLAG_V, alu_cmp(1, 1)[1], alu_cmp) == FLAG_V | FLAG_Z | FLAG_C
+	assert describe_flags(FLAG_N | FLAG_C) == "N......C"
+
+	print("6502 ALU tests passed!")
+
+
+if __name__ == "__main__":
+	test_alu()
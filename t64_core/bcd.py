@@ -0,0 +1,220 @@
+import numpy as np
+
+from t64_core.alu_6502 import AluTable
+
+'''
+Packed BCD (6502 decimal mode)
+
+With SED set, the 6502's ADC and SBC treat each byte as two decimal
+digits, $00 to $99. bcd_add() and bcd_subtract() give the same byte and
+carry the CPU does, including for bytes that aren't valid BCD (e.g. $0F).
+The algorithm follows the NMOS 6502. Only the carry is returned, because
+N, V and Z aren't reliable in decimal mode on the NMOS chip.
+
+As with the binary ADC/SBC, the carry goes in as 0 or 1 and comes back
+out: 1 after an add means "carried into the next byte", 1 after a
+subtract means "no borrow".
+
+Multi-byte numbers (score counters and the like) are little-endian byte
+sequences, lowest byte first, as they are in C-64 memory:
+	bcd_add_bytes(b"\x99\x09", b"\x01\x00")  ->  (b"\x00\x10", 0)
+Use "big" to work on numbers stored highest byte first.
+
+The batch functions take NumPy arrays; the *_rows versions take 2-D
+arrays with one multi-byte number per row.
+'''
+
+def _decimal_adc(a, b, carry):
+	"""NMOS 6502 decimal ADC on arrays. Returns (result, carry_out)."""
+	low = (a & 0x0F) + (b & 0x0F) + carry
+	low = np.where(low >= 0x0A, ((low + 0x06) & 0x0F) + 0x10, low)
+	total = (a & 0xF0) + (b & 0xF0) + low
+	total = np.where(total >= 0xA0, total + 0x60, total)
+
+	return total & 0xFF, (total >= 0x100).astype(np.int64)
+
+def _decimal_sbc(a, b, carry):
+	"""NMOS 6502 decimal SBC on arrays. Returns (result, carry_out)."""
+	low = (a & 0x0F) - (b & 0x0F) + carry - 1
+	low = np.where(low < 0, ((low - 0x06) & 0x0F) - 0x10, low)
+	total = (a & 0xF0) - (b & 0xF0) + low
+	total = np.where(total < 0, total - 0x60, total)
+
+	# the carry out of SBC is the same as in binary mode
+	return total & 0xFF, (a - b - (1 - carry) >= 0).astype(np.int64)
+
+def _as_index(values):
+	return np.asarray(values).astype(np.int64)
+
+# every (carry, a, b) combination in table order
+_all_carry = np.arange(131072, dtype = np.int64) >> 16
+_all_a = (np.arange(131072, dtype = np.int64) >> 8) & 0xFF
+_all_b = np.arange(131072, dtype = np.int64) & 0xFF
+
+_add_table = AluTable(lambda: _decimal_adc(_all_a, _all_b, _all_carry))
+_subtract_table = AluTable(lambda: _decimal_sbc(_all_a, _all_b, _all_carry))
+
+def _lookup(table, a, b, carry):
+	if not table.answers:
+		table.load()
+
+	return table.answers[((carry & 1) << 16) | ((a & 0xFF) << 8) | (b & 0xFF)]
+
+def bcd_add(a, b, carry = 0):
+	"""Adds two BCD bytes as ADC does in decimal mode. Returns (result, carry_out)."""
+	return _lookup(_add_table, a, b, carry)
+
+def bcd_subtract(a, b, carry = 1):
+	"""Subtracts two BCD bytes as SBC does in decimal mode. Returns (result, carry_out)."""
+	return _lookup(_subtract_table, a, b, carry)
+
+def _chain(byte_function, a, b, carry, byteorder):
+	if len(a) != len(b):
+		raise ValueError("Both numbers must have the same number of bytes")
+
+	positions = range(len(a)) if byteorder == "little" else range(len(a) - 1, -1, -1)
+	result = bytearray(len(a))
+
+	for position in positions:
+		result[position], carry = byte_function(a[position], b[position], carry)
+
+	return bytes(result), carry
+
+def bcd_add_bytes(a, b, carry = 0, byteorder = "little"):
+	"""Adds two multi-byte BCD numbers, carrying from byte to byte. Returns (bytes, carry_out)."""
+	return _chain(bcd_add, a, b, carry, byteorder)
+
+def bcd_subtract_bytes(a, b, carry = 1, byteorder = "little"):
+	"""Subtracts two multi-byte BCD numbers, borrowing from byte to byte. Returns (bytes, carry_out)."""
+	return _chain(bcd_subtract, a, b, carry, byteorder)
+
+# --- Conversions ---
+
+def binary_to_bcd(value, num_bytes = 1, byteorder = "little"):
+	"""Converts a non-negative integer to packed BCD bytes."""
+	if value < 0 or value >= 100 ** num_bytes:
+		raise ValueError(f"{value} doesn't fit in {num_bytes} BCD byte(s)")
+
+	return int(str(value), 16).to_bytes(num_bytes, byteorder)
+
+def bcd_to_binary(data, byteorder = "little"):
+	"""Converts packed BCD bytes to an integer. Raises ValueError on a non-decimal digit."""
+	digits = bytes(data).hex() if byteorder == "big" else bytes(data)[::-1].hex()
+
+	if not digits.isdigit():
+		raise ValueError(f"{digits} is not a valid BCD number")
+
+	return int(digits)
+
+def is_valid_bcd(data):
+	"""True if every nibble in the bytes is a decimal digit."""
+	return all((byte & 0x0F) < 10 and (byte >> 4) < 10 for byte in bytes(data))
+
+# --- Batch versions ---
+
+def bcd_add_batch(a, b, carry = 0):
+	"""Adds arrays of BCD bytes. Returns (results, carries)."""
+	return _add_table.batch(((_as_index(carry) & 1) << 16) | ((_as_index(a) & 0xFF) << 8) | (_as_index(b) & 0xFF))
+
+def bcd_subtract_batch(a, b, carry = 1):
+	"""Subtracts arrays of BCD bytes. Returns (results, carries)."""
+	return _subtract_table.batch(((_as_index(carry) & 1) << 16) | ((_as_index(a) & 0xFF) << 8) | (_as_index(b) & 0xFF))
+
+def _chain_rows(batch_function, a, b, carry, byteorder):
+	a = np.asarray(a, dtype = np.uint8)
+	b = np.asarray(b, dtype = np.uint8)
+
+	if a.shape != b.shape:
+		raise ValueError("Both arrays must have the same shape")
+
+	result = np.empty_like(a)
+	carry = np.broadcast_to(np.asarray(carry, dtype = np.int64), a.shape[:1]).copy()
+	columns = range(a.shape[1]) if byteorder == "little" else range(a.shape[1] - 1, -1, -1)
+
+	# one column of bytes at a time, for every row at once
+	for column in columns:
+		result[:, column], carry = batch_function(a[:, column], b[:, column], carry)
+
+	return result, carry.astype(np.uint8)
+
+def bcd_add_rows(a, b, carry = 0, byteorder = "little"):
+	"""Adds two 2-D arrays of multi-byte BCD numbers, one number per row. Returns (results, carries)."""
+	return _chain_rows(bcd_add_batch, a, b, carry, byteorder)
+
+def bcd_subtract_rows(a, b, carry = 1, byteorder = "little"):
+	"""Subtracts two 2-D arrays of multi-byte BCD numbers, one number per row. Returns (results, carries)."""
+	return _chain_rows(bcd_subtract_batch, a, b, carry, byteorder)
+
+# byte value -> its value as a BCD byte (0-99), or -1 if it isn't valid BCD
+_bcd_byte_values = np.array([(byte >> 4) * 10 + (byte & 0x0F) if (byte >> 4) < 10 and (byte & 0x0F) < 10 else -1
+									  for byte in range(256)], dtype = np.int64)
+
+# 0-99 -> its BCD byte
+_binary_byte_values = np.array([int(str(value), 16) for value in range(100)], dtype = np.uint8)
+
+def bcd_to_binary_rows(rows, byteorder = "little"):
+	"""
+	Converts a 2-D array of packed BCD numbers (one per row) to a 1-D array of
+	integers. Raises ValueError if any byte isn't valid BCD.
+	"""
+	rows = np.asarray(rows, dtype = np.uint8)
+	digit_pairs = _bcd_byte_values[rows]
+
+	if (digit_pairs < 0).any():
+		raise ValueError("Array contains bytes that aren't valid BCD")
+
+	if byteorder == "big":
+		digit_pairs = digit_pairs[:, ::-1]
+
+	scale = 100 ** np.arange(rows.shape[1], dtype = np.int64)
+
+	return digit_pairs @ scale
+
+def binary_to_bcd_rows(values, num_bytes, byteorder = "little"):
+	"""Converts a 1-D array of integers to a 2-D array of packed BCD numbers, one per row."""
+	values = np.asarray(values, dtype = np.int64)
+
+	if (values < 0).any() or (values >= 100 ** num_bytes).any():
+		raise ValueError(f"Array contains values that don't fit in {num_bytes} BCD byte(s)")
+
+	digit_pairs = (values[:, None] // 100 ** np.arange(num_bytes, dtype = np.int64)) % 100
+	rows = _binary_byte_values[digit_pairs]
+
+	return rows[:, ::-1] if byteorder == "big" else rows
+
+def test_bcd():
+	print("--- Testing BCD ---")
+	assert bcd_add(0x09, 0x01) == (0x10, 0)
+	assert bcd_add(0x99, 0x01) == (0x00, 1)
+	assert bcd_add(0x58, 0x46, 1) == (0x05, 1)
+	assert bcd_add(0x12, 0x34) == (0x46, 0)
+	assert bcd_subtract(0x46, 0x12) == (0x34, 1)
+	assert bcd_subtract(0x40, 0x13) == (0x27, 1)
+	assert bcd_subtract(0x32, 0x02, 0) == (0x29, 1)
+	assert bcd_subtract(0x12, 0x21) == (0x91, 0)
+	assert bcd_subtract(0x00, 0x01) == (0x99, 0)
+
+	assert bcd_add_bytes(b"\x99\x09", b"\x01\x00") == (b"\x00\x10", 0)
+	assert bcd_add_bytes(b"\x99\x99", b"\x01\x00") == (b"\x00\x00", 1)
+	assert bcd_subtract_bytes(b"\x00\x10", b"\x01\x00") == (b"\x99\x09", 1)
+	assert bcd_add_bytes(b"\x09\x99", b"\x00\x01", byteorder = "big") == (b"\x10\x00", 0)
+
+	assert binary_to_bcd(1234, 2) == b"\x34\x12"
+	assert bcd_to_binary(b"\x34\x12") == 1234
+	assert bcd_to_binary(b"\x12\x34", byteorder = "big") == 1234
+	assert is_valid_bcd(b"\x99\x00") and not is_valid_bcd(b"\x0A")
+
+	scores = np.array([0, 7, 99, 1234, 999999])
+	rows = binary_to_bcd_rows(scores, 3)
+	assert rows[3].tolist() == [0x34, 0x12, 0x00]
+	assert bcd_to_binary_rows(rows).tolist() == scores.tolist()
+
+	totals, carries = bcd_add_rows(rows, binary_to_bcd_rows(np.ones(5, dtype = np.int64), 3))
+	assert bcd_to_binary_rows(totals).tolist() == [1, 8, 100, 1235, 0]
+	assert carries.tolist() == [0, 0, 0, 0, 1]
+
+	print("BCD tests passed!")
+
+
+if __name__ == "__main__":
+	test_bcd()
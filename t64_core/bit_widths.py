@@ -0,0 +1,65 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+'''
+Bit width descriptors
+
+Everything the math and bitwise functions need to know about a bit
+width is worked out once, here, instead of on every call. To get the
+descriptor for a width:
+	width = get_bit_width(16)
+	width.mask        ->  0xFFFF
+	width.min_signed  ->  -32768
+
+Adding a new width is a matter of adding it to supported_bit_widths.
+'''
+
+supported_bit_widths = (8, 16, 24, 32, 64)
+
+# a named tuple rather than a dataclass: importing dataclasses costs more
+# than the whole of the rest of the engine's scalar code
+BitWidth = namedtuple("BitWidth",
+	[
+		"bits",
+		"mask", # also the largest unsigned value
+		"modulus", # 1 << bits
+		"sign_bit", # 1 << (bits - 1)
+		"min_signed",
+		"max_signed",
+		"unsigned_dtype", # NumPy dtype that holds an unsigned value of this width
+		"signed_dtype", # NumPy dtype that holds a signed value of this width
+	])
+
+def _describe(bits):
+	"""Builds the descriptor for one bit width."""
+	storage_bits = 8
+
+	while storage_bits < bits:
+		storage_bits *= 2
+
+	return BitWidth(
+		bits = bits,
+		mask = (1 << bits) - 1,
+		modulus = 1 << bits,
+		sign_bit = 1 << (bits - 1),
+		min_signed = -(1 << (bits - 1)),
+		max_signed = (1 << (bits - 1)) - 1,
+		unsigned_dtype = f"uint{storage_bits}",
+		signed_dtype = f"int{storage_bits}",
+	)
+
+bit_widths = MappingProxyType({bits: _describe(bits) for bits in supported_bit_widths})
+
+_invalid_width_message = "Invalid bit width. Must be one of: " + ", ".join(str(bits) for bits in supported_bit_widths)
+
+def get_bit_width(bits):
+	"""Returns the descriptor for a bit width, or raises ValueError if it isn't supported."""
+	try:
+		return bit_widths[bits]
+	except (KeyError, TypeError):
+		raise ValueError(_invalid_width_message) from None
+
+
+if __name__ == "__main__":
+	for width in bit_widths.values():
+		print(width)
@@ -0,0 +1,193 @@
+import numpy as np
+
+from t64_core.bit_widths import get_bit_width
+from t64_core.twos_complement import sign_extend_batch
+
+'''
+Array versions of the functions in bit_wise_operations_unsigned.py and
+bit_wise_operations_signed.py
+
+Each function takes NumPy arrays (or anything np.asarray() accepts) and
+returns (results, flags), like its scalar twin; the flags are always
+True. Unsigned results come back in the bit width's unsigned dtype and
+signed ones in its signed dtype.
+
+Shift counts have to be 0 or more, as in the scalar functions. A count
+of the bit width or more shifts every bit out: 0, or -1 for a negative
+number shifted right in signed mode.
+'''
+
+def _mask(width):
+	return np.uint64(width.mask) if width.bits <= 32 else width.mask
+
+def _unsigned(values, width):
+	"""An operand masked to the bit width, as a working array."""
+	# 64-bit shifts don't fit in uint64, so fall back to arrays of Python ints
+	work_dtype = np.uint64 if width.bits <= 32 else object
+
+	return np.asarray(values).astype(work_dtype) & _mask(width)
+
+def _signed(values, width):
+	"""An operand sign-extended from the bit width, as a working array."""
+	work_dtype = np.int64 if width.bits <= 32 else object
+
+	return sign_extend_batch(np.asarray(values).astype(work_dtype), width.bits)
+
+def _counts(shift_by, like, width):
+	"""Shift counts as the working array's dtype, cut down to the bit width."""
+	shift_by = np.asarray(shift_by)
+
+	if np.any(shift_by < 0):
+		raise ValueError("Number of bits to shift must be non-negative")
+
+	# past the bit width every count gives the same answer, and NumPy can't shift 64 bits or more
+	return np.minimum(shift_by, width.bits).astype(like.dtype)
+
+def _flags(results):
+	return np.ones(np.shape(results), dtype = bool)
+
+def _unsigned_result(results, width):
+	return results.astype(width.unsigned_dtype), _flags(results)
+
+def _signed_result(results, width):
+	return results.astype(width.signed_dtype), _flags(results)
+
+# --- Unsigned ---
+
+def bitwise_and_batch(a, b, bits):
+	"""ANDs two arrays of unsigned integers."""
+	width = get_bit_width(bits)
+
+	return _unsigned_result(_unsigned(a, width) & _unsigned(b, width), width)
+
+def bitwise_or_batch(a, b, bits):
+	"""ORs two arrays of unsigned integers."""
+	width = get_bit_width(bits)
+
+	return _unsigned_result(_unsigned(a, width) | _unsigned(b, width), width)
+
+def bitwise_xor_batch(a, b, bits):
+	"""XORs two arrays of unsigned integers."""
+	width = get_bit_width(bits)
+
+	return _unsigned_result(_unsigned(a, width) ^ _unsigned(b, width), width)
+
+def bitwise_not_batch(a, bits):
+	"""Inverts every bit of an array of unsigned integers."""
+	width = get_bit_width(bits)
+
+	return _unsigned_result(_unsigned(a, width) ^ _mask(width), width)
+
+def shift_left_batch(a, shift_by, bits):
+	"""Shifts an array of unsigned integers left, shifting zeros in."""
+	width = get_bit_width(bits)
+	a = _unsigned(a, width)
+
+	return _unsigned_result((a << _counts(shift_by, a, width)) & _mask(width), width)
+
+def shift_right_batch(a, shift_by, bits):
+	"""Shifts an array of unsigned integers right, shifting zeros in."""
+	width = get_bit_width(bits)
+	a = _unsigned(a, width)
+
+	return _unsigned_result(a >> _counts(shift_by, a, width), width)
+
+# --- Signed ---
+
+def bitwise_and_signed_batch(a, b, bits):
+	"""ANDs two arrays of signed integers."""
+	width = get_bit_width(bits)
+
+	return _signed_result(_signed(a, width) & _signed(b, width), width)
+
+def bitwise_or_signed_batch(a, b, bits):
+	"""ORs two arrays of signed integers."""
+	width = get_bit_width(bits)
+
+	return _signed_result(_signed(a, width) | _signed(b, width), width)
+
+def bitwise_xor_signed_batch(a, b, bits):
+	"""XORs two arrays of signed integers."""
+	width = get_bit_width(bits)
+
+	return _signed_result(_signed(a, width) ^ _signed(b, width), width)
+
+def bitwise_not_signed_batch(a, bits):
+	"""Inverts every bit of an array of signed integers."""
+	width = get_bit_width(bits)
+
+	# ~ of a sign-extended value is still sign-extended
+	return _signed_result(~_signed(a, width), width)
+
+def shift_left_signed_batch(a, shift_by, bits):
+	"""Shifts an array of signed integers left, shifting zeros in."""
+	width = get_bit_width(bits)
+	a = _signed(a, width)
+
+	# int64 shifts drop the bits they push out of the top, but only the low bits are kept anyway
+	return _signed_result(sign_extend_batch(a << _counts(shift_by, a, width), bits), width)
+
+def shift_right_signed_batch(a, shift_by, bits):
+	"""Shifts an array of signed integers right, copying the sign bit in."""
+	width = get_bit_width(bits)
+	a = _signed(a, width)
+
+	return _signed_result(a >> _counts(shift_by, a, width), width)
+
+def test_batch_matches_scalar():
+	from t64_core.bit_wise_operations_unsigned import bitwise_and, bitwise_or, bitwise_xor, bitwise_not, \
+		shift_left, shift_right
+	from t64_core.bit_wise_operations_signed import bitwise_and_signed, bitwise_or_signed, bitwise_xor_signed, \
+		bitwise_not_signed, shift_left_signed, shift_right_signed
+
+	print("\n--- Testing bitwise batch functions against scalar functions ---")
+	pairs = \
+	{
+		bitwise_and_batch: bitwise_and, bitwise_or_batch: bitwise_or, bitwise_xor_batch: bitwise_xor,
+		bitwise_and_signed_batch: bitwise_and_signed, bitwise_or_signed_batch: bitwise_or_signed,
+		bitwise_xor_signed_batch: bitwise_xor_signed,
+	}
+	shifts = \
+	{
+		shift_left_batch: shift_left, shift_right_batch: shift_right,
+		shift_left_signed_batch: shift_left_signed, shift_right_signed_batch: shift_right_signed,
+	}
+	nots = {bitwise_not_batch: bitwise_not, bitwise_not_signed_batch: bitwise_not_signed}
+
+	for bits in (8, 16, 24, 32, 64):
+		width = get_bit_width(bits)
+		values = [0, 1, 5, -1, -2, width.sign_bit, width.sign_bit - 1, width.mask, width.mask + 3, 0x5A5A5A5A5A5A]
+		a = [x for x in values for _ in values]
+		b = [y for _ in values for y in values]
+		counts = [0, 1, 3, bits - 1, bits, bits + 1, 200]
+
+		for batch, scalar in pairs.items():
+			results, flags = batch(a, b, bits)
+			assert results.tolist() == [scalar(x, y, bits)[0] for x, y in zip(a, b)], (batch.__name__, bits)
+			assert flags.all()
+
+		for batch, scalar in nots.items():
+			assert batch(values, bits)[0].tolist() == [scalar(x, bits)[0] for x in values], (batch.__name__, bits)
+
+		for batch, scalar in shifts.items():
+			shifted = [x for x in values for _ in counts]
+			by = [n for _ in values for n in counts]
+			assert batch(shifted, by, bits)[0].tolist() == [scalar(x, n, bits)[0] for x, n in zip(shifted, by)], \
+				(batch.__name__, bits)
+
+			try:
+				batch([1], [-1], bits)
+			except ValueError:
+				pass
+			else:
+				raise AssertionError("a negative shift count was accepted")
+
+	# counts too big for any NumPy integer
+	assert shift_left_batch([1], [10**30], 16)[0].tolist() == [0]
+	assert shift_right_signed_batch([-5], [10**30], 64)[0].tolist() == [-1]
+
+	print("bitwise batch tests passed!")
+
+
+if __name__ == "__main__":
+	test_batch_matches_scalar()
@@ -1,36 +1,25 @@
+from t64_core.bit_widths import get_bit_width
+from t64_core.twos_complement import sign_extend, to_unsigned
+
 def _to_twos_complement(value, bit_width):
     """
     Converts a Python integer to its two's complement representation
     within the specified bit_width.
     """
-    if value >= 0:
-        return value
-    else:
-        # For negative numbers, Python's int handles two's complement naturally
-        # when performing bitwise operations if we ensure it's within the range.
-        # This is primarily for conceptual understanding.
-        # Actual bitwise ops in Python treat negative numbers as infinitely long
-        # two's complement, so we'll often use masking to constrain.
-        return value + (1 << bit_width)
+    return to_unsigned(value, bit_width)
 
 def _from_twos_complement(value, bit_width):
     """
     Converts a two's complement representation back to a Python signed integer.
     """
-    msb_mask = 1 << (bit_width - 1)
-    if (value & msb_mask) != 0:  # If MSB is set, it's a negative number
-        return value - (1 << bit_width)
-    else:
-        return value
+    return sign_extend(value, bit_width)
 
 def _normalize(value, bit_width):
     """
-    Ensures the value is within the positive range [0, 2^bit_width - 1]
-    for bitwise operations, then converts back to signed representation.
+    Truncates the value to bit_width bits and converts it to the signed
+    representation. sign_extend() does both in one step.
     """
-    mask = (1 << bit_width) - 1
-    normalized_value = value & mask
-    return _from_twos_complement(normalized_value, bit_width)
+    return sign_extend(value, bit_width)
 
 # --- Bitwise Operation Functions ---
 
@@ -38,74 +27,66 @@ def bitwise_and_signed(a, b, bit_width):
     """
     Performs bitwise AND on two signed integers within the specified bit_width.
     """
-    if not (bit_width == 8 or bit_width == 16):
-        raise ValueError("bit_width must be 8 or 16")
-
     # Treat inputs as unsigned for the actual bitwise operation, then normalize.
-    mask = (1 << bit_width) - 1
+    width = get_bit_width(bit_width)
+    mask, sign_bit = width.mask, width.sign_bit
     result = (a & mask) & (b & mask)
-    return _normalize(result, bit_width), True
+    return (result ^ sign_bit) - sign_bit, True
 
 def bitwise_or_signed(a, b, bit_width):
     """
     Performs bitwise OR on two signed integers within the specified bit_width.
     """
-    if not (bit_width == 8 or bit_width == 16):
-        raise ValueError("bit_width must be 8 or 16")
-
-    mask = (1 << bit_width) - 1
+    width = get_bit_width(bit_width)
+    mask, sign_bit = width.mask, width.sign_bit
     result = (a & mask) | (b & mask)
-    return _normalize(result, bit_width), True
+    return (result ^ sign_bit) - sign_bit, True
 
 def bitwise_xor_signed(a, b, bit_width):
     """
     Performs bitwise XOR on two signed integers within the specified bit_width.
     """
-    if not (bit_width == 8 or bit_width == 16):
-        raise ValueError("bit_width must be 8 or 16")
-
-    mask = (1 << bit_width) - 1
+    width = get_bit_width(bit_width)
+    mask, sign_bit = width.mask, width.sign_bit
     result = (a & mask) ^ (b & mask)
-    return _normalize(result, bit_width), True
+    return (result ^ sign_bit) - sign_bit, True
 
 def bitwise_not_signed(a, bit_width):
     """
     Performs bitwise NOT (one's complement) on a signed integer
     within the specified bit_width.
     """
-    if not (bit_width == 8 or bit_width == 16):
-        raise ValueError("bit_width must be 8 or 16")
-
-    mask = (1 << bit_width) - 1
+    width = get_bit_width(bit_width)
+    mask, sign_bit = width.mask, width.sign_bit
     # Python's ~ operator works on arbitrary precision.
     # We need to mask the result to simulate fixed width.
     result = (~a) & mask
-    return _normalize(result, bit_width), True
+    return (result ^ sign_bit) - sign_bit, True
 
 def shift_left_signed(a, shift_by, bit_width):
     """
     Performs a logical left shift on a signed integer.
     Zeros are shifted in from the right.
     """
-    if not (bit_width == 8 or bit_width == 16):
-        raise ValueError("bit_width must be 8 or 16")
+    width = get_bit_width(bit_width)
+    mask, sign_bit = width.mask, width.sign_bit
 
     if shift_by < 0:
         raise ValueError("Number of bits to shift must be non-negative")
 
-    mask = (1 << bit_width) - 1
     # Perform the shift, then mask to truncate any overflow
-    # and normalize to signed representation.
-    shifted_val = (a & mask) << shift_by
-    return _normalize(shifted_val, bit_width), True
+    # and normalize to signed representation. Past the bit width
+    # every count gives 0, so a huge count isn't shifted out.
+    shifted_val = ((a & mask) << min(shift_by, bit_width)) & mask
+    return (shifted_val ^ sign_bit) - sign_bit, True
 
 def shift_right_signed(a, shift_by, bit_width):
     """
     Performs an arithmetic right shift on a signed integer.
     The sign bit is extended from the left.
     """
-    if not (bit_width == 8 or bit_width == 16):
-        raise ValueError("bit_width must be 8 or 16")
+    width = get_bit_width(bit_width)
+    mask, sign_bit = width.mask, width.sign_bit
 
     if shift_by < 0:
         raise ValueError("Number of bits to shift must be non-negative")
@@ -116,13 +97,11 @@ def shift_right_signed(a, shift_by, bit_width):
     
     # First, convert 'a' to its true signed value within the bit_width if it's currently
     # represented by a positive masked value.
-    actual_signed_a = _from_twos_complement(a & ((1 << bit_width) - 1), bit_width)
+    actual_signed_a = ((a & mask) ^ sign_bit) - sign_bit
 
-    # Perform the arithmetic shift using Python's '>>'
-    shifted_val = actual_signed_a >> shift_by
-    
-    # Normalize the result back to the expected fixed-width signed representation
-    return _normalize(shifted_val, bit_width), True
+    # Perform the arithmetic shift using Python's '>>'. The result is
+    # always in range, so it needs no normalizing.
+    return actual_signed_a >> shift_by, True
 
 
 # --- Example Usage ---
@@ -1,10 +1,11 @@
+from t64_core.bit_widths import bit_widths, get_bit_width
+
 # --- Helper Function for Unsigned ---
 def _normalize(value, bit_width):
     """
     Ensures the value stays within the unsigned range [0, 2^bit_width - 1].
     """
-    mask = (1 << bit_width) - 1
-    return value & mask
+    return value & bit_widths[bit_width].mask
 
 # --- Unsigned Bitwise Operation Functions ---
 
@@ -12,23 +13,16 @@ def bitwise_and(a, b, bit_width):
     """
     Performs bitwise AND on two unsigned integers within the specified bit_width.
     """
-    if not (bit_width == 8 or bit_width == 16):
-        raise ValueError("bit_width must be 8 or 16")
-
     # Mask inputs to ensure they are treated as unsigned within the bit_width
-    mask = (1 << bit_width) - 1
+    mask = get_bit_width(bit_width).mask
     result = (a & mask) & (b & mask)
-    print("result: ", result)
     return result, True # No complex normalization needed, just masking
 
 def bitwise_or(a, b, bit_width):
     """
     Performs bitwise OR on two unsigned integers within the specified bit_width.
     """
-    if not (bit_width == 8 or bit_width == 16):
-        raise ValueError("bit_width must be 8 or 16")
-
-    mask = (1 << bit_width) - 1
+    mask = get_bit_width(bit_width).mask
     result = (a & mask) | (b & mask)
     return result, True
 
@@ -36,10 +30,7 @@ def bitwise_xor(a, b, bit_width):
     """
     Performs bitwise XOR on two unsigned integers within the specified bit_width.
     """
-    if not (bit_width == 8 or bit_width == 16):
-        raise ValueError("bit_width must be 8 or 16")
-
-    mask = (1 << bit_width) - 1
+    mask = get_bit_width(bit_width).mask
     result = (a & mask) ^ (b & mask)
     return result, True
 
@@ -48,10 +39,7 @@ def bitwise_not(a, bit_width):
     Performs bitwise NOT (one's complement) on an unsigned integer
     within the specified bit_width.
     """
-    if not (bit_width == 8 or bit_width == 16):
-        raise ValueError("bit_width must be 8 or 16")
-
-    mask = (1 << bit_width) - 1
+    mask = get_bit_width(bit_width).mask
     # Python's ~ operator works on arbitrary precision.
     # We need to mask the result to simulate fixed width.
     result = (~a) & mask
@@ -62,33 +50,30 @@ def shift_left(a, shift_by, bit_width):
     Performs a logical left shift on an unsigned integer.
     Zeros are shifted in from the right.
     """
-    if not (bit_width == 8 or bit_width == 16):
-        raise ValueError("bit_width must be 8 or 16")
+    mask = get_bit_width(bit_width).mask
 
     if shift_by < 0:
         raise ValueError("Number of bits to shift must be non-negative")
 
-    mask = (1 << bit_width) - 1
-    # Perform the shift, then mask to truncate any overflow
-    shifted_val = (a & mask) << shift_by
-    return _normalize(shifted_val, bit_width), True
+    # Perform the shift, then mask to truncate any overflow. Past the
+    # bit width every count gives 0, so a huge count isn't shifted out.
+    shifted_val = (a & mask) << min(shift_by, bit_width)
+    return shifted_val & mask, True
 
 def shift_right(a, shift_by, bit_width):
     """
     Performs a logical right shift on an unsigned integer.
     Zeros are shifted in from the left. (Equivalent to logical_right_shift for signed)
     """
-    if not (bit_width == 8 or bit_width == 16):
-        raise ValueError("bit_width must be 8 or 16")
+    mask = get_bit_width(bit_width).mask
 
     if shift_by < 0:
         raise ValueError("Number of bits to shift must be non-negative")
 
-    mask = (1 << bit_width) - 1
     # Ensure 'a' is treated as unsigned for the logical shift
     unsigned_a = a & mask
     shifted_val = unsigned_a >> shift_by
-    return _normalize(shifted_val, bit_width), True
+    return shifted_val & mask, True
 
 
 # --- Example Usage for Unsigned ---
@@ -0,0 +1,148 @@
+from collections import namedtuple
+
+from t64_core.bit_widths import supported_bit_widths
+from t64_core.math_functions_bits import *
+from t64_core.math_functions_signed_bits import *
+from t64_core.bit_wise_operations_signed import *
+from t64_core.bit_wise_operations_unsigned import *
+from t64_core.math_functions_bits_batch import *
+from t64_core.math_functions_signed_bits_batch import *
+from t64_core.bit_wise_operations_batch import *
+from t64_core.lookup_tables_8bit import table_functions
+from t64_core.fixed_point import *
+
+'''
+Operation dispatch
+
+Every operation the calculator can do, at every signedness and bit
+width, is worked out once, here, into a table keyed by the operation's
+button label, whether it's signed and the bit width:
+	operation = operations[("+", False, 8)]
+	operation.arity         ->  2
+	operation(250, 10)      ->  (4, True)
+	operation.batch(a, b)   ->  (results, flags), for arrays of operands
+	operation.result_shape  ->  ("result", "flag")
+
+The width is already bound into the kernels, so every operation is
+called the same way, with just its operands. 8-bit operations use the
+lookup tables (see lookup_tables_8bit.py) where there is one. Every
+operation has a batch version, at every width.
+
+Fixed-point operations are in fixed_point_operations, keyed by the
+operation and the bit width of the integer part (8.8 or 16.16).
+'''
+
+# what each value an operation returns means
+RESULT_FLAG = ("result", "flag") # the flag is overflow, underflow or always True, depending on the operation
+# the flag is divide by zero, and for signed division also a quotient that wrapped (-128 / -1 in
+# 8 bits): a divisor of 0 tells them apart
+QUOTIENT_REMAINDER = ("quotient", "remainder", "flag")
+
+class OperationDescriptor(namedtuple("OperationDescriptor",
+	[
+		"operation", # the button label: "+", "AND", "NOT"...
+		"signed",
+		"bits",
+		"arity", # how many operands it takes
+		"scalar", # scalar(a, b) or scalar(a) for one-number operations
+		"batch", # the same for NumPy arrays
+		"result_shape", # RESULT_FLAG or QUOTIENT_REMAINDER
+	])):
+	"""One operation at one signedness and bit width. Calling it calls its scalar kernel."""
+	__slots__ = ()
+
+	def __call__(self, *operands):
+		return self.scalar(*operands)
+
+# label -> (unsigned function, signed function, batch unsigned, batch signed)
+_kernels = \
+{
+	"+": (add_bits, add_signed_bits, add_bits_batch, add_signed_bits_batch),
+	"-": (subtract_bits, subtract_signed_bits, subtract_bits_batch, subtract_signed_bits_batch),
+	"*": (multiply_bits, multiply_signed_bits, multiply_bits_batch, multiply_signed_bits_batch),
+	"/": (divide_bits, divide_signed_bits, divide_bits_batch, divide_signed_bits_batch),
+	"AND": (bitwise_and, bitwise_and_signed, bitwise_and_batch, bitwise_and_signed_batch),
+	"OR": (bitwise_or, bitwise_or_signed, bitwise_or_batch, bitwise_or_signed_batch),
+	"XOR": (bitwise_xor, bitwise_xor_signed, bitwise_xor_batch, bitwise_xor_signed_batch),
+	"<<": (shift_left, shift_left_signed, shift_left_batch, shift_left_signed_batch),
+	">>": (shift_right, shift_right_signed, shift_right_batch, shift_right_signed_batch),
+	"NOT": (bitwise_not, bitwise_not_signed, bitwise_not_batch, bitwise_not_signed_batch),
+}
+
+_unary_operations = {"NOT"}
+
+def _bind(function, last_argument):
+	"""function with its width (or fixed-point format) argument filled in."""
+	if function is None:
+		return None
+
+	return lambda *operands: function(*operands, last_argument)
+
+def _describe(operation, signed, bits):
+	unsigned_function, signed_function, unsigned_batch, signed_batch = _kernels[operation]
+	function = signed_function if signed else unsigned_function
+	batch = _bind(signed_batch if signed else unsigned_batch, bits)
+
+	if bits == 8 and function in table_functions:
+		function = table_functions[function]
+		# the table's batch lookup already knows its width
+		batch = function.batch
+
+	return OperationDescriptor(operation, signed, bits, 1 if operation in _unary_operations else 2,
+										_bind(function, bits), batch, QUOTIENT_REMAINDER if operation == "/" else RESULT_FLAG)
+
+# (operation, signed, bits) -> OperationDescriptor
+operations = {(operation, signed, bits): _describe(operation, signed, bits)
+				  for operation in _kernels for signed in (False, True) for bits in supported_bit_widths}
+
+_fixed_point_kernels = \
+{
+	"+": (fixed_add, fixed_add_batch),
+	"-": (fixed_subtract, fixed_subtract_batch),
+	"*": (fixed_multiply, fixed_multiply_batch),
+	"/": (fixed_divide, fixed_divide_batch),
+}
+
+# (operation, bits) -> OperationDescriptor working on raw fixed-point values.
+# Fixed-point division returns (result, flag) like the rest.
+fixed_point_operations = {(operation, bits): OperationDescriptor(operation, True, bits, 2, _bind(function, fixed_point_format),
+																					  _bind(batch, fixed_point_format), RESULT_FLAG)
+								  for operation, (function, batch) in _fixed_point_kernels.items()
+								  for bits, fixed_point_format in fixed_point_formats_by_width.items()}
+
+
+def test_dispatch():
+	import numpy as np
+
+	print("--- Testing operation dispatch ---")
+	assert operations[("+", False, 8)](250, 10) == (4, True)
+	assert operations[("/", True, 16)](-7, 2)[:2] == divide_signed_bits(-7, 2, 16)[:2]
+	assert operations[("/", False, 32)].result_shape == QUOTIENT_REMAINDER
+	assert operations[("NOT", True, 8)].arity == 1 and operations[("NOT", True, 8)](4) == (-5, True)
+	assert operations[("NOT", False, 16)](0) == (0xFFFF, True)
+	assert operations[(">>", True, 24)](-8, 1) == (-4, True)
+	assert operations[("XOR", False, 16)].batch([0xFF00], [0x0FF0])[0].tolist() == [0xF0F0]
+	assert operations[("<<", True, 32)].batch([-1], [40])[0].tolist() == [0]
+
+	# every operation at every width gives what its function gives
+	for (operation, signed, bits), descriptor in operations.items():
+		unsigned_function, signed_function = _kernels[operation][:2]
+		function = signed_function if signed else unsigned_function
+		operands = ((-3, 2) if signed else (12, 3))[:descriptor.arity]
+
+		assert descriptor(*operands) == function(*operands, bits), (operation, signed, bits)
+
+		if descriptor.batch is not None:
+			columns = descriptor.batch(*[np.array([operand]) for operand in operands])
+			assert len(columns) == len(descriptor.result_shape)
+			assert int(columns[0][0]) == descriptor(*operands)[0], (operation, signed, bits)
+
+	fixed_multiply_8_8 = fixed_point_operations[("*", 8)]
+	assert fixed_multiply_8_8(0x0180, 0x0200) == fixed_multiply(0x0180, 0x0200, fixed_8_8)
+	assert fixed_point_operations[("/", 16)](1, 0) == (0, True)
+
+	print("operation dispatch tests passed!")
+
+
+if __name__ == "__main__":
+	test_dispatch()
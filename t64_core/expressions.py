@@ -0,0 +1,312 @@
+from functools import lru_cache
+from operator import index
+
+from parsimonious.exceptions import ParseError
+from parsimonious.grammar import Grammar
+from parsimonious.nodes import NodeVisitor
+
+from t64_core.dispatch import operations, QUOTIENT_REMAINDER
+from t64_core.twos_complement import resign
+
+'''
+Expressions
+
+Whole expressions, written the way a C-64 assembler writes them:
+	evaluate_expression("$C000 + %1010 << 2", bits = 16)  ->  0x0028
+	evaluate_expression("<screen + 1", bits = 16, labels = {"screen": 0x0400})  ->  1
+	evaluate_expression("NOT $0F AND $FF")  ->  0xF0
+
+	$C000     hexadecimal
+	%1010     binary
+	49152     decimal
+	screen    a label, looked up in the labels passed in
+	<value    the low byte of a value
+	>value    the high byte of a value
+	NOT, -    one's complement and negation
+	* /       multiply and divide
+	+ -       add and subtract
+	<< >>     shift
+	AND (&)   then EOR (XOR, ^), then OR (|), lowest of all
+Parentheses group as usual. Keywords and labels aren't case sensitive
+and keywords can't be used as labels.
+
+Everything is worked out at a bit width, signed or unsigned, with the
+calculator's own operations (see dispatch.py), so an expression gives
+exactly what typing it in one step at a time would. Numbers and labels
+are wrapped to the width first: $FF is -1 in signed 8-bit. Shift counts
+aren't, so 1 << 256 is 0 in 8 bits, not 1 << 0.
+
+compile_expression() turns the text into a Python function once; the
+function is then called with the labels. The parts of an expression
+that don't use labels are worked out while compiling. Parse trees and
+compiled functions are both cached by the text of the expression, so
+evaluating the same expression again doesn't parse anything.
+
+Errors in the expression raise ValueError. Dividing by zero raises
+ZeroDivisionError.
+
+Needs the parsimonious package.
+'''
+
+grammar = Grammar(r"""
+	expression = _ or_expression _
+	or_expression = eor_expression (_ or_operator _ eor_expression)*
+	eor_expression = and_expression (_ eor_operator _ and_expression)*
+	and_expression = shift_expression (_ and_operator _ shift_expression)*
+	shift_expression = sum (_ shift_operator _ sum)*
+	sum = product (_ sum_operator _ product)*
+	product = prefixed (_ product_operator _ prefixed)*
+	prefixed = (prefix _ prefixed) / atom
+	atom = number / label / parenthesised
+	parenthesised = "(" _ or_expression _ ")"
+
+	or_operator = ~r"OR\b"i / "|"
+	eor_operator = ~r"(EOR|XOR)\b"i / "^"
+	and_operator = ~r"AND\b"i / "&"
+	shift_operator = "<<" / ">>"
+	sum_operator = "+" / "-"
+	product_operator = "*" / "/"
+	prefix = ~r"NOT\b"i / "-" / "<" / ">"
+
+	number = hexadecimal / binary / decimal
+	hexadecimal = ~r"\$[0-9A-F]+"i
+	binary = ~r"%[01]+"
+	decimal = ~r"[0-9]+"
+	label = !keyword ~r"[A-Z_][A-Z0-9_]*"i
+	keyword = ~r"(AND|OR|EOR|XOR|NOT)\b"i
+	_ = ~r"\s*"
+""")
+
+# operator as written -> the calculator's button label
+operator_labels = {"OR": "OR", "|": "OR", "EOR": "XOR", "XOR": "XOR", "^": "XOR", "AND": "AND", "&": "AND",
+						  "<<": "<<", ">>": ">>", "+": "+", "-": "-", "*": "*", "/": "/"}
+
+@lru_cache(maxsize = 1024)
+def parse_expression(source):
+	"""The parse tree for an expression. Raises ValueError if it isn't one."""
+	try:
+		return grammar.parse(source)
+	except ParseError as e:
+		raise ValueError(f"Not an expression: {source!r} ({e})") from None
+
+def parse_number(text):
+	"""A number written as $hex, %binary or decimal."""
+	if text[:1] == "$":
+		return int(text[1:], 16)
+	elif text[:1] == "%":
+		return int(text[1:], 2)
+
+	return int(text)
+
+def _run(operation, operands):
+	"""Runs an operation and returns the one value the expression needs from it."""
+	# the divisor is already wrapped to the width; any other flagged quotient (-128 / -1) just wraps
+	if operation.result_shape == QUOTIENT_REMAINDER and operands[1] == 0:
+		raise ZeroDivisionError("Division by zero")
+
+	return int(operation(*operands)[0])
+
+def _apply(operation, operands):
+	"""
+	Combines compiled operands with an operation: an int if they're all
+	ints (worked out now), or else a function of the labels.
+	"""
+	if all(type(operand) is int for operand in operands):
+		return _run(operation, operands)
+
+	functions = [operand if callable(operand) else (lambda labels, value = operand: value) for operand in operands]
+
+	if len(functions) == 1:
+		only = functions[0]
+		return lambda labels: _run(operation, (only(labels),))
+
+	left, right = functions
+	return lambda labels: _run(operation, (left(labels), right(labels)))
+
+class _Compiler(NodeVisitor):
+	"""Turns a parse tree into an int or a function of the labels, at one width and signedness."""
+	# raise these as they are, not wrapped in a VisitationError
+	unwrapped_exceptions = (ValueError, ZeroDivisionError)
+
+	def __init__(self, bits, signed, wrap = True):
+		self.bits = bits
+		self.signed = signed
+		self.wrap = wrap # wrap numbers and labels to the width
+
+	def visit(self, node):
+		if node.expr_name != "shift_expression":
+			return super().visit(node)
+
+		# shift counts are used as they are, so 1 << 256 is 0 in 8 bits, as it is on the calculator
+		counts = _Compiler(self.bits, self.signed, wrap = False)
+		first, rest = node.children
+		result = self.visit(first)
+
+		for _, operator, _, count in rest.children:
+			result = _apply(self._operation(operator_labels[operator.text]), (result, counts.visit(count)))
+
+		return result
+
+	def _wrapped(self, value):
+		return resign(value, self.signed, self.bits) if self.wrap else index(value)
+
+	def _operation(self, label):
+		return operations[(label, self.signed, self.bits)]
+
+	def _chain(self, node, children):
+		# first (_ operator _ operand)*, worked out left to right
+		result, rest = children
+
+		for _, operator, _, operand in rest:
+			result = _apply(self._operation(operator_labels[operator.upper()]), (result, operand))
+
+		return result
+
+	visit_or_expression = visit_eor_expression = visit_and_expression = _chain
+	visit_sum = visit_product = _chain
+
+	def _operator(self, node, children):
+		return node.text
+
+	visit_or_operator = visit_eor_operator = visit_and_operator = _operator
+	visit_shift_operator = visit_sum_operator = visit_product_operator = visit_prefix = _operator
+
+	def visit_expression(self, node, children):
+		return children[1]
+
+	def visit_prefixed(self, node, children):
+		child = children[0]
+
+		if not isinstance(child, list):
+			return child # an atom
+
+		prefix, _, operand = child
+		prefix = prefix.upper()
+		wrapped = self._wrapped
+
+		if prefix == "NOT":
+			return _apply(self._operation("NOT"), (operand,))
+		elif prefix == "-":
+			return _apply(self._operation("-"), (0, operand))
+
+		shift = 0 if prefix == "<" else 8
+
+		if type(operand) is int:
+			return wrapped((operand >> shift) & 0xFF)
+
+		return lambda labels: wrapped((operand(labels) >> shift) & 0xFF)
+
+	def visit_atom(self, node, children):
+		return children[0]
+
+	def visit_parenthesised(self, node, children):
+		return children[2]
+
+	def visit_number(self, node, children):
+		return self._wrapped(parse_number(node.text))
+
+	def visit_label(self, node, children):
+		name = node.text.lower()
+		wrapped = self._wrapped
+
+		def label(labels):
+			try:
+				return wrapped(labels[name])
+			except (KeyError, TypeError):
+				raise ValueError(f"Unknown label: {node.text}") from None
+
+		return label
+
+	def generic_visit(self, node, children):
+		return children or node.text
+
+@lru_cache(maxsize = 1024)
+def compile_expression(source, bits = 8, signed = False):
+	"""
+	Compiles an expression to a function of the labels (a dict of
+	lower-case name -> value) that gives its value.
+	"""
+	compiled = _Compiler(bits, signed).visit(parse_expression(source))
+
+	if type(compiled) is int:
+		return lambda labels = None, value = compiled: value
+
+	return lambda labels = None: compiled(labels)
+
+def evaluate_expression(source, bits = 8, signed = False, labels = None):
+	"""Works out an expression at a bit width. Label names aren't case sensitive."""
+	if labels:
+		labels = {name.lower(): value for name, value in labels.items()}
+
+	return compile_expression(source, bits, signed)(labels)
+
+
+def test_expressions():
+	print("--- Testing expressions ---")
+	assert evaluate_expression("$C000 + %1010 << 2", bits = 16) == ((0xC000 + 10) << 2) & 0xFFFF
+	assert evaluate_expression("1 + 2 * 3") == 7
+	assert evaluate_expression("(1 + 2) * 3") == 9
+	assert evaluate_expression("20 - 5 - 3") == 12
+	assert evaluate_expression("$F0 OR $0F AND $3C") == 0xF0 | (0x0F & 0x3C)
+	assert evaluate_expression("$FF eor %1010 xor 1 ^ 1") == 0xF5
+	assert evaluate_expression("NOT $0F AND $FF") == 0xF0
+	assert evaluate_expression("250 + 10") == 4 # wraps like add_bits()
+	assert evaluate_expression("$FF", signed = True) == -1
+	assert evaluate_expression("-1 >> 1", signed = True) == -1
+	assert evaluate_expression("-1 >> 1", bits = 16) == 0x7FFF
+	assert evaluate_expression("17 / 5") == 3
+	assert evaluate_expression("-128 / -1", signed = True) == -128 # wraps, as on the calculator
+	assert evaluate_expression("1 << 256") == 0 and evaluate_expression("$80 >> 257") == 0
+	assert evaluate_expression("1 << 1000000000000000000000000000000", bits = 64) == 0
+	assert evaluate_expression("-1 >> n", signed = True, labels = {"n": 300}) == -1
+	assert evaluate_expression("1 << (1 << 3)", bits = 16) == 0x100
+	assert (parse_number("$c000"), parse_number("%1010"), parse_number("49152")) == (0xC000, 10, 49152)
+
+	labels = {"SCREEN": 0x0400, "border": 0xD020}
+	assert evaluate_expression("<border", bits = 16, labels = labels) == 0x20
+	assert evaluate_expression(">border", bits = 16, labels = labels) == 0xD0
+	assert evaluate_expression(">$D020 + 1", bits = 16) == 0xD1
+	assert evaluate_expression("<Screen + 40 * 2", bits = 16, labels = labels) == 80
+	assert evaluate_expression("screen + 40 * 2", bits = 16, labels = labels) == 0x0450
+
+	# compiled once, then reused with other labels
+	expression = compile_expression("x * 2 + 1", 16)
+	assert compile_expression("x * 2 + 1", 16) is expression
+	assert [expression({"x": x}) for x in (0, 1, 100)] == [1, 3, 201]
+
+	for bad in ("1 +", "(1", "$", "and + 1", "1 > 2"):
+		try:
+			evaluate_expression(bad)
+			assert False, bad
+		except ValueError:
+			pass
+
+	for error, source in ((ValueError, "nowhere + 1"), (ZeroDivisionError, "1 / 0"), (ZeroDivisionError, "1 / x")):
+		try:
+			evaluate_expression(source, labels = {"x": 0})
+			assert False, source
+		except error:
+			pass
+
+	print("expression tests passed!")
+
+def run_benchmark(count = 20_000):
+	"""Times evaluating an expression from scratch each time against reusing its compiled function."""
+	from timeit import timeit
+
+	source = "(<screen + x * 2) AND $FF OR %10000000"
+	labels = {"screen": 0x0400, "x": 7}
+
+	def from_scratch():
+		return _Compiler(16, False).visit(grammar.parse(source))(labels)
+
+	expression = compile_expression(source, 16)
+
+	for name, run in (("parse every time", from_scratch), ("compiled", lambda: expression(labels))):
+		seconds = min(timeit(run, number = count) for _ in range(3))
+		print(f"{name:<18} {count / seconds:>12,.0f} evaluations/s")
+
+
+if __name__ == "__main__":
+	test_expressions()
+	run_benchmark()
@@ -0,0 +1,271 @@
+from collections import namedtuple
+from fractions import Fraction
+
+import numpy as np
+
+from t64_core.bit_widths import get_bit_width
+
+'''
+Signed fixed-point numbers: 8.8 and 16.16
+
+A fixed-point number is stored as a plain signed integer (its "raw"
+value) with an implied binary point: in 8.8, raw 0x0180 is 1.5. All of
+the functions here work on raw values.
+
+Every operation rounds to the nearest representable value (halves
+round away from zero) and saturates: a result that doesn't fit is
+clamped to the largest or smallest value and flagged, so
+	fixed_add(a, b, fmt)  ->  (raw_result, overflow)
+follows the same (result, flag) shape as the integer functions. Dividing
+by zero gives (0, True), as divide_bits() does. The batch versions take
+NumPy arrays and give exactly the same answers as the scalar versions.
+
+Values are shown in any of the calculator's bases:
+	format_fixed(0x0180, fixed_8_8, "dec")  ->  "1.5"
+	format_fixed(0x0180, fixed_8_8, "hex")  ->  "01.80"
+	format_fixed(0x0180, fixed_8_8, "bin")  ->  "00000001.10000000"
+Negative values show a minus sign and the magnitude, like the integer
+conversions in base_converters.py.
+'''
+
+class FixedPointFormat(namedtuple("FixedPointFormat",
+	[
+		"name", # "8.8" or "16.16"
+		"integer_bits",
+		"fraction_bits",
+		"scale", # raw value of 1.0
+		"min_raw",
+		"max_raw",
+	])):
+	__slots__ = ()
+
+	@property
+	def bits(self):
+		return self.integer_bits + self.fraction_bits
+
+def _describe(integer_bits, fraction_bits):
+	width = get_bit_width(integer_bits + fraction_bits)
+
+	return FixedPointFormat(
+		name = f"{integer_bits}.{fraction_bits}",
+		integer_bits = integer_bits,
+		fraction_bits = fraction_bits,
+		scale = 1 << fraction_bits,
+		min_raw = width.min_signed,
+		max_raw = width.max_signed,
+	)
+
+fixed_8_8 = _describe(8, 8)
+fixed_16_16 = _describe(16, 16)
+
+fixed_point_formats = {"8.8": fixed_8_8, "16.16": fixed_16_16}
+
+# the calculator's bit width picks the size of the integer part
+fixed_point_formats_by_width = {8: fixed_8_8, 16: fixed_16_16}
+
+# --- Rounding and saturating ---
+
+def _divide_rounded(numerator, denominator):
+	"""numerator / denominator rounded to the nearest integer, halves away from zero."""
+	quotient = (2 * abs(numerator) + abs(denominator)) // (2 * abs(denominator))
+
+	return -quotient if (numerator < 0) != (denominator < 0) else quotient
+
+def _saturate(raw, fmt):
+	if raw > fmt.max_raw:
+		return fmt.max_raw, True
+	elif raw < fmt.min_raw:
+		return fmt.min_raw, True
+	else:
+		return raw, False
+
+def _divide_rounded_batch(numerator, denominator):
+	# rounds by comparing the remainder with half the divisor, rather than
+	# doubling the numerator like _divide_rounded(): a 16.16 product can be
+	# as big as 2**62, and doubling that overflows int64
+	quotient, remainder = np.divmod(np.abs(numerator), np.abs(denominator))
+	quotient += 2 * remainder >= np.abs(denominator)
+
+	return np.where((numerator < 0) != (denominator < 0), -quotient, quotient)
+
+def _saturate_batch(raw, fmt):
+	overflow = (raw > fmt.max_raw) | (raw < fmt.min_raw)
+
+	return np.clip(raw, fmt.min_raw, fmt.max_raw).astype(np.int64), overflow
+
+# --- Scalar arithmetic ---
+
+def fixed_add(a, b, fmt):
+	"""Adds two raw fixed-point values. Returns (raw_result, overflow)."""
+	return _saturate(a + b, fmt)
+
+def fixed_subtract(a, b, fmt):
+	"""Subtracts two raw fixed-point values. Returns (raw_result, overflow)."""
+	return _saturate(a - b, fmt)
+
+def fixed_multiply(a, b, fmt):
+	"""Multiplies two raw fixed-point values. Returns (raw_result, overflow)."""
+	return _saturate(_divide_rounded(a * b, fmt.scale), fmt)
+
+def fixed_divide(a, b, fmt):
+	"""Divides two raw fixed-point values. Returns (raw_result, flag); the flag is also set on divide by zero."""
+	if b == 0:
+		return 0, True
+
+	return _saturate(_divide_rounded(a * fmt.scale, b), fmt)
+
+# --- Batch arithmetic ---
+
+def _as_raw(values):
+	return np.asarray(values).astype(np.int64)
+
+def fixed_add_batch(a, b, fmt):
+	"""Adds two arrays of raw fixed-point values. Returns (raw_results, overflow)."""
+	return _saturate_batch(_as_raw(a) + _as_raw(b), fmt)
+
+def fixed_subtract_batch(a, b, fmt):
+	"""Subtracts two arrays of raw fixed-point values. Returns (raw_results, overflow)."""
+	return _saturate_batch(_as_raw(a) - _as_raw(b), fmt)
+
+def fixed_multiply_batch(a, b, fmt):
+	"""Multiplies two arrays of raw fixed-point values. Returns (raw_results, overflow)."""
+	# 16.16 raw values are at most 2**31 in size, so the product (at most 2**62) fits in int64
+	return _saturate_batch(_divide_rounded_batch(_as_raw(a) * _as_raw(b), fmt.scale), fmt)
+
+def fixed_divide_batch(a, b, fmt):
+	"""Divides two arrays of raw fixed-point values. Returns (raw_results, flags)."""
+	a = _as_raw(a)
+	b = _as_raw(b)
+	divide_by_zero = b == 0
+
+	result, overflow = _saturate_batch(_divide_rounded_batch(a * fmt.scale, np.where(divide_by_zero, 1, b)), fmt)
+
+	return np.where(divide_by_zero, 0, result), overflow | divide_by_zero
+
+# --- Conversions ---
+
+_base_radix = {"bin": 2, "dec": 10, "hex": 16}
+
+def to_fixed(value, fmt):
+	"""
+	Converts a number to a raw fixed-point value. Strings are read exactly, so
+	"0.1" rounds the same way every time. Returns (raw, overflow).
+	"""
+	return _saturate(_divide_rounded(*(Fraction(value) * fmt.scale).as_integer_ratio()), fmt)
+
+def from_fixed(raw, fmt):
+	"""Converts a raw fixed-point value to an exact Fraction."""
+	return Fraction(raw, fmt.scale)
+
+def parse_fixed(text, base, fmt):
+	"""
+	Reads a fixed-point number typed in one of the calculator's bases
+	("1.5", "01.80", "1.1") and returns (raw, overflow).
+	"""
+	radix = _base_radix[base]
+	text = text.strip()
+	negative = text.startswith("-")
+	whole, _, fraction = text.lstrip("+-").partition(".")
+
+	value = Fraction(int(whole or "0", radix))
+
+	if fraction:
+		value += Fraction(int(fraction, radix), radix ** len(fraction))
+
+	return to_fixed(-value if negative else value, fmt)
+
+def format_fixed(raw, fmt, base = "dec"):
+	"""Formats a raw fixed-point value in one of the calculator's bases."""
+	sign = "-" if raw < 0 else ""
+	magnitude = abs(raw)
+	whole = magnitude >> fmt.fraction_bits
+	fraction = magnitude & (fmt.scale - 1)
+
+	if base == "dec":
+		# every binary fraction has an exact decimal expansion with at most fraction_bits digits
+		digits = str(fraction * 10 ** fmt.fraction_bits // fmt.scale).rjust(fmt.fraction_bits, "0").rstrip("0")
+
+		return f"{sign}{whole}.{digits}" if digits else f"{sign}{whole}"
+	elif base == "hex":
+		return f"{sign}{whole:0{fmt.integer_bits // 4}X}.{fraction:0{fmt.fraction_bits // 4}X}"
+	elif base == "bin":
+		return f"{sign}{whole:0{fmt.integer_bits}b}.{fraction:0{fmt.fraction_bits}b}"
+	else:
+		raise ValueError(f"Unknown number base: {base}")
+
+def convert_fixed(text, old_base, new_base, fmt):
+	"""Re-displays a fixed-point number typed in one base in another."""
+	raw, _ = parse_fixed(text, old_base, fmt)
+
+	return format_fixed(raw, fmt, new_base)
+
+def to_fixed_batch(values, fmt):
+	"""Converts an array of floats (e.g. a sine table) to raw fixed-point values. Returns (raw, overflow)."""
+	scaled = np.asarray(values, dtype = np.float64) * fmt.scale
+	rounded = np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)
+
+	overflow = (rounded > fmt.max_raw) | (rounded < fmt.min_raw)
+
+	return np.clip(rounded, fmt.min_raw, fmt.max_raw).astype(np.int64), overflow
+
+def from_fixed_batch(raw, fmt):
+	"""Converts an array of raw fixed-point values to floats."""
+	return _as_raw(raw) / fmt.scale
+
+def format_fixed_batch(raw, fmt, base = "dec"):
+	"""Formats an array of raw fixed-point values. Returns a list of strings."""
+	return [format_fixed(value, fmt, base) for value in _as_raw(raw).tolist()]
+
+def test_fixed_point():
+	print("--- Testing fixed point ---")
+	one_and_a_half = to_fixed("1.5", fixed_8_8)[0]
+	assert one_and_a_half == 0x0180
+	assert format_fixed(one_and_a_half, fixed_8_8, "dec") == "1.5"
+	assert format_fixed(one_and_a_half, fixed_8_8, "hex") == "01.80"
+	assert format_fixed(one_and_a_half, fixed_8_8, "bin") == "00000001.10000000"
+	assert format_fixed(-1, fixed_8_8, "dec") == "-0.00390625"
+	assert parse_fixed("01.80", "hex", fixed_8_8) == (0x0180, False)
+	assert parse_fixed("-1.1", "bin", fixed_8_8) == (-0x0180, False)
+	assert convert_fixed("2.25", "dec", "hex", fixed_16_16) == "0002.4000"
+
+	assert fixed_add(0x7F00, 0x0100, fixed_8_8) == (0x7FFF, True)
+	assert fixed_subtract(-0x7F00, 0x0200, fixed_8_8) == (-0x8000, True)
+	assert fixed_multiply(one_and_a_half, one_and_a_half, fixed_8_8) == (0x0240, False) # 2.25
+	assert fixed_multiply(1, 0x0080, fixed_8_8) == (1, False) # 1/256 * 0.5 rounds away from zero
+	assert fixed_multiply(-1, 0x0080, fixed_8_8) == (-1, False)
+	assert fixed_divide(0x0100, 0x0300, fixed_8_8) == (0x0055, False) # 1/3
+	assert fixed_divide(0x0100, 0, fixed_8_8) == (0, True)
+	assert fixed_divide(0x4000, 0x0080, fixed_8_8) == (0x7FFF, True)
+	assert to_fixed(0.1, fixed_16_16) == to_fixed("0.1", fixed_16_16)
+
+	# batch and scalar agree
+	rng = np.random.default_rng(64)
+	for fmt in fixed_point_formats.values():
+		a = rng.integers(fmt.min_raw, fmt.max_raw + 1, 2000)
+		b = rng.integers(fmt.min_raw, fmt.max_raw + 1, 2000)
+		b[:20] = 0
+
+		for scalar, batch in ((fixed_add, fixed_add_batch), (fixed_subtract, fixed_subtract_batch),
+									 (fixed_multiply, fixed_multiply_batch), (fixed_divide, fixed_divide_batch)):
+			results, flags = batch(a, b, fmt)
+			expected = [scalar(x, y, fmt) for x, y in zip(a.tolist(), b.tolist())]
+			assert list(zip(results.tolist(), flags.tolist())) == expected, scalar.__name__
+
+	# the largest products there are: min x min is 2**62 in 16.16
+	for fmt in fixed_point_formats.values():
+		extremes = np.array([fmt.min_raw, fmt.min_raw, fmt.max_raw, fmt.min_raw])
+		others = np.array([fmt.min_raw, fmt.max_raw, fmt.max_raw, 1])
+		results, flags = fixed_multiply_batch(extremes, others, fmt)
+		expected = [fixed_multiply(x, y, fmt) for x, y in zip(extremes.tolist(), others.tolist())]
+		assert list(zip(results.tolist(), flags.tolist())) == expected, fmt.name
+
+	angles = np.linspace(0, 2 * np.pi, 256, endpoint = False)
+	sine_table, overflow = to_fixed_batch(np.sin(angles), fixed_8_8)
+	assert sine_table[64] == 0x0100 and sine_table[192] == -0x0100 and not overflow.any()
+	assert sine_table.tolist() == [to_fixed(float(value), fixed_8_8)[0] for value in np.sin(angles)]
+
+	print("fixed point tests passed!")
+
+
+if __name__ == "__main__":
+	test_fixed_point()
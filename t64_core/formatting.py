@@ -0,0 +1,161 @@
+'''
+Number formatting
+
+Everything the calculator shows goes through format_number():
+	format_number(10, "bin", 8)                   ->  "00001010"
+	format_number(0xA6, "bin", 8, group = True)   ->  "1010 0110"
+	format_number(-8, "hex", 8)                   ->  "-08"
+	format_number(-8, "hex", 8, twos_complement = True)  ->  "F8"
+	format_number(255, "hex", 16, pad = False)    ->  "FF"
+
+Hex and binary are zero-padded to the bit width unless pad is False.
+Grouping splits binary into nibbles and hex into bytes ("12 34"), and
+puts commas in decimal. Negative numbers are shown either as a minus
+sign and the magnitude (signed-magnitude, the default) or as their bit
+pattern (two's complement).
+
+For 8- and 16-bit values the strings come from tables holding every
+value, built the first time each style is used and kept after that, so
+formatting is a list lookup. Wider values are put together from 16-bit
+table chunks.
+'''
+
+_tables = {}
+
+def _build_table(base, bits, pad, group):
+	count = 1 << bits
+
+	if base == "dec":
+		return [f"{value:,}" for value in range(count)] if group else [str(value) for value in range(count)]
+
+	if base == "hex":
+		digits, group_size, spec = bits // 4, 2, "X"
+	elif base == "bin":
+		digits, group_size, spec = bits, 4, "b"
+	else:
+		raise ValueError(f"Unknown number base: {base}")
+
+	if not pad:
+		return [format(value, spec) for value in range(count)]
+
+	table = [format(value, f"0{digits}{spec}") for value in range(count)]
+
+	if group:
+		table = [" ".join(text[start:start + group_size] for start in range(0, digits, group_size)) for text in table]
+
+	return table
+
+def format_table(base, bits, pad = True, group = False):
+	"""
+	The strings for every bit pattern of an 8- or 16-bit width, indexed by
+	the pattern. Built the first time it's asked for.
+	"""
+	pad = pad or group
+	key = (base, bits, pad, group)
+	table = _tables.get(key)
+
+	if table is None:
+		if bits not in (8, 16):
+			raise ValueError("Formatting tables are only built for 8 and 16 bits")
+
+		table = _tables[key] = _build_table(base, bits, pad, group)
+
+	return table
+
+def _format_wide(magnitude, base, bits, pad, group):
+	"""Formats a value too wide for the tables, 16 bits at a time."""
+	if base == "dec":
+		return f"{magnitude:,}" if group else str(magnitude)
+
+	# the top chunk is whatever is left over above the 16-bit chunks (8 bits for 24-bit values)
+	chunks = []
+	chunk_bits = bits % 16 or 16
+
+	for shift in range(bits - chunk_bits, -1, -16):
+		chunks.append(format_table(base, chunk_bits, True, group)[(magnitude >> shift) & ((1 << chunk_bits) - 1)])
+		chunk_bits = 16
+
+	text = (" " if group else "").join(chunks)
+
+	if not pad and not group:
+		text = text.lstrip("0") or "0"
+
+	return text
+
+def format_number(value, base, bits, twos_complement = False, pad = True, group = False):
+	"""Formats an integer in one of the calculator's bases ("bin", "dec" or "hex") at a bit width."""
+	if twos_complement:
+		sign = ""
+		magnitude = value & ((1 << bits) - 1)
+	else:
+		sign = "-" if value < 0 else ""
+		magnitude = -value if value < 0 else value
+
+	if magnitude >> bits:
+		# too big for the width (it hasn't been wrapped), so show every digit it has
+		bits = (magnitude.bit_length() + 15) // 16 * 16
+
+	if bits <= 16:
+		text = format_table(base, bits, pad, group)[magnitude]
+	else:
+		text = _format_wide(magnitude, base, bits, pad, group)
+
+	return sign + text
+
+def format_bytes(data, base = "hex", group = True):
+	"""Formats a sequence of bytes, e.g. for a memory dump: "A9 00 8D 20 D0"."""
+	table = format_table(base, 8)
+
+	return (" " if group else "").join([table[byte] for byte in data])
+
+
+def test_formatting():
+	print("--- Testing formatting ---")
+	assert format_number(10, "bin", 8) == "00001010"
+	assert format_number(0xA6, "bin", 8, group = True) == "1010 0110"
+	assert format_number(0x1234, "hex", 16, group = True) == "12 34"
+	assert format_number(65535, "dec", 16, group = True) == "65,535"
+	assert format_number(-8, "hex", 8) == "-08"
+	assert format_number(-8, "hex", 8, twos_complement = True) == "F8"
+	assert format_number(-1, "bin", 16, twos_complement = True, group = True) == "1111 1111 1111 1111"
+	assert format_number(-128, "dec", 8) == "-128"
+	assert format_number(255, "hex", 16, pad = False) == "FF"
+	assert format_number(0, "bin", 8, pad = False) == "0"
+	assert format_number(0x123456, "hex", 24) == "123456"
+	assert format_number(0x1234, "hex", 24) == "001234"
+	assert format_number(0x1234, "hex", 32, pad = False) == "1234"
+	assert format_number(-1, "hex", 64, twos_complement = True) == "F" * 16
+	assert format_number(0xABCDEF, "bin", 24, group = True) == "1010 1011 1100 1101 1110 1111"
+	assert format_number(2**40, "dec", 64, group = True) == f"{2**40:,}"
+	assert format_number(300, "hex", 8) == "012C" # not wrapped: every digit is shown
+	assert format_bytes(b"\xA9\x00\x8D") == "A9 00 8D"
+
+	# every 8- and 16-bit value, in every style, against Python's own formatting
+	for bits in (8, 16):
+		for value in range(-(1 << (bits - 1)), 1 << bits):
+			pattern = value & ((1 << bits) - 1)
+			assert format_number(value, "hex", bits, twos_complement = True) == f"{pattern:0{bits // 4}X}"
+			assert format_number(value, "bin", bits, pad = False) == f"{value:b}"
+			assert format_number(value, "dec", bits) == str(value)
+
+	print("formatting tests passed!")
+
+def run_benchmark(count = 200_000):
+	"""Times table lookups against formatting each value."""
+	from timeit import timeit
+
+	values = [value & 0xFFFF for value in range(count)]
+	format_table("bin", 16, group = True) # build outside the timed section
+
+	def format_each():
+		return [" ".join(text[start:start + 4] for start in range(0, 16, 4)) for text in (f"{value:016b}" for value in values)]
+
+	for name, run in (("format each value", format_each),
+							("format_number()", lambda: [format_number(value, "bin", 16, group = True) for value in values])):
+		seconds = min(timeit(run, number = 1) for _ in range(3))
+		print(f"{name:<20} {count / seconds / 1e6:6.2f}M values/s")
+
+
+if __name__ == "__main__":
+	test_formatting()
+	run_benchmark()
@@ -0,0 +1,234 @@
+from functools import wraps
+
+import numpy as np
+
+from t64_core.math_functions_bits import *
+from t64_core.math_functions_signed_bits import *
+from t64_core.bit_wise_operations_signed import *
+from t64_core.bit_wise_operations_unsigned import *
+from t64_core.math_functions_bits_batch import *
+from t64_core.math_functions_signed_bits_batch import *
+
+'''
+Table-driven 8-bit backend
+
+In 8-bit mode every two-number operation has only 256 x 256 = 65,536
+possible operand pairs, so each one can be worked out once and looked
+up after that. Every table is a flat 65,536 entry array indexed by
+(a << 8) | b, with one column per value the scalar function returns:
+	(result, flag)               for most operations
+	(quotient, remainder, flag)  for division
+
+Tables are only built the first time an operation is used.
+
+Each table function is called exactly like the function it stands in
+for, so it can be dropped in wherever that function is used:
+	table_functions[add_bits](250, 10, 8)  ->  (4, True)
+
+Anything outside the tables (other bit widths, shift counts above 255)
+is passed straight through to the original function.
+
+Batch queries take arrays of operands:
+	table_functions[add_bits].batch(a_array, b_array)
+'''
+
+# every (a, b) pair in table order: a is the high byte of the index, b the low byte
+_all_a = np.arange(65536, dtype = np.int64) >> 8
+_all_b = np.arange(65536, dtype = np.int64) & 0xFF
+_all_bytes = np.arange(256, dtype = np.int64)
+
+def _to_signed(values):
+	"""Sign-extends an array of bytes."""
+	return ((values & 0xFF) ^ 0x80) - 0x80
+
+def _always_true(values):
+	"""Flag column for the bitwise functions, which always return True."""
+	return np.ones(values.shape, dtype = bool)
+
+class LookupTable:
+	"""The result and flag columns for one operation, built the first time they're needed."""
+	def __init__(self, build):
+		self._build = build
+		self._arrays = None # NumPy arrays for batch lookups
+		self.answers = [] # one tuple per index, exactly as the scalar function returns it
+
+	def load(self):
+		self._arrays = tuple(self._build())
+
+		# there are only a few hundred different answers to most operations,
+		# so share one tuple between every index that gives the same answer
+		distinct = {}
+		columns = [array.tolist() for array in self._arrays]
+		self.answers[:] = [distinct.setdefault(answer, answer) for answer in zip(*columns)]
+
+	@property
+	def arrays(self):
+		if self._arrays is None:
+			self.load()
+
+		return self._arrays
+
+	def batch(self, a, b = None):
+		"""Looks up whole arrays of operands. Returns one array per column."""
+		index = np.asarray(a).astype(np.int64) & 0xFF
+
+		if b is not None:
+			index = (index << 8) | (np.asarray(b).astype(np.int64) & 0xFF)
+
+		return tuple(np.take(array, index) for array in self.arrays)
+
+def _binary_lookup(function, table):
+	"""Wraps a table in a function with the same signature as the two-number function it replaces."""
+	answers = table.answers
+
+	@wraps(function)
+	def lookup(a, b, bits):
+		if bits != 8:
+			return function(a, b, bits)
+
+		if not answers:
+			table.load()
+
+		return answers[((a & 0xFF) << 8) | (b & 0xFF)]
+
+	lookup.table = table
+	lookup.batch = table.batch
+
+	return lookup
+
+def _shift_lookup(function, table):
+	"""Same as _binary_lookup(), but shift counts aren't masked, so only 0-255 is in the table."""
+	answers = table.answers
+
+	@wraps(function)
+	def lookup(a, shift_by, bit_width):
+		if bit_width != 8 or not 0 <= shift_by < 256:
+			return function(a, shift_by, bit_width)
+
+		if not answers:
+			table.load()
+
+		return answers[((a & 0xFF) << 8) | shift_by]
+
+	lookup.table = table
+	lookup.batch = table.batch
+
+	return lookup
+
+def _unary_lookup(function, table):
+	"""Wraps a 256 entry table in a function with the same signature as NOT."""
+	answers = table.answers
+
+	@wraps(function)
+	def lookup(a, bit_width):
+		if bit_width != 8:
+			return function(a, bit_width)
+
+		if not answers:
+			table.load()
+
+		return answers[a & 0xFF]
+
+	lookup.table = table
+	lookup.batch = table.batch
+
+	return lookup
+
+# --- Table builders ---
+
+def _shift_left_columns(a, b):
+	# anything shifted by 8 or more is gone entirely
+	return np.where(b < 8, (a << np.minimum(b, 8)) & 0xFF, 0)
+
+def _shift_right_columns(a, b):
+	return np.where(b < 8, a >> np.minimum(b, 8), 0)
+
+_builders = \
+{
+	add_bits: lambda: add_bits_batch(_all_a, _all_b, 8),
+	subtract_bits: lambda: subtract_bits_batch(_all_a, _all_b, 8),
+	multiply_bits: lambda: multiply_bits_batch(_all_a, _all_b, 8),
+	divide_bits: lambda: divide_bits_batch(_all_a, _all_b, 8),
+	bitwise_and: lambda: (_all_a & _all_b, _always_true(_all_a)),
+	bitwise_or: lambda: (_all_a | _all_b, _always_true(_all_a)),
+	bitwise_xor: lambda: (_all_a ^ _all_b, _always_true(_all_a)),
+	shift_left: lambda: (_shift_left_columns(_all_a, _all_b), _always_true(_all_a)),
+	shift_right: lambda: (_shift_right_columns(_all_a, _all_b), _always_true(_all_a)),
+
+	add_signed_bits: lambda: add_signed_bits_batch(_all_a, _all_b, 8),
+	subtract_signed_bits: lambda: subtract_signed_bits_batch(_all_a, _all_b, 8),
+	multiply_signed_bits: lambda: multiply_signed_bits_batch(_all_a, _all_b, 8),
+	divide_signed_bits: lambda: divide_signed_bits_batch(_all_a, _all_b, 8),
+	bitwise_and_signed: lambda: (_to_signed(_all_a & _all_b), _always_true(_all_a)),
+	bitwise_or_signed: lambda: (_to_signed(_all_a | _all_b), _always_true(_all_a)),
+	bitwise_xor_signed: lambda: (_to_signed(_all_a ^ _all_b), _always_true(_all_a)),
+	shift_left_signed: lambda: (_to_signed(_shift_left_columns(_all_a, _all_b)), _always_true(_all_a)),
+	# arithmetic shift: shifting a negative number by 7 or more always leaves -1
+	shift_right_signed: lambda: (_to_signed(_all_a) >> np.minimum(_all_b, 7), _always_true(_all_a)),
+}
+
+_unary_builders = \
+{
+	bitwise_not: lambda: (~_all_bytes & 0xFF, _always_true(_all_bytes)),
+	bitwise_not_signed: lambda: (_to_signed(~_all_bytes), _always_true(_all_bytes)),
+}
+
+# scalar function -> its table-driven stand-in
+table_functions = {}
+
+for function, build in _builders.items():
+	if function in (shift_left, shift_right, shift_left_signed, shift_right_signed):
+		table_functions[function] = _shift_lookup(function, LookupTable(build))
+	else:
+		table_functions[function] = _binary_lookup(function, LookupTable(build))
+
+for function, build in _unary_builders.items():
+	table_functions[function] = _unary_lookup(function, LookupTable(build))
+
+def run_benchmark(repeat = 3):
+	"""Times every operation over all 65,536 operand pairs, arithmetic path vs. table lookups."""
+	from timeit import timeit
+
+	pairs = list(zip(_all_a.tolist(), _all_b.tolist()))
+	rows = []
+
+	def best(statement):
+		return min(timeit(statement, number = 1) for _ in range(repeat))
+
+	for function, table_function in table_functions.items():
+		table_function.table.load() # build outside the timed section
+
+		if function in _unary_builders:
+			operands = _all_bytes.tolist()
+			arithmetic = best(lambda: [function(a, 8) for a in operands])
+			table = best(lambda: [table_function(a, 8) for a in operands])
+			batch = best(lambda: table_function.batch(_all_bytes))
+			count = len(operands)
+		else:
+			arithmetic = best(lambda: [function(a, b, 8) for a, b in pairs])
+			table = best(lambda: [table_function(a, b, 8) for a, b in pairs])
+			batch = best(lambda: table_function.batch(_all_a, _all_b))
+			count = len(pairs)
+
+		rows.append((function.__name__, count / arithmetic, count / table, arithmetic / table, count / batch))
+
+	print(f"{'operation':<24}{'arithmetic':>14}{'table':>14}{'speedup':>10}{'batch':>16}")
+
+	for name, arithmetic_rate, table_rate, speedup, batch_rate in rows:
+		print(f"{name:<24}{arithmetic_rate:>12.0f}/s{table_rate:>12.0f}/s{speedup:>9.1f}x{batch_rate:>14.0f}/s")
+
+
+if __name__ == "__main__":
+	print("--- Checking tables against the arithmetic path ---")
+	for function, table_function in table_functions.items():
+		if function in _unary_builders:
+			mismatches = [a for a in range(256) if table_function(a, 8) != function(a, 8)]
+		else:
+			mismatches = [(a, b) for a, b in zip(_all_a.tolist(), _all_b.tolist())
+							  if table_function(a, b, 8) != function(a, b, 8)]
+
+		assert not mismatches, f"{function.__name__}: {mismatches[:5]}"
+
+	print("all tables match!\n")
+
+	run_benchmark()
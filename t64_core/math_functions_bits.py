@@ -1,23 +1,15 @@
+from t64_core.bit_widths import get_bit_width
+
 def add_bits(a, b, bits):
 	"""Adds two integers with specified bit width and handles overflow."""
-	if bits == 8:
-		mask = 0xFF
-		max_val = 255
-	elif bits == 16:
-		mask = 0xFFFF
-		max_val = 65535
-	elif bits == 32:
-		mask = 0xFFFFFFFF
-		max_val = 4294967295
-	else:
-		raise ValueError("Invalid bit width. Must be 8, 16, or 32.")
+	mask = get_bit_width(bits).mask
 
 	a = a & mask
 	b = b & mask
 
 	result = a + b
 
-	if result > max_val:
+	if result > mask:
 		result = result & mask
 		overflow = True
 	else:
@@ -27,14 +19,7 @@ def add_bits(a, b, bits):
 
 def subtract_bits(a, b, bits):
 	"""Subtracts two integers with specified bit width and handles underflow."""
-	if bits == 8:
-		mask = 0xFF
-	elif bits == 16:
-		mask = 0xFFFF
-	elif bits == 32:
-		mask = 0xFFFFFFFF
-	else:
-		raise ValueError("Invalid bit width. Must be 8, 16, or 32.")
+	mask = get_bit_width(bits).mask
 
 	a = a & mask
 	b = b & mask
@@ -51,24 +36,14 @@ def subtract_bits(a, b, bits):
 
 def multiply_bits(a, b, bits):
 	"""Multiplies two integers with specified bit width and handles overflow."""
-	if bits == 8:
-		mask = 0xFF
-		max_val = 255
-	elif bits == 16:
-		mask = 0xFFFF
-		max_val = 65535
-	elif bits == 32:
-		mask = 0xFFFFFFFF
-		max_val = 4294967295
-	else:
-		raise ValueError("Invalid bit width. Must be 8, 16, or 32.")
+	mask = get_bit_width(bits).mask
 
 	a = a & mask
 	b = b & mask
 
 	result = a * b
 
-	if result > max_val:
+	if result > mask:
 		result = result & mask
 		overflow = True
 	else:
@@ -82,14 +57,7 @@ def divide_bits(a, b, bits):
 	Divides two integers with specified bit width, handling division by zero,
 	and tests for potential underflow.
 	"""
-	if bits == 8:
-		mask = 0xFF
-	elif bits == 16:
-		mask = 0xFFFF
-	elif bits == 32:
-		mask = 0xFFFFFFFF
-	else:
-		raise ValueError("Invalid bit width. Must be 8, 16, or 32.")
+	mask = get_bit_width(bits).mask
 
 	a = a & mask
 	b = b & mask
@@ -124,6 +92,10 @@ def test_add_bits_complete():
 	assert add_bits(4294967295, 1, 32) == (0, True)  # Overflow
 	assert add_bits(1000000, 2000000, 32) == (3000000, False)  # No overflow
 	assert add_bits(2147483648, 2147483648, 32) == (0, True)  # Overflow
+
+	# 24-bit
+	assert add_bits(16777215, 1, 24) == (0, True)  # Overflow
+	assert add_bits(65536, 65536, 24) == (131072, False)  # No overflow
 	print("add_bits comprehensive tests passed!")
 
 
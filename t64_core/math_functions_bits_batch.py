@@ -0,0 +1,117 @@
+import numpy as np
+
+from t64_core.bit_widths import get_bit_width
+
+'''
+Array versions of the unsigned functions in math_functions_bits.py
+
+Each function takes two NumPy arrays (or anything np.asarray() accepts,
+including plain ints) and returns arrays in the same order as its scalar
+twin:
+	add_bits_batch()       -> (result, overflow)
+	subtract_bits_batch()  -> (result, underflow)
+	multiply_bits_batch()  -> (result, overflow)
+	divide_bits_batch()    -> (quotient, remainder, divide_by_zero)
+
+Operands are masked to the bit width exactly like the scalar functions do,
+so negative Python ints and wider arrays behave the same way in both.
+
+Results come back in the smallest unsigned dtype that holds the bit width
+(uint8, uint16, uint32 for 24 and 32 bits, uint64).
+'''
+
+def _prepare(a, b, bits):
+	"""Masks both operands to the bit width and returns them as working arrays."""
+	width = get_bit_width(bits)
+
+	if width.bits <= 32:
+		# astype(uint64) wraps negative ints modulo 2**64, so masking
+		# afterwards gives the same bits as Python's a & mask
+		work_dtype = np.uint64
+		mask = np.uint64(width.mask)
+	else:
+		# 64-bit sums and products don't fit in any NumPy integer,
+		# so fall back to arrays of Python ints
+		work_dtype = object
+		mask = width.mask
+
+	a = np.asarray(a).astype(work_dtype) & mask
+	b = np.asarray(b).astype(work_dtype) & mask
+
+	return a, b, mask, width.unsigned_dtype
+
+def add_bits_batch(a, b, bits):
+	"""Adds two arrays of unsigned integers and flags overflow per element."""
+	a, b, mask, dtype = _prepare(a, b, bits)
+
+	result = a + b
+	overflow = np.asarray(result > mask, dtype = bool)
+
+	return (result & mask).astype(dtype), overflow
+
+def subtract_bits_batch(a, b, bits):
+	"""Subtracts two arrays of unsigned integers and flags underflow per element."""
+	a, b, mask, dtype = _prepare(a, b, bits)
+
+	underflow = np.asarray(a < b, dtype = bool)
+	result = (a - b) & mask # uint64 wraps, the mask trims it back to size
+
+	return result.astype(dtype), underflow
+
+def multiply_bits_batch(a, b, bits):
+	"""Multiplies two arrays of unsigned integers and flags overflow per element."""
+	a, b, mask, dtype = _prepare(a, b, bits)
+
+	# (2**32 - 1) ** 2 still fits in 64 bits, so the product is exact up to 32 bits
+	result = a * b
+	overflow = np.asarray(result > mask, dtype = bool)
+
+	return (result & mask).astype(dtype), overflow
+
+def divide_bits_batch(a, b, bits):
+	"""
+	Divides two arrays of unsigned integers. Elements with a zero divisor
+	get a quotient and remainder of 0 and a True flag, as in divide_bits().
+	"""
+	a, b, mask, dtype = _prepare(a, b, bits)
+
+	divide_by_zero = np.asarray(b == 0, dtype = bool)
+	safe_b = np.where(divide_by_zero, 1, b).astype(b.dtype)
+
+	quotient = np.where(divide_by_zero, 0, a // safe_b)
+	remainder = np.where(divide_by_zero, 0, a % safe_b)
+
+	return quotient.astype(dtype), remainder.astype(dtype), divide_by_zero
+
+def test_batch_matches_scalar():
+	from t64_core.math_functions_bits import add_bits, subtract_bits, multiply_bits, divide_bits
+
+	print("\n--- Testing batch functions against scalar functions ---")
+	pairs = \
+	{
+		8: [(255, 1), (10, 5), (250, 10), (0, 1), (128, 129), (16, 16), (25, 11), (200, 0), (1, 2)],
+		16: [(65535, 1), (32768, 32768), (0, 1), (32768, 65535), (256, 256), (32768, 3), (5, 0)],
+		24: [(16777215, 1), (8388608, 8388608), (0, 1), (4096, 4096), (8388608, 3), (9, 0)],
+		32: [(4294967295, 1), (2147483648, 2147483648), (0, 1), (65536, 65536), (2147483648, 2), (7, 0)],
+		64: [(2**64 - 1, 1), (2**63, 2**63), (0, 1), (2**32, 2**32), (2**63 + 1, 3), (7, 0)],
+	}
+
+	for bits, operands in pairs.items():
+		dtype = get_bit_width(bits).unsigned_dtype
+		a = np.array([pair[0] for pair in operands], dtype = dtype)
+		b = np.array([pair[1] for pair in operands], dtype = dtype)
+
+		for scalar, batch in ((add_bits, add_bits_batch), (subtract_bits, subtract_bits_batch),
+									 (multiply_bits, multiply_bits_batch), (divide_bits, divide_bits_batch)):
+			batch_results = batch(a, b, bits)
+
+			for index, (x, y) in enumerate(operands):
+				expected = scalar(x, y, bits)
+				actual = tuple(bool(r[index]) if r.dtype == bool else int(r[index]) for r in batch_results)
+				assert actual == expected, f"{batch.__name__}({x}, {y}, {bits}): {actual} != {expected}"
+
+	print("batch functions match scalar functions!")
+
+
+if __name__ == "__main__":
+	test_batch_matches_scalar()
@@ -1,107 +1,61 @@
+from t64_core.bit_widths import get_bit_width
+
+'''
+The two's complement arithmetic is the same as twos_complement.py's
+sign_extend() and wrap_signed(), written out here so each operation
+looks its bit width up once.
+'''
+
 def add_signed_bits(a, b, bits):
 	"""Adds two signed integers with specified bit width and handles overflow."""
-	if bits == 8:
-		mask = 0xFF
-		min_val, max_val = -128, 127
-	elif bits == 16:
-		mask = 0xFFFF
-		min_val, max_val = -32768, 32767
-	elif bits == 32:
-		mask = 0xFFFFFFFF
-		min_val, max_val = -2147483648, 2147483647
-	else:
-		raise ValueError("Invalid bit width. Must be 8, 16, or 32.")
+	width = get_bit_width(bits)
+	mask, sign_bit = width.mask, width.sign_bit
 
 	# Convert inputs to signed integers
-	a = (a & mask) - (mask + 1 if a & (mask + 1) // 2 else 0)
-	b = (b & mask) - (mask + 1 if b & (mask + 1) // 2 else 0)
-
-	result = a + b
+	result = (((a & mask) ^ sign_bit) - sign_bit) + (((b & mask) ^ sign_bit) - sign_bit)
 
-	if result < min_val or result > max_val:
-		result = ((result + (max_val + 1)) % (2 * (max_val + 1))) - (max_val + 1)
-		overflow = True
-	else:
-		overflow = False
+	if width.min_signed <= result <= width.max_signed:
+		return result, False
 
-	return result, overflow
+	return ((result & mask) ^ sign_bit) - sign_bit, True
 
 
 def subtract_signed_bits(a, b, bits):
 	"""Subtracts two signed integers with specified bit width and handles underflow."""
-	if bits == 8:
-		mask = 0xFF
-		min_val, max_val = -128, 127
-	elif bits == 16:
-		mask = 0xFFFF
-		min_val, max_val = -32768, 32767
-	elif bits == 32:
-		mask = 0xFFFFFFFF
-		min_val, max_val = -2147483648, 2147483647
-	else:
-		raise ValueError("Invalid bit width. Must be 8, 16, or 32.")
+	width = get_bit_width(bits)
+	mask, sign_bit = width.mask, width.sign_bit
 
 	# Convert inputs to signed integers
-	a = (a & mask) - (mask + 1 if a & (mask + 1) // 2 else 0)
-	b = (b & mask) - (mask + 1 if b & (mask + 1) // 2 else 0)
+	result = (((a & mask) ^ sign_bit) - sign_bit) - (((b & mask) ^ sign_bit) - sign_bit)
 
-	result = a - b
+	if width.min_signed <= result <= width.max_signed:
+		return result, False
 
-	if result < min_val or result > max_val:
-		result = ((result + (max_val + 1)) % (2 * (max_val + 1))) - (max_val + 1)
-		underflow = True
-	else:
-		underflow = False
-
-	return result, underflow
+	return ((result & mask) ^ sign_bit) - sign_bit, True
 
 
 def multiply_signed_bits(a, b, bits):
 	"""Multiplies two signed integers with specified bit width and handles overflow."""
-	if bits == 8:
-		mask = 0xFF
-		min_val, max_val = -128, 127
-	elif bits == 16:
-		mask = 0xFFFF
-		min_val, max_val = -32768, 32767
-	elif bits == 32:
-		mask = 0xFFFFFFFF
-		min_val, max_val = -2147483648, 2147483647
-	else:
-		raise ValueError("Invalid bit width. Must be 8, 16, or 32.")
+	width = get_bit_width(bits)
+	mask, sign_bit = width.mask, width.sign_bit
 
 	# Convert inputs to signed integers
-	a = (a & mask) - (mask + 1 if a & (mask + 1) // 2 else 0)
-	b = (b & mask) - (mask + 1 if b & (mask + 1) // 2 else 0)
-
-	result = a * b
+	result = (((a & mask) ^ sign_bit) - sign_bit) * (((b & mask) ^ sign_bit) - sign_bit)
 
-	if result < min_val or result > max_val:
-		result = ((result + (max_val + 1)) % (2 * (max_val + 1))) - (max_val + 1)
-		overflow = True
-	else:
-		overflow = False
+	if width.min_signed <= result <= width.max_signed:
+		return result, False
 
-	return result, overflow
+	return ((result & mask) ^ sign_bit) - sign_bit, True
 
 
 def divide_signed_bits(a, b, bits):
 	"""Divides two signed integers with specified bit width and handles division by zero and underflow."""
-	if bits == 8:
-		mask = 0xFF
-		min_val, max_val = -128, 127
-	elif bits == 16:
-		mask = 0xFFFF
-		min_val, max_val = -32768, 32767
-	elif bits == 32:
-		mask = 0xFFFFFFFF
-		min_val, max_val = -2147483648, 2147483647
-	else:
-		raise ValueError("Invalid bit width. Must be 8, 16, or 32.")
+	width = get_bit_width(bits)
+	mask, sign_bit = width.mask, width.sign_bit
 
 	# Convert inputs to signed integers
-	a = (a & mask) - (mask + 1 if a & (mask + 1) // 2 else 0)
-	b = (b & mask) - (mask + 1 if b & (mask + 1) // 2 else 0)
+	a = ((a & mask) ^ sign_bit) - sign_bit
+	b = ((b & mask) ^ sign_bit) - sign_bit
 
 	if b == 0:
 		return 0, 0, True  # Division by zero
@@ -109,13 +63,11 @@ def divide_signed_bits(a, b, bits):
 	quotient = a // b
 	remainder = a % b
 
-	if quotient < min_val or quotient > max_val:
-		quotient = ((quotient + (max_val + 1)) % (2 * (max_val + 1))) - (max_val + 1)
-		underflow = True
-	else:
-		underflow = False
+	# only min // -1 is out of range
+	if quotient > width.max_signed:
+		return ((quotient & mask) ^ sign_bit) - sign_bit, remainder, True
 
-	return quotient, remainder, underflow
+	return quotient, remainder, False
 
 
 def test_add_signed_bits():
@@ -135,6 +87,10 @@ def test_add_signed_bits():
 	assert add_signed_bits(-2147483648, -1, 32) == (2147483647, True)  # Underflow
 	assert add_signed_bits(1000000, -500000, 32) == (500000, False)  # No overflow/underflow
 
+	# 24-bit tests
+	assert add_signed_bits(8388607, 1, 24) == (-8388608, True)  # Overflow
+	assert add_signed_bits(-8388608, -1, 24) == (8388607, True)  # Underflow
+
 	print("add_signed_bits tests passed!")
 
 
@@ -0,0 +1,110 @@
+import numpy as np
+
+from t64_core.bit_widths import get_bit_width
+from t64_core.twos_complement import sign_extend_batch, wrap_signed_batch
+
+'''
+Array versions of the signed functions in math_functions_signed_bits.py
+
+Each function takes two NumPy arrays (or anything np.asarray() accepts)
+and returns arrays in the same order as its scalar twin:
+	add_signed_bits_batch()       -> (result, overflow)
+	subtract_signed_bits_batch()  -> (result, underflow)
+	multiply_signed_bits_batch()  -> (result, overflow)
+	divide_signed_bits_batch()    -> (quotient, remainder, flag)
+
+Operands are masked and sign-extended from the bit width first, so an
+array of raw bytes (0..255) and an array of int8 values give the same
+answers. Division floors like Python's // and %, just as the scalar
+version does.
+'''
+
+def _prepare(a, b, bits):
+	"""Converts both operands to signed working arrays within the bit width."""
+	width = get_bit_width(bits)
+
+	# 64-bit sums and products don't fit in int64, so fall back to arrays of Python ints
+	work_dtype = np.int64 if width.bits <= 32 else object
+
+	a = sign_extend_batch(np.asarray(a).astype(work_dtype), bits)
+	b = sign_extend_batch(np.asarray(b).astype(work_dtype), bits)
+
+	return a, b, width
+
+def _wrap(result, width):
+	"""Wraps a result into the bit width and flags values that didn't fit."""
+	result, out_of_range = wrap_signed_batch(result, width.bits)
+
+	return result.astype(width.signed_dtype), out_of_range
+
+def add_signed_bits_batch(a, b, bits):
+	"""Adds two arrays of signed integers and flags overflow per element."""
+	a, b, width = _prepare(a, b, bits)
+
+	return _wrap(a + b, width)
+
+def subtract_signed_bits_batch(a, b, bits):
+	"""Subtracts two arrays of signed integers and flags underflow per element."""
+	a, b, width = _prepare(a, b, bits)
+
+	return _wrap(a - b, width)
+
+def multiply_signed_bits_batch(a, b, bits):
+	"""Multiplies two arrays of signed integers and flags overflow per element."""
+	a, b, width = _prepare(a, b, bits)
+
+	# (-2**31) ** 2 is 2**62, so the int64 product is exact up to 32 bits
+	return _wrap(a * b, width)
+
+def divide_signed_bits_batch(a, b, bits):
+	"""
+	Divides two arrays of signed integers. Elements with a zero divisor get
+	a quotient and remainder of 0 and a True flag, as in divide_signed_bits().
+	The flag is also set where the quotient wraps (e.g. -128 / -1 in 8 bits).
+	"""
+	a, b, width = _prepare(a, b, bits)
+
+	divide_by_zero = np.asarray(b == 0, dtype = bool)
+	safe_b = np.where(divide_by_zero, 1, b).astype(b.dtype)
+
+	# NumPy's // and % floor towards negative infinity, same as Python's
+	quotient, underflow = _wrap(np.where(divide_by_zero, 0, a // safe_b), width)
+	remainder = np.where(divide_by_zero, 0, a % safe_b).astype(width.signed_dtype)
+
+	return quotient, remainder, divide_by_zero | underflow
+
+def test_batch_matches_scalar():
+	from t64_core.math_functions_signed_bits import add_signed_bits, subtract_signed_bits, \
+		multiply_signed_bits, divide_signed_bits
+
+	print("\n--- Testing signed batch functions against scalar functions ---")
+	pairs = \
+	{
+		8: [(127, 1), (-128, -1), (50, -20), (64, 2), (-128, 2), (10, -3), (-128, 0), (-128, -1), (-7, 2), (7, -2)],
+		16: [(32767, 1), (-32768, -1), (1000, -500), (16384, 2), (-32768, 0), (-32768, -1), (-7, 2)],
+		24: [(8388607, 1), (-8388608, -1), (4194304, 2), (-8388608, 0), (-8388608, -1), (-7, 2)],
+		32: [(2147483647, 1), (-2147483648, -1), (1073741824, 2), (-2147483648, 0), (-2147483648, -1), (-7, 2)],
+		64: [(2**63 - 1, 1), (-2**63, -1), (2**62, 2), (-2**63, 0), (-2**63, -1), (-7, 2)],
+	}
+
+	for bits, operands in pairs.items():
+		dtype = get_bit_width(bits).signed_dtype
+		a = np.array([pair[0] for pair in operands], dtype = dtype)
+		b = np.array([pair[1] for pair in operands], dtype = dtype)
+
+		for scalar, batch in ((add_signed_bits, add_signed_bits_batch),
+									 (subtract_signed_bits, subtract_signed_bits_batch),
+									 (multiply_signed_bits, multiply_signed_bits_batch),
+									 (divide_signed_bits, divide_signed_bits_batch)):
+			batch_results = batch(a, b, bits)
+
+			for index, (x, y) in enumerate(operands):
+				expected = scalar(x, y, bits)
+				actual = tuple(bool(r[index]) if r.dtype == bool else int(r[index]) for r in batch_results)
+				assert actual == expected, f"{batch.__name__}({x}, {y}, {bits}): {actual} != {expected}"
+
+	print("signed batch functions match scalar functions!")
+
+
+if __name__ == "__main__":
+	test_batch_matches_scalar()
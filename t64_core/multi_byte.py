@@ -0,0 +1,229 @@
+import numpy as np
+
+from t64_core.alu_6502 import alu_adc, alu_sbc, alu_asl, alu_lsr, alu_rol, alu_ror, FLAG_C, FLAG_Z, FLAG_N
+
+'''
+Multi-byte arithmetic
+
+24- and 32-bit values on the 6502 live in memory as little-endian byte
+sequences and get added a byte at a time with a chain of ADCs:
+	CLC
+	LDA a+0 : ADC b+0 : STA r+0
+	LDA a+1 : ADC b+1 : STA r+1
+	...
+The functions here run the same chain through the 6502 ALU tables, so
+the result and the flags are exactly what that code leaves behind.
+
+Numbers can be bytes, bytearray or memoryview (anything indexable that
+gives back byte values), lowest byte first. Results come back as bytes.
+	add_bytes(b"\xFF\x00\x00", b"\x01\x00\x00")  ->  (b"\x00\x01\x00", 0)
+
+Flags are the ones left by the last instruction of the chain, so C, V
+and N describe the whole number, while Z (as on the CPU) only describes
+the top byte. compare_bytes() is the exception: its Z is set only if the
+numbers are equal in every byte.
+
+The *_rows versions take 2-D uint8 NumPy arrays, one number per row,
+and run the chain one byte column at a time for all rows at once.
+'''
+
+def _check_lengths(a, b):
+	if len(a) != len(b):
+		raise ValueError("Both numbers must have the same number of bytes")
+
+def add_bytes(a, b, carry = 0):
+	"""Adds two little-endian numbers with an ADC chain. Returns (bytes, flags)."""
+	_check_lengths(a, b)
+	result = bytearray(len(a))
+	flags = carry & FLAG_C
+
+	for position in range(len(a)):
+		result[position], flags = alu_adc(a[position], b[position], flags & FLAG_C)
+
+	return bytes(result), flags
+
+def subtract_bytes(a, b, carry = 1):
+	"""Subtracts two little-endian numbers with an SBC chain. Returns (bytes, flags)."""
+	_check_lengths(a, b)
+	result = bytearray(len(a))
+	flags = carry & FLAG_C
+
+	for position in range(len(a)):
+		result[position], flags = alu_sbc(a[position], b[position], flags & FLAG_C)
+
+	return bytes(result), flags
+
+def compare_bytes(a, b):
+	"""
+	Compares two little-endian numbers (unsigned) with an SBC chain.
+	C is set if a >= b, Z if a == b and N is bit 7 of the top byte of a - b.
+	"""
+	difference, flags = subtract_bytes(a, b, 1)
+
+	flags &= FLAG_C | FLAG_N
+
+	if not any(difference):
+		flags |= FLAG_Z
+
+	return flags
+
+def shift_left_bytes(a, count = 1):
+	"""Shifts a little-endian number left with ASL then a ROL chain. Returns (bytes, carry_out)."""
+	result = bytearray(a)
+	carry = 0
+
+	for _ in range(count):
+		result[0], flags = alu_asl(result[0])
+
+		for position in range(1, len(result)):
+			result[position], flags = alu_rol(result[position], flags & FLAG_C)
+
+		carry = flags & FLAG_C
+
+	return bytes(result), carry
+
+def shift_right_bytes(a, count = 1):
+	"""Shifts a little-endian number right with LSR then a ROR chain. Returns (bytes, carry_out)."""
+	result = bytearray(a)
+	top = len(result) - 1
+	carry = 0
+
+	for _ in range(count):
+		result[top], flags = alu_lsr(result[top])
+
+		for position in range(top - 1, -1, -1):
+			result[position], flags = alu_ror(result[position], flags & FLAG_C)
+
+		carry = flags & FLAG_C
+
+	return bytes(result), carry
+
+# --- Batch versions: one number per row ---
+
+def _as_rows(*arrays):
+	rows = [np.asarray(array, dtype = np.uint8) for array in arrays]
+
+	if rows[0].ndim != 2 or any(row.shape != rows[0].shape for row in rows):
+		raise ValueError("Arrays must be 2-D and the same shape")
+
+	return rows
+
+def _row_flags(carry, count):
+	return np.broadcast_to(np.asarray(carry, dtype = np.uint8) & FLAG_C, (count,))
+
+def add_rows(a, b, carry = 0):
+	"""Adds two arrays of little-endian numbers. Returns (results, flags)."""
+	a, b = _as_rows(a, b)
+	result = np.empty_like(a)
+	flags = _row_flags(carry, a.shape[0])
+
+	for column in range(a.shape[1]):
+		result[:, column], flags = alu_adc.batch(a[:, column], b[:, column], flags & FLAG_C)
+
+	return result, flags
+
+def subtract_rows(a, b, carry = 1):
+	"""Subtracts two arrays of little-endian numbers. Returns (results, flags)."""
+	a, b = _as_rows(a, b)
+	result = np.empty_like(a)
+	flags = _row_flags(carry, a.shape[0])
+
+	for column in range(a.shape[1]):
+		result[:, column], flags = alu_sbc.batch(a[:, column], b[:, column], flags & FLAG_C)
+
+	return result, flags
+
+def compare_rows(a, b):
+	"""Compares two arrays of little-endian numbers. Returns a flags array, as compare_bytes()."""
+	difference, flags = subtract_rows(a, b, 1)
+
+	flags = flags & (FLAG_C | FLAG_N)
+
+	return flags | np.where(difference.any(axis = 1), 0, FLAG_Z).astype(np.uint8)
+
+def shift_left_rows(a, count = 1):
+	"""Shifts an array of little-endian numbers left. Returns (results, carries)."""
+	(result,) = _as_rows(a)
+	result = result.copy()
+	carry = np.zeros(result.shape[0], dtype = np.uint8)
+
+	for _ in range(count):
+		result[:, 0], flags = alu_asl.batch(result[:, 0])
+
+		for column in range(1, result.shape[1]):
+			result[:, column], flags = alu_rol.batch(result[:, column], flags & FLAG_C)
+
+		carry = flags & FLAG_C
+
+	return result, carry
+
+def shift_right_rows(a, count = 1):
+	"""Shifts an array of little-endian numbers right. Returns (results, carries)."""
+	(result,) = _as_rows(a)
+	result = result.copy()
+	top = result.shape[1] - 1
+	carry = np.zeros(result.shape[0], dtype = np.uint8)
+
+	for _ in range(count):
+		result[:, top], flags = alu_lsr.batch(result[:, top])
+
+		for column in range(top - 1, -1, -1):
+			result[:, column], flags = alu_ror.batch(result[:, column], flags & FLAG_C)
+
+		carry = flags & FLAG_C
+
+	return result, carry
+
+def test_multi_byte():
+	print("--- Testing multi-byte arithmetic ---")
+	a = (0x123456).to_bytes(3, "little")
+	b = (0x00FFFF).to_bytes(3, "little")
+
+	result, flags = add_bytes(a, b)
+	assert int.from_bytes(result, "little") == 0x133455 and not flags & FLAG_C
+
+	result, flags = add_bytes(b"\xFF\xFF\xFF", b"\x01\x00\x00")
+	assert result == b"\x00\x00\x00" and flags & FLAG_C and flags & FLAG_Z
+
+	result, flags = subtract_bytes(a, b)
+	assert int.from_bytes(result, "little") == 0x113457 and flags & FLAG_C
+
+	result, flags = subtract_bytes(b, a)
+	assert int.from_bytes(result, "little") == (0x00FFFF - 0x123456) & 0xFFFFFF and not flags & FLAG_C
+
+	assert compare_bytes(a, a) == FLAG_Z | FLAG_C
+	assert compare_bytes(a, b) & FLAG_C and not compare_bytes(b, a) & FLAG_C
+	# equal top bytes but different low bytes: Z stays clear
+	assert not compare_bytes(b"\x01\x00", b"\x00\x00") & FLAG_Z
+
+	assert shift_left_bytes(b"\x80\x80", 1) == (b"\x00\x01", 1)
+	assert shift_right_bytes(b"\x01\x01", 1) == (b"\x80\x00", 1)
+	assert shift_left_bytes(memoryview(b"\x01\x00\x00\x00"), 20) == ((1 << 20).to_bytes(4, "little"), 0)
+
+	values = np.array([0x123456, 0xFFFFFF, 0, 0x7FFFFF])
+	rows = values.astype("<u4").view(np.uint8).reshape(-1, 4)[:, :3]
+	ones = np.tile(np.array([1, 0, 0], dtype = np.uint8), (4, 1))
+
+	results, flags = add_rows(rows, ones)
+	for row, value in zip(results, values):
+		assert int.from_bytes(row.tobytes(), "little") == (value + 1) & 0xFFFFFF
+	assert ((flags & FLAG_C) != 0).tolist() == [False, True, False, False]
+
+	results, flags = subtract_rows(rows, ones)
+	assert ((flags & FLAG_C) != 0).tolist() == [True, True, False, True]
+
+	assert (compare_rows(rows, rows) & FLAG_Z).all()
+
+	shifted, carries = shift_left_rows(rows, 4)
+	for row, value in zip(shifted, values):
+		assert int.from_bytes(row.tobytes(), "little") == (value << 4) & 0xFFFFFF
+
+	shifted, carries = shift_right_rows(rows, 4)
+	for row, value in zip(shifted, values):
+		assert int.from_bytes(row.tobytes(), "little") == value >> 4
+
+	print("multi-byte tests passed!")
+
+
+if __name__ == "__main__":
+	test_multi_byte()
@@ -0,0 +1,122 @@
+from t64_core.fixed_point import fixed_point_formats_by_width, parse_fixed, format_fixed
+from t64_core.formatting import format_number
+
+'''
+Number fields
+
+A NumberField is one of the calculator's number fields. What it holds is
+an integer value, with the bit width and signedness it was entered at;
+the text is only a rendering of that value. Each base's text is rendered
+the first time it's asked for and kept, so switching bases back and
+forth doesn't parse or format anything again:
+	field = NumberField()
+	field.set_text("-5", "dec", 8, True)
+	field.value        ->  -5
+	field.text("hex")  ->  "-05"
+	field.text("bin")  ->  "-00000101"
+
+Values are shown zero-padded to their bit width in hex and binary (see
+formatting.py), unless the field is made with pad = False. Text typed
+into a field is kept exactly as it was typed (leading zeros and all) for
+the base it was typed in. Text that isn't a number ("NaN",
+or half an edit) has no value and is shown as it is in every base.
+
+A number with a point in it is a fixed-point number (8.8 or 16.16, from
+the bit width). Its value is the raw fixed-point value and fixed_format
+says which format it's in.
+'''
+
+_radix = {"bin": 2, "dec": 10, "hex": 16}
+
+class NumberField:
+	"""One number field: an integer value and its text in each base, rendered when first needed."""
+	__slots__ = ("value", "bits", "signed", "pad", "fixed_format", "_texts")
+
+	def __init__(self, bits = 8, signed = False, pad = True):
+		self.value = None # None when the field is empty or doesn't hold a number
+		self.bits = bits
+		self.signed = signed
+		self.pad = pad # zero-pad hex and binary to the bit width
+		self.fixed_format = None # the FixedPointFormat of a fixed-point value
+		self._texts = {} # base -> text
+
+	def clear(self):
+		self.value = None
+		self.fixed_format = None
+		self._texts = {}
+
+	def set_value(self, value, bits, signed, fixed_format = None):
+		"""Stores a value (e.g. a result). Its text is rendered when it's asked for."""
+		self.value = value
+		self.bits = bits
+		self.signed = signed
+		self.fixed_format = fixed_format
+		self._texts = {}
+
+	def set_text(self, text, base, bits, signed):
+		"""Stores text typed into the field in a base, and works out its value."""
+		if self._texts.get(base) == text:
+			return
+
+		self._texts = {base: text}
+		self.bits = bits
+		self.signed = signed
+		self.fixed_format = None
+
+		try:
+			if "." in text:
+				self.fixed_format = fixed_point_formats_by_width[bits]
+				self.value, _ = parse_fixed(text, base, self.fixed_format)
+			else:
+				self.value = int(text, _radix[base])
+		except (ValueError, KeyError):
+			self.value = None
+			self.fixed_format = None
+
+	def text(self, base):
+		"""The field's text in a base."""
+		text = self._texts.get(base)
+
+		if text is None:
+			if self.value is None:
+				# not a number, so there's nothing to convert: show it as it is
+				text = next(iter(self._texts.values()), "")
+			elif self.fixed_format is not None:
+				text = format_fixed(self.value, self.fixed_format, base)
+			else:
+				text = format_number(self.value, base, self.bits, pad = self.pad)
+
+			self._texts[base] = text
+
+		return text
+
+
+def test_number_field():
+	print("--- Testing number fields ---")
+	field = NumberField()
+	assert field.text("hex") == ""
+
+	field.set_text("0f", "hex", 8, False)
+	assert field.value == 15 and field.text("hex") == "0f"
+	assert field.text("dec") == "15" and field.text("bin") == "00001111"
+
+	field.set_value(-8, 8, True)
+	assert (field.text("hex"), field.text("bin"), field.text("dec")) == ("-08", "-00001000", "-8")
+
+	field.set_text("-1000", "bin", 8, True)
+	assert field.value == -8 and field.text("hex") == "-08"
+
+	field.set_value(1000, 16, False)
+	assert field.text("hex") == "03E8"
+
+	field.set_text("NaN", "bin", 8, False)
+	assert field.value is None and field.text("dec") == "NaN"
+
+	field.set_text("1.8", "hex", 8, False)
+	assert field.value == 0x0180 and field.text("dec") == "1.5" and field.text("bin") == "00000001.10000000"
+
+	print("number field tests passed!")
+
+
+if __name__ == "__main__":
+	test_number_field()
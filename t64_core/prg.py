@@ -0,0 +1,257 @@
+import mmap
+import sys
+
+import numpy as np
+
+from t64_core.dispatch import operations
+from t64_core.formatting import format_bytes, format_number
+
+'''
+PRG files
+
+A PRG file is what the C-64 saves a program (or any block of memory)
+as: a two-byte load address, low byte first, then the bytes that go
+there. PrgFile memory-maps one, so even a multi-megabyte cartridge dump
+opens instantly and is never copied:
+	with PrgFile("game.prg") as prg:
+		prg.load_address               ->  0x0801
+		prg.data(0x0810, 0x0820)       ->  the bytes at $0810-$081F, a NumPy view of the file
+		prg.apply("AND", 0x7F)         ->  (results, flags) for every byte
+		for line in prg.dump(0x0801, 0x0811):
+			print(line)                ->  "0801: 0B 08 0A 00 9E 32 30 36 31 00 00 00 A9 00 8D 20"
+
+Addresses are C-64 addresses: the load address is the first byte of
+the payload. Ranges include the start and stop before the end, and
+default to the whole payload.
+
+apply() runs one of the calculator's 8-bit unsigned operations ("AND",
+"OR", "XOR", "+", "-", "<<", ">>", "NOT"...) on every byte in a range,
+through the same 8-bit tables as the calculator (see dispatch.py), so
+the answers and flags are exactly the calculator's. It works through
+the range a chunk at a time, so the only new memory it needs is for
+its results.
+
+Views of the file (data(), payload) have to be dropped before the file
+is closed.
+
+To dump a file: python -m t64_core.prg game.prg [bin]
+'''
+
+# operation names that aren't the calculator's button labels
+_aliases = {"ADD": "+", "SUB": "-", "EOR": "XOR"}
+
+# the values an operation gives that are flags, not bytes
+_flag_names = {"flag"}
+
+class PrgFile:
+	"""A memory-mapped PRG file. Use it in a with block, or close() it when done."""
+	def __init__(self, path):
+		self.path = path
+		self._file = open(path, "rb")
+
+		try:
+			self._map = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ)
+		except ValueError:
+			# an empty file can't be mapped
+			self._file.close()
+			raise ValueError(f"Not a PRG file (it's empty): {path}") from None
+
+		if len(self._map) < 2:
+			self.close()
+			raise ValueError(f"Not a PRG file (no load address): {path}")
+
+		self.load_address = self._map[0] | (self._map[1] << 8)
+		self.payload = memoryview(self._map)[2:] # everything after the load address, not copied
+		self.bytes = np.frombuffer(self._map, dtype = np.uint8, offset = 2) # the same, as a read-only array
+
+	@property
+	def end_address(self):
+		"""The address just past the last byte."""
+		return self.load_address + len(self.payload)
+
+	def close(self):
+		if self._map is not None:
+			self.bytes = None
+
+			if getattr(self, "payload", None) is not None:
+				self.payload.release()
+				self.payload = None
+
+			self._map.close()
+			self._map = None
+			self._file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exception):
+		self.close()
+
+	def _offsets(self, start, end):
+		"""A range of addresses as offsets into the payload."""
+		start = self.load_address if start is None else start
+		end = self.end_address if end is None else end
+
+		if not self.load_address <= start <= end <= self.end_address:
+			raise ValueError(f"${start:04X}-${end:04X} isn't inside ${self.load_address:04X}-${self.end_address:04X}")
+
+		return start - self.load_address, end - self.load_address
+
+	def data(self, start = None, end = None):
+		"""The bytes in a range of addresses, as a NumPy view of the file."""
+		first, last = self._offsets(start, end)
+
+		return self.bytes[first:last]
+
+	def apply(self, operation, operand = None, start = None, end = None, chunk_size = 1 << 20):
+		"""
+		Runs an 8-bit operation on every byte in a range, with operand as
+		the second number: one number, or an array with one per byte, each
+		0-255. Returns one array per value the operation gives: (results,
+		flags), or (quotients, remainders, flags) for "/". Values
+		are uint8 and flags are bool.
+		"""
+		descriptor = operations.get((_aliases.get(operation.upper(), operation.upper()), False, 8))
+
+		if descriptor is None:
+			raise ValueError(f"Unknown operation: {operation}")
+
+		data = self.data(start, end)
+		per_byte = np.ndim(operand) > 0
+
+		if descriptor.arity == 2 and operand is None:
+			raise ValueError(f"{operation} needs an operand")
+
+		if per_byte and len(operand) != len(data):
+			raise ValueError(f"{len(operand)} operands for {len(data)} bytes")
+
+		# the tables only look up bytes: anything bigger would be quietly cut down to one
+		if operand is not None and np.size(operand) and not (0 <= np.min(operand) and np.max(operand) <= 0xFF):
+			raise ValueError(f"{operation} operands have to be 0-255")
+
+		columns = None
+
+		for offset in range(0, max(len(data), 1), chunk_size):
+			chunk = data[offset:offset + chunk_size]
+
+			if descriptor.arity == 1:
+				answers = descriptor.batch(chunk)
+			else:
+				answers = descriptor.batch(chunk, operand[offset:offset + chunk_size] if per_byte else operand)
+
+			if columns is None:
+				columns = tuple(np.empty(len(data), dtype = bool if name in _flag_names else np.uint8)
+									 for name in descriptor.result_shape)
+
+			for column, answer in zip(columns, answers):
+				column[offset:offset + len(chunk)] = answer
+
+		return columns
+
+	def dump(self, start = None, end = None, base = "hex", per_line = None):
+		"""Yields the bytes in a range as lines of a memory dump: "C000: A9 00 8D 20 D0"."""
+		first, last = self._offsets(start, end)
+		per_line = per_line or (16 if base == "hex" else 4)
+
+		for offset in range(first, last, per_line):
+			row = self.bytes[offset:min(offset + per_line, last)].tolist()
+
+			yield f"{format_number(self.load_address + offset, 'hex', 16)}: {format_bytes(row, base)}"
+
+
+def test_prg():
+	import os
+	import tempfile
+
+	from t64_core.bit_wise_operations_unsigned import bitwise_and, shift_left
+	from t64_core.math_functions_bits import add_bits, divide_bits
+
+	print("--- Testing PRG files ---")
+	payload = bytes(range(256)) * 3 + b"\x0B\x08"
+
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "test.prg")
+
+		with open(path, "wb") as file:
+			file.write(b"\x01\x08" + payload)
+
+		with PrgFile(path) as prg:
+			assert (prg.load_address, prg.end_address) == (0x0801, 0x0801 + len(payload))
+			assert bytes(prg.payload) == payload
+			assert not prg.bytes.flags.writeable and prg.bytes.base is not None # a view of the file, not a copy
+			assert prg.data(0x0810, 0x0814).tolist() == [15, 16, 17, 18]
+
+			data = prg.bytes.tolist()
+
+			# chunks much smaller than the data, to cross chunk boundaries
+			results, flags = prg.apply("AND", 0x3C, chunk_size = 7)
+			assert [(int(r), bool(f)) for r, f in zip(results, flags)] == [bitwise_and(a, 0x3C, 8) for a in data]
+
+			results, flags = prg.apply("ADD", prg.bytes[::-1], chunk_size = 100)
+			assert [(int(r), bool(f)) for r, f in zip(results, flags)] == [add_bits(a, b, 8) for a, b in zip(data, data[::-1])]
+
+			results, _ = prg.apply("<<", 3, 0x0900, 0x0910)
+			assert results.tolist() == [shift_left(a, 3, 8)[0] for a in prg.data(0x0900, 0x0910).tolist()]
+
+			quotients, remainders, divide_by_zero = prg.apply("/", 7)
+			assert list(zip(quotients.tolist(), remainders.tolist(), divide_by_zero.tolist())) == [divide_bits(a, 7, 8) for a in data]
+
+			assert prg.apply("NOT")[0].tolist() == [255 - a for a in data]
+
+			# shifting by 8 or more gives what the 8-bit shift gives: nothing left
+			results, flags = prg.apply("<<", 8, 0x0801, 0x0803)
+			assert results.tolist() == [shift_left(a, 8, 8)[0] for a in data[:2]] == [0, 0]
+
+			for operation in ("<<", ">>", "AND", "+", "/", "NOT"):
+				columns = prg.apply(operation, None if operation == "NOT" else 3, 0x0801, 0x0811)
+				assert [column.dtype for column in columns] == [np.uint8] * (len(columns) - 1) + [bool], operation
+
+			for bad in (256, -1, np.array([1] * (len(data) - 1) + [256])):
+				try:
+					prg.apply("<<", bad)
+					assert False, bad
+				except ValueError:
+					pass
+			assert len(prg.apply("XOR", 1, 0x0900, 0x0900)[0]) == 0
+
+			try:
+				prg.apply("MOD", 3)
+				assert False
+			except ValueError:
+				pass
+
+			assert list(prg.dump(0x0801, 0x0815)) == ["0801: 00 01 02 03 04 05 06 07 08 09 0A 0B 0C 0D 0E 0F",
+																	"0811: 10 11 12 13"]
+			assert next(prg.dump(base = "bin")) == "0801: 00000000 00000001 00000010 00000011"
+
+			for bad in ((0x0800, None), (0x0900, 0x0800), (None, 0x10000)):
+				try:
+					prg.data(*bad)
+					assert False, bad
+				except ValueError:
+					pass
+
+			del data, results, flags, quotients, remainders, divide_by_zero
+
+		for contents in (b"", b"\x01"):
+			with open(path, "wb") as file:
+				file.write(contents)
+
+			try:
+				PrgFile(path)
+				assert False, contents
+			except ValueError:
+				pass
+
+	print("PRG file tests passed!")
+
+
+if __name__ == "__main__":
+	if len(sys.argv) > 1:
+		with PrgFile(sys.argv[1]) as prg:
+			print(f"load address ${prg.load_address:04X}, {len(prg.payload)} bytes")
+
+			for line in prg.dump(base = sys.argv[2] if len(sys.argv) > 2 else "hex"):
+				print(line)
+	else:
+		test_prg()
@@ -0,0 +1,356 @@
+from t64_core.dispatch import operations, fixed_point_operations, QUOTIENT_REMAINDER
+from t64_core.fixed_point import fixed_point_formats_by_width, to_fixed, from_fixed
+from t64_core.twos_complement import to_unsigned
+from t64_core.number_field import NumberField
+
+'''
+Calculator sessions
+
+A CalculatorSession is one calculator: what's in its number fields, the
+operation in progress and the mode switches. It's the state machine
+behind the buttons, with no widgets in it, so any number of sessions can
+run side by side (one per window, or thousands in a script) and a
+session can be driven from any thread that owns it:
+	session = CalculatorSession()
+	for digit in "250":
+		session.insert_digit(digit)
+	session.set_math_operation("+")
+	session.insert_digit("1"); session.insert_digit("0")
+	session.do_equals()
+	session.result_text  ->  "4"
+
+Each number field is a NumberField (see number_field.py): its integer
+value is what counts, and the text in each base is only rendered from
+it. Changing base re-renders the fields, and equals works on the values
+without parsing any text. Operations come from the dispatch table (see
+dispatch.py), so one-number operations like NOT and two-number ones go
+through the same steps. The *_text properties give the text for the
+current base, so a GUI just copies them to and from its labels.
+'''
+
+sign_set_values = {True: "Negative", False: "Positive"}
+signed_unsigned_flags = {True: "Signed", False: "Unsigned"}
+
+def _field_text(field_name):
+	"""A property giving a number field's text in the session's current base."""
+	def get_text(self):
+		return getattr(self, field_name).text(self.numsys_state)
+
+	def set_text(self, text):
+		getattr(self, field_name).set_text(text, self.numsys_state, int(self.bitwidth_state), self.signed_mode)
+
+	return property(get_text, set_text)
+
+class CalculatorSession:
+	"""The state of one calculator, and everything its buttons do to it."""
+	__slots__ = ("signed_mode", "sign_set_state", "numsys_state", "bitwidth_state", "operation_flag", "one_number_op",
+					 "first", "second", "result", "remainder", "overflow", "symbol_text", "current_field")
+
+	def __init__(self, numsys = "dec", bitwidth = "8"):
+		# state flags
+		self.signed_mode = False
+		self.sign_set_state = False
+		self.numsys_state = numsys
+		self.bitwidth_state = bitwidth
+		self.operation_flag = None
+		self.one_number_op = False
+
+		# the two numbers, the results and the math/logic symbol
+		self.first = NumberField()
+		self.second = NumberField()
+		self.result = NumberField()
+		self.remainder = NumberField(pad = False) # it only has a little space
+		self.overflow = False # the result saturated or a signed quotient wrapped: shown where the remainder goes
+		self.symbol_text = ""
+
+		# the field digits go into: "first" or "second"
+		self.current_field = "first"
+
+	first_text = _field_text("first")
+	second_text = _field_text("second")
+	result_text = _field_text("result")
+
+	@property
+	def remainder_text(self):
+		if self.overflow:
+			return "OVF"
+
+		remainder = self.remainder.text(self.numsys_state)
+
+		return "R: " + remainder if remainder else ""
+
+	@property
+	def current_text(self):
+		return getattr(self, self.current_field).text(self.numsys_state)
+
+	@current_text.setter
+	def current_text(self, text):
+		getattr(self, self.current_field).set_text(text, self.numsys_state, int(self.bitwidth_state), self.signed_mode)
+
+	def print_state_flags(self):
+		print("State Flags:")
+		print("signed_mode: ", self.signed_mode)
+		print("signed_mode: ", signed_unsigned_flags[self.signed_mode])
+
+		print("sign_set_state: ", self.sign_set_state)
+		print("sign_set_state: ", sign_set_values[self.sign_set_state])
+
+		print("numsys_state: ", self.numsys_state)
+		print("bitwidth_state: ", self.bitwidth_state)
+		print("operation_flag:", self.operation_flag)
+		print("one_number_op:", self.one_number_op)
+
+		print("")
+
+	def change_numsys(self, numsys):
+		"""Switches number base ("bin", "dec" or "hex"). The fields show their values in the new base."""
+		self.numsys_state = numsys
+
+	def change_bitwidth(self, bitwidth):
+		self.bitwidth_state = bitwidth
+
+	def insert_digit(self, digit_to_add):
+		# BEFORE adding the digit, check to see if the result field
+		# has a value. If so, clear everything.
+		if self.result_text != "":
+			self.first.clear()
+			self.second.clear()
+			self.result.clear()
+			self.remainder.clear()
+			self.overflow = False
+			self.symbol_text = ""
+
+		# add the current digit to the end of the current field
+		self.current_text += digit_to_add
+
+	def do_two_number_operation(self, op_type):
+		# show the math/logic symbol
+		self.symbol_text = op_type
+		# focus goes from the first number to the second
+		self.current_field = "second"
+
+	def set_math_operation(self, operation):
+		if self.first.value is not None:
+			self.operation_flag = operation
+			self.one_number_op = operation == "NOT"
+
+			if self.one_number_op == True:
+				self.evaluate(operation)
+			else:
+				self.do_two_number_operation(operation)
+
+			# the sign only applies to the number that's just been entered
+			self.sign_set_state = False
+
+	def edit_operation(self, label):
+		if label == "BS":
+			self.current_text = self.current_text[:-1]
+		elif label == "CLR":
+			self.current_text = ""
+
+	def _fixed_point_value(self, field, fixed_point_format):
+		"""A field's value as a raw fixed-point number in the given format."""
+		if field.fixed_format is fixed_point_format:
+			return field.value
+		elif field.fixed_format is not None:
+			# entered at the other bit width
+			return to_fixed(from_fixed(field.value, field.fixed_format), fixed_point_format)[0]
+		else:
+			return to_fixed(field.value, fixed_point_format)[0]
+
+	def evaluate(self, operation_flag):
+		"""
+		Runs an operation on the number fields and puts its answer in the
+		result fields. Returns False if it can't be done: it doesn't apply
+		in this mode or its numbers aren't in yet.
+		"""
+		bitwidth = int(self.bitwidth_state)
+		fixed_point_format = None
+
+		# a point in either number means fixed-point arithmetic
+		if self.first.fixed_format is not None or self.second.fixed_format is not None:
+			# the bit width is the size of the integer part: 8.8 or 16.16
+			fixed_point_format = fixed_point_formats_by_width[bitwidth]
+			operation = fixed_point_operations.get((operation_flag, bitwidth))
+		else:
+			operation = operations.get((operation_flag, self.signed_mode, bitwidth))
+
+		if operation is None:
+			return False
+
+		fields = (self.first, self.second)[:operation.arity]
+
+		if any(field.value is None for field in fields):
+			return False
+
+		if fixed_point_format is None:
+			operands = [field.value for field in fields]
+		else:
+			operands = [self._fixed_point_value(field, fixed_point_format) for field in fields]
+
+		answer = operation(*operands)
+		self.overflow = False
+
+		if fixed_point_format is not None:
+			result, flag = answer
+
+			# numbers with a point are nearly always decimal, so divide
+			# by zero shows "NaN" in every base, not just binary
+			if operation_flag == "/" and operands[1] == 0:
+				self.result.set_text("NaN", self.numsys_state, bitwidth, self.signed_mode)
+			else:
+				self.result.set_value(int(result), bitwidth, self.signed_mode, fixed_point_format)
+				self.overflow = bool(flag)
+		elif operation.result_shape == QUOTIENT_REMAINDER:
+			quotient, remainder, flag = answer
+			divide_by_zero = to_unsigned(operands[1], bitwidth) == 0 # the kernels only look at the low bits
+
+			# divide by zero in binary shows "NaN"
+			if divide_by_zero and self.numsys_state == "bin":
+				self.result.set_text("NaN", self.numsys_state, bitwidth, self.signed_mode)
+			else:
+				self.result.set_value(int(quotient), bitwidth, self.signed_mode)
+				# -128 / -1 wraps round to -128
+				self.overflow = bool(flag) and not divide_by_zero
+
+			# Is there a remainder? Display it.
+			if remainder > 0:
+				self.remainder.set_value(int(remainder), bitwidth, self.signed_mode)
+		else:
+			self.result.set_value(int(answer[0]), bitwidth, self.signed_mode, fixed_point_format)
+
+		return True
+
+	def do_equals(self):
+		if self.operation_flag != None:
+			if not self.evaluate(self.operation_flag):
+				# wait until both numbers are in
+				return
+
+		# And reset the flag, indicating the operation is finished
+		self.operation_flag = None
+		self.current_field = "first"
+
+	def set_sign(self):
+		"""Flips the sign of the number being entered (signed mode only)."""
+		if self.signed_mode == True:
+			if "-" in self.current_text:
+				# remove the minus sign from the current number
+				self.current_text = self.current_text[1:]
+				self.sign_set_state = False
+			else:
+				# prepend a minus sign
+				self.current_text = "-" + self.current_text
+				self.sign_set_state = True
+
+	def sign_mode_toggle(self):
+		# if we're in unsigned mode, go to signed mode
+		if self.signed_mode == False:
+			self.signed_mode = True
+		# if we're in signed mode, go to unsigned mode
+		else:
+			self.signed_mode = False
+
+			# if the number was made negative, take the minus sign off again
+			if self.sign_set_state == True:
+				self.sign_set_state = False
+
+				if self.current_text[:1] == "-":
+					self.current_text = self.current_text[1:]
+
+
+def test_session():
+	print("--- Testing calculator sessions ---")
+	session = CalculatorSession()
+
+	for key in ("2", "5", "0", "+", "1", "0"):
+		if key.isdigit():
+			session.insert_digit(key)
+		else:
+			session.set_math_operation(key)
+
+	session.do_equals()
+	assert (session.first_text, session.symbol_text, session.second_text, session.result_text) == ("250", "+", "10", "4")
+
+	session.change_numsys("hex")
+	assert (session.first_text, session.result_text) == ("FA", "04")
+	# switching to the base that's already showing changes nothing
+	session.change_numsys("hex")
+	assert session.first_text == "FA"
+
+	# a new digit starts a new calculation
+	session.insert_digit("1")
+	assert (session.first_text, session.second_text, session.result_text) == ("1", "", "")
+
+	# sessions don't share anything
+	signed = CalculatorSession()
+	signed.sign_mode_toggle()
+	signed.insert_digit("5")
+	signed.set_sign()
+	signed.set_math_operation("-")
+	signed.insert_digit("3")
+	signed.do_equals()
+	assert signed.result_text == "-8" and not session.signed_mode
+
+	# negative numbers keep their sign in every base
+	signed.change_numsys("hex")
+	signed.change_numsys("bin")
+	assert (signed.first_text, signed.result_text) == ("-00000101", "-00001000")
+	signed.change_numsys("dec")
+	assert signed.result_text == "-8"
+
+	divide = CalculatorSession(bitwidth = "16")
+	divide.first_text = "1000"
+	divide.set_math_operation("/")
+	divide.second_text = "7"
+	divide.do_equals()
+	assert (divide.result_text, divide.remainder_text) == ("142", "R: 6")
+
+	# NOT works on the first number straight away
+	inverted = CalculatorSession(numsys = "hex")
+	inverted.first_text = "0F"
+	inverted.set_math_operation("NOT")
+	assert inverted.result_text == "F0"
+
+	# a signed quotient that doesn't fit wraps, and says so
+	wrapped = CalculatorSession()
+	wrapped.sign_mode_toggle()
+	wrapped.first_text = "-128"
+	wrapped.set_math_operation("/")
+	wrapped.second_text = "-1"
+	wrapped.do_equals()
+	assert (wrapped.result_text, wrapped.remainder_text) == ("-128", "OVF")
+
+	wrapped.change_numsys("bin")
+	wrapped.first_text = "0"
+	wrapped.set_math_operation("/")
+	wrapped.second_text = "0"
+	wrapped.do_equals()
+	assert (wrapped.result_text, wrapped.remainder_text) == ("NaN", "")
+
+	# fixed point: divide by zero and saturation are shown
+	fixed = CalculatorSession()
+	fixed.first_text = "1.5"
+	fixed.set_math_operation("/")
+	fixed.second_text = "0"
+	fixed.do_equals()
+	assert (fixed.result_text, fixed.remainder_text) == ("NaN", "")
+
+	fixed = CalculatorSession()
+	fixed.sign_mode_toggle()
+	fixed.first_text = "100.5"
+	fixed.set_math_operation("+")
+	fixed.second_text = "100"
+	fixed.do_equals()
+	assert (fixed.result_text, fixed.remainder_text) == ("127.99609375", "OVF")
+
+	fixed.insert_digit("1")
+	assert fixed.remainder_text == ""
+
+	assert not hasattr(session, "__dict__")
+
+	print("calculator session tests passed!")
+
+
+if __name__ == "__main__":
+	test_session()
@@ -0,0 +1,135 @@
+from t64_core.bit_widths import get_bit_width
+
+'''
+Two's complement in one place
+
+Every signed path in the calculator needs the same three conversions:
+	sign_extend(0xFF, 8)    ->  -1        (bit pattern to signed value)
+	to_unsigned(-1, 8)      ->  0xFF      (signed value to bit pattern)
+	wrap_signed(128, 8)     ->  (-128, True)
+Any integer can go in, whatever its sign or size: only the low bits
+count, so 0x1FF and -1 both sign-extend to -1 in 8 bits.
+
+Sign extension is done branch-free, ((value & mask) ^ sign_bit) -
+sign_bit. It works the same on Python ints and NumPy arrays, so the
+*_batch versions are the same arithmetic. run_benchmark() times these
+functions and the signed operations that use the same arithmetic.
+'''
+
+def sign_extend(value, bits):
+	"""Reads the low bits of an integer as a signed value."""
+	width = get_bit_width(bits)
+
+	return ((value & width.mask) ^ width.sign_bit) - width.sign_bit
+
+def to_unsigned(value, bits):
+	"""Gives the bit pattern of an integer (signed or not) as an unsigned value."""
+	return value & get_bit_width(bits).mask
+
+def wrap_signed(value, bits):
+	"""Wraps a result into the signed range. Returns (value, out_of_range)."""
+	width = get_bit_width(bits)
+
+	if width.min_signed <= value <= width.max_signed:
+		return value, False
+
+	return ((value & width.mask) ^ width.sign_bit) - width.sign_bit, True
+
+def resign(value, signed, bits):
+	"""Gives the value as it shows in the calculator: signed or unsigned."""
+	return sign_extend(value, bits) if signed else to_unsigned(value, bits)
+
+# --- Batch versions: same arithmetic, on NumPy arrays ---
+# The arrays must be a signed dtype wide enough for the value (int64, or object for 64 bits).
+# NumPy is only imported where it's needed, so the scalar functions load quickly.
+
+def sign_extend_batch(values, bits):
+	"""Reads the low bits of every element as a signed value."""
+	width = get_bit_width(bits)
+
+	return ((values & width.mask) ^ width.sign_bit) - width.sign_bit
+
+def to_unsigned_batch(values, bits):
+	"""Gives the bit pattern of every element as an unsigned value."""
+	return values & get_bit_width(bits).mask
+
+def wrap_signed_batch(values, bits):
+	"""Wraps every element into the signed range. Returns (values, out_of_range)."""
+	import numpy as np
+
+	width = get_bit_width(bits)
+	out_of_range = np.asarray((values < width.min_signed) | (values > width.max_signed), dtype = bool)
+
+	return sign_extend_batch(values, bits), out_of_range
+
+def test_twos_complement():
+	import numpy as np
+
+	print("--- Testing two's complement ---")
+	assert sign_extend(0xFF, 8) == -1
+	assert sign_extend(0x7F, 8) == 127
+	assert sign_extend(0x80, 8) == -128
+	assert sign_extend(0x1FF, 8) == -1
+	assert sign_extend(-1, 16) == -1
+	assert sign_extend(0x800000, 24) == -0x800000
+	assert sign_extend(2**63, 64) == -2**63
+	assert to_unsigned(-1, 8) == 0xFF
+	assert to_unsigned(-2**63, 64) == 2**63
+	assert wrap_signed(127, 8) == (127, False)
+	assert wrap_signed(128, 8) == (-128, True)
+	assert wrap_signed(-129, 8) == (127, True)
+	assert wrap_signed(2**63, 64) == (-2**63, True)
+	assert resign(0xFC, True, 8) == -4 and resign(-4, False, 8) == 0xFC
+
+	# every 8- and 16-bit pattern, checked against two other ways of writing it
+	for bits in (8, 16):
+		width = get_bit_width(bits)
+
+		for value in range(-width.modulus, 2 * width.modulus):
+			expected = (value & width.mask) - (width.modulus if value & width.sign_bit else 0)
+			assert sign_extend(value, bits) == expected == ((value + width.sign_bit) % width.modulus) - width.sign_bit
+
+		values = np.arange(-width.modulus, 2 * width.modulus, dtype = np.int64)
+		assert sign_extend_batch(values, bits).tolist() == [sign_extend(value, bits) for value in values.tolist()]
+		wrapped, out_of_range = wrap_signed_batch(values, bits)
+		assert list(zip(wrapped.tolist(), out_of_range.tolist())) == [wrap_signed(value, bits) for value in values.tolist()]
+
+	print("two's complement tests passed!")
+
+def run_benchmark(bits = 16, count = 200_000):
+	"""Times sign_extend(), wrap_signed(), the signed operations and the batch versions."""
+	import timeit
+
+	import numpy as np
+
+	from t64_core.math_functions_signed_bits import add_signed_bits, subtract_signed_bits, multiply_signed_bits, divide_signed_bits
+
+	values = list(range(-count // 2, count // 2))
+	array = np.array(values, dtype = np.int64)
+
+	scalar = \
+	{
+		"sign_extend": lambda: [sign_extend(value, bits) for value in values],
+		"wrap_signed": lambda: [wrap_signed(value, bits) for value in values],
+		"add_signed_bits": lambda: [add_signed_bits(value, -20, bits) for value in values],
+		"subtract_signed_bits": lambda: [subtract_signed_bits(value, 20, bits) for value in values],
+		"multiply_signed_bits": lambda: [multiply_signed_bits(value, 3, bits) for value in values],
+		"divide_signed_bits": lambda: [divide_signed_bits(value, 7, bits) for value in values],
+	}
+	batch = \
+	{
+		"sign_extend_batch": lambda: sign_extend_batch(array, bits),
+		"wrap_signed_batch": lambda: wrap_signed_batch(array, bits),
+	}
+
+	for kind, functions in (("scalar", scalar), ("batch", batch)):
+		print(f"\n{kind}, {bits}-bit, {count} values:")
+
+		for name, function in functions.items():
+			seconds = min(timeit.repeat(function, number = 5, repeat = 5)) / 5
+			print(f"  {name:<22} {count / seconds / 1e6:8.1f}M values/s")
+
+
+if __name__ == "__main__":
+	test_twos_complement()
+	run_benchmark()
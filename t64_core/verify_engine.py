@@ -0,0 +1,299 @@
+import argparse
+import json
+import os
+import random
+import sys
+from timeit import timeit
+
+import numpy as np
+
+from t64_core.bit_widths import get_bit_width
+from t64_core.math_functions_bits import *
+from t64_core.math_functions_signed_bits import *
+from t64_core.bit_wise_operations_signed import *
+from t64_core.bit_wise_operations_unsigned import *
+from t64_core.math_functions_bits_batch import *
+from t64_core.math_functions_signed_bits_batch import *
+from t64_core.bit_wise_operations_batch import *
+from t64_core.lookup_tables_8bit import table_functions
+
+'''
+Engine check and benchmark
+
+Checks every math and bitwise operation against a reference model:
+	- 8-bit: every operand pair (65,536 of them), signed and unsigned
+	- 16-bit: a large random sample of pairs plus the edge values
+	  (0, 1, -1, the largest and smallest values, around the sign bit)
+Each operation is checked on every path the calculator has: the scalar
+function, the 8-bit table and the NumPy batch function.
+
+The reference model below doesn't share any code with the engine. It
+works out each answer from the plain definition, on Python ints.
+
+Then it times every operation, path and width, in operations per
+second, and compares them with a saved baseline:
+	python -m t64_core.verify_engine --save      # record a baseline
+	python -m t64_core.verify_engine             # check, and compare with it
+Anything slower than the baseline by more than the tolerance is
+reported as a regression and the exit status is 1. Timings depend on
+the machine, so the baseline isn't part of the repo.
+'''
+
+default_baseline_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "engine_baseline.json")
+
+# --- Reference model ---
+
+def _unsigned_result(value, width):
+	"""Any result, wrapped to the width, and whether it had to be wrapped."""
+	return value % width.modulus, not 0 <= value <= width.mask
+
+def _signed_result(value, width):
+	return (value - width.min_signed) % width.modulus + width.min_signed, \
+		not width.min_signed <= value <= width.max_signed
+
+def _signed_pattern(pattern, width):
+	"""Reads a bit pattern (0 to mask) as a signed value."""
+	pattern %= width.modulus
+
+	return pattern - width.modulus if pattern > width.max_signed else pattern
+
+def _divide(a, b, result):
+	if b == 0:
+		return 0, 0, True
+
+	quotient, wrapped = result(a // b)
+
+	return quotient, a % b, wrapped
+
+# operands come in already in range: 0 to mask when unsigned, min_signed to max_signed when signed
+reference_model = \
+{
+	add_bits: lambda a, b, w: _unsigned_result(a + b, w),
+	subtract_bits: lambda a, b, w: _unsigned_result(a - b, w),
+	multiply_bits: lambda a, b, w: _unsigned_result(a * b, w),
+	divide_bits: lambda a, b, w: _divide(a, b, lambda q: _unsigned_result(q, w)),
+	bitwise_and: lambda a, b, w: (a & b, True),
+	bitwise_or: lambda a, b, w: (a | b, True),
+	bitwise_xor: lambda a, b, w: (a ^ b, True),
+	shift_left: lambda a, b, w: ((a * 2 ** b) % w.modulus, True),
+	shift_right: lambda a, b, w: (a // 2 ** b, True),
+	bitwise_not: lambda a, w: (w.mask - a, True),
+
+	add_signed_bits: lambda a, b, w: _signed_result(a + b, w),
+	subtract_signed_bits: lambda a, b, w: _signed_result(a - b, w),
+	multiply_signed_bits: lambda a, b, w: _signed_result(a * b, w),
+	divide_signed_bits: lambda a, b, w: _divide(a, b, lambda q: _signed_result(q, w)),
+	bitwise_and_signed: lambda a, b, w: (_signed_pattern((a % w.modulus) & (b % w.modulus), w), True),
+	bitwise_or_signed: lambda a, b, w: (_signed_pattern((a % w.modulus) | (b % w.modulus), w), True),
+	bitwise_xor_signed: lambda a, b, w: (_signed_pattern((a % w.modulus) ^ (b % w.modulus), w), True),
+	shift_left_signed: lambda a, b, w: (_signed_pattern((a % w.modulus) * 2 ** b, w), True),
+	shift_right_signed: lambda a, b, w: (a // 2 ** b, True), # arithmetic: rounds towards minus infinity
+	bitwise_not_signed: lambda a, w: (-a - 1, True),
+}
+
+signed_functions = {add_signed_bits, subtract_signed_bits, multiply_signed_bits, divide_signed_bits,
+						  bitwise_and_signed, bitwise_or_signed, bitwise_xor_signed,
+						  shift_left_signed, shift_right_signed, bitwise_not_signed}
+shift_functions = {shift_left, shift_right, shift_left_signed, shift_right_signed}
+unary_functions = {bitwise_not, bitwise_not_signed}
+
+batch_functions = \
+{
+	add_bits: add_bits_batch,
+	subtract_bits: subtract_bits_batch,
+	multiply_bits: multiply_bits_batch,
+	divide_bits: divide_bits_batch,
+	add_signed_bits: add_signed_bits_batch,
+	subtract_signed_bits: subtract_signed_bits_batch,
+	multiply_signed_bits: multiply_signed_bits_batch,
+	divide_signed_bits: divide_signed_bits_batch,
+	bitwise_and: bitwise_and_batch,
+	bitwise_or: bitwise_or_batch,
+	bitwise_xor: bitwise_xor_batch,
+	shift_left: shift_left_batch,
+	shift_right: shift_right_batch,
+	bitwise_not: bitwise_not_batch,
+	bitwise_and_signed: bitwise_and_signed_batch,
+	bitwise_or_signed: bitwise_or_signed_batch,
+	bitwise_xor_signed: bitwise_xor_signed_batch,
+	shift_left_signed: shift_left_signed_batch,
+	shift_right_signed: shift_right_signed_batch,
+	bitwise_not_signed: bitwise_not_signed_batch,
+}
+
+# --- Operands ---
+
+def exhaustive_operands(bits):
+	"""Every (a, b) pair of bit patterns."""
+	patterns = range(1 << bits)
+
+	return [(a, b) for a in patterns for b in patterns]
+
+def sampled_operands(bits, count, seed = 64):
+	"""A random sample of bit pattern pairs, plus every pair of edge values."""
+	width = get_bit_width(bits)
+	edges = [0, 1, 2, width.sign_bit - 1, width.sign_bit, width.sign_bit + 1, width.mask - 1, width.mask]
+	generator = random.Random(seed)
+
+	pairs = [(a, b) for a in edges for b in edges]
+	pairs += [(generator.getrandbits(bits), generator.getrandbits(bits)) for _ in range(count)]
+
+	return pairs
+
+def operands_for(function, pairs, bits):
+	"""
+	Turns bit pattern pairs into the operands a function takes: signed
+	values for the signed functions, and shift counts from 0 up to twice
+	the width for the shifts.
+	"""
+	width = get_bit_width(bits)
+
+	if function in shift_functions:
+		pairs = [(a, b % (2 * bits + 1)) for a, b in pairs]
+
+	if function in signed_functions:
+		pairs = [(_signed_pattern(a, width), b if function in shift_functions else _signed_pattern(b, width))
+				  for a, b in pairs]
+
+	if function in unary_functions:
+		return [(a,) for a in sorted({pair[0] for pair in pairs})]
+
+	return pairs
+
+# --- Checking ---
+
+def _batch_answers(batch_function, operands, bits):
+	columns = batch_function(*[np.array(column, dtype = object) for column in zip(*operands)], bits)
+
+	return list(zip(*(column.tolist() for column in columns)))
+
+def engine_paths(function, bits):
+	"""Every way the calculator can work out this function at this width: name -> answers(operands)."""
+	paths = {"scalar": lambda operands: [function(*pair, bits) for pair in operands]}
+
+	if bits == 8 and function in table_functions:
+		table_function = table_functions[function]
+		paths["table"] = lambda operands: [table_function(*pair, bits) for pair in operands]
+
+	if function in batch_functions:
+		paths["batch"] = lambda operands: _batch_answers(batch_functions[function], operands, bits)
+
+	return paths
+
+def check_function(function, pairs, bits):
+	"""Checks every path of one function. Returns a list of (path, operands, got, expected) mismatches."""
+	width = get_bit_width(bits)
+	operands = operands_for(function, pairs, bits)
+	expected = [reference_model[function](*pair, width) for pair in operands]
+	mismatches = []
+
+	for path, answers in engine_paths(function, bits).items():
+		got = answers(operands)
+
+		mismatches += [(path, pair, actual, wanted)
+							for pair, actual, wanted in zip(operands, got, expected) if tuple(actual) != wanted]
+
+	return mismatches
+
+def verify(sample_count = 100_000):
+	"""Checks every function: exhaustively at 8 bits, sampled at 16. Returns True if everything matches."""
+	passed = True
+
+	for bits, pairs, description in ((8, exhaustive_operands(8), "every pair"),
+												(16, sampled_operands(16, sample_count), f"{sample_count} sampled pairs")):
+		print(f"\n--- {bits}-bit, {description} ---")
+
+		for function in reference_model:
+			mismatches = check_function(function, pairs, bits)
+			passed = passed and not mismatches
+			print(f"{function.__name__:<24}{'ok' if not mismatches else f'{len(mismatches)} mismatches'}")
+
+			for path, pair, actual, wanted in mismatches[:5]:
+				print(f"    {path}: {function.__name__}{pair} gave {actual}, expected {wanted}")
+
+	return passed
+
+# --- Benchmark ---
+
+def benchmark(sample_count = 20_000, repeat = 5, number = 3):
+	"""Times every function, path and width. Returns {"path/function/bits": operations per second}."""
+	rates = {}
+
+	for bits in (8, 16):
+		pairs = sampled_operands(bits, sample_count, seed = 6502)
+
+		for function in reference_model:
+			operands = operands_for(function, pairs, bits)
+
+			for path, answers in engine_paths(function, bits).items():
+				if path == "batch":
+					# time the array work only, not building the arrays
+					batch_function = batch_functions[function]
+					dtype = get_bit_width(bits).signed_dtype if function in signed_functions else np.int64
+					arrays = [np.array(column, dtype = dtype) for column in zip(*operands)]
+					run = lambda: batch_function(*arrays, bits)
+				else:
+					run = lambda: answers(operands)
+
+				# the best of several runs is the one least disturbed by the rest of the machine
+				seconds = min(timeit(run, number = number) for _ in range(repeat)) / number
+
+				rates[f"{path}/{function.__name__}/{bits}"] = len(operands) / seconds
+
+	return rates
+
+def compare_with_baseline(rates, baseline, tolerance):
+	"""Prints every rate next to its baseline. Returns the keys that got slower by more than the tolerance."""
+	regressions = []
+
+	print(f"\n{'path/operation/bits':<40}{'ops/s':>14}{'baseline':>14}{'change':>9}")
+
+	for key, rate in rates.items():
+		if key in baseline:
+			change = rate / baseline[key] - 1
+			flag = "  SLOWER" if change < -tolerance else ""
+			print(f"{key:<40}{rate:>14.0f}{baseline[key]:>14.0f}{change:>+8.0%}{flag}")
+
+			if flag:
+				regressions.append(key)
+		else:
+			print(f"{key:<40}{rate:>14.0f}{'-':>14}")
+
+	return regressions
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Check the calculator engine against a reference model and time it.")
+	parser.add_argument("--samples", type = int, default = 100_000, help = "number of random 16-bit pairs to check")
+	parser.add_argument("--baseline", default = default_baseline_path, help = "baseline file to compare with or save to")
+	parser.add_argument("--save", action = "store_true", help = "save these timings as the new baseline")
+	parser.add_argument("--tolerance", type = float, default = 0.25, help = "how much slower counts as a regression (0.25 = 25%%)")
+	parser.add_argument("--no-benchmark", action = "store_true", help = "only check correctness")
+	arguments = parser.parse_args()
+
+	if not verify(arguments.samples):
+		print("\nthe engine doesn't match the reference model!")
+		sys.exit(1)
+
+	print("\nthe engine matches the reference model!")
+
+	if arguments.no_benchmark:
+		sys.exit(0)
+
+	rates = benchmark()
+	baseline = {}
+
+	if os.path.exists(arguments.baseline):
+		with open(arguments.baseline) as baseline_file:
+			baseline = json.load(baseline_file)
+
+	regressions = compare_with_baseline(rates, baseline, arguments.tolerance)
+
+	if arguments.save:
+		with open(arguments.baseline, "w") as baseline_file:
+			json.dump(rates, baseline_file, indent = 1, sort_keys = True)
+
+		print(f"\nbaseline saved to {arguments.baseline}")
+	elif regressions:
+		print(f"\n{len(regressions)} regression(s) against {arguments.baseline}")
+		sys.exit(1)
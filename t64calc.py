@@ -0,0 +1,312 @@
+import argparse
+import re
+import sys
+from itertools import islice
+
+from t64_core.bit_widths import supported_bit_widths
+from t64_core.dispatch import operations, QUOTIENT_REMAINDER
+from t64_core.expressions import compile_expression, parse_number, operator_labels
+from t64_core.formatting import format_number
+from t64_core.twos_complement import resign
+
+'''
+T-64 command-line calculator
+
+Works out expressions (see t64_core/expressions.py) one line at a time,
+from files or stdin, and writes one result line for each line read:
+	echo '$C000 + 40 * 3' | python t64calc.py --bits 16 --base hex
+	python t64calc.py --bits 16 --signed offsets.txt more_offsets.txt > results.txt
+
+Lines are read and written as a stream, so any number of them can go
+through in the same memory. In the files:
+	; comment                    ignored (blank lines give blank lines)
+	screen = $0400               defines a label and gives its value
+	<screen + 40 * row           an expression (labels can also be set with --label)
+
+A line that can't be worked out gives "?" and an error message on
+stderr, and the exit status is 1. Lines that are just one operation on
+two numbers ("$12 + 7") skip the expression parser and go straight to
+the operation.
+
+--batch reads the lines in chunks. The lines in a chunk that are one
+operation on two numbers ("$12 + 7", "1000 / 9") are grouped by
+operation and each group goes through the operation's NumPy batch
+function in one go. Everything else is worked out line by line.
+'''
+
+_number = r"(\$[0-9A-Fa-f]+|%[01]+|[0-9]+)"
+# one operation on two numbers, the kind of line --batch can do with arrays
+_simple_line = re.compile(rf"^\s*{_number}\s*(<<|>>|[-+*/&|^]|AND\b|OR\b|EOR\b|XOR\b)\s*{_number}\s*$", re.IGNORECASE)
+_shifts = {"<<", ">>"}
+_assignment = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_]*)\s*=(?!=)\s*(.*)$")
+
+class LineError(Exception):
+	"""A line that couldn't be worked out."""
+
+def read_lines(paths):
+	"""Yields (file name, line number, line) for every line of every file, "-" being stdin."""
+	for path in paths:
+		file = sys.stdin if path == "-" else open(path)
+
+		try:
+			for number, line in enumerate(file, 1):
+				yield path, number, line.rstrip("\n")
+		finally:
+			if file is not sys.stdin:
+				file.close()
+
+class Calculator:
+	"""Works out lines at one width and signedness and formats the results."""
+	def __init__(self, bits = 8, signed = False, base = "dec", twos_complement = False, pad = True, group = False, prefix = False):
+		self.bits = bits
+		self.signed = signed
+		self.base = base
+		self.twos_complement = twos_complement
+		self.pad = pad
+		self.group = group
+		self.prefix = {"hex": "$", "bin": "%"}.get(base, "") if prefix else ""
+		self.labels = {} # lower-case name -> value
+
+	def evaluate(self, line):
+		"""A line's value, or None for a blank line. Raises LineError."""
+		line = line.split(";", 1)[0]
+
+		if not line.strip():
+			return None
+
+		simple = _simple_line.match(line)
+
+		if simple:
+			# no need to parse it: run the operation straight from the dispatch table
+			return self._evaluate_simple(simple)
+
+		assignment = _assignment.match(line)
+		source = assignment.group(2) if assignment else line
+
+		try:
+			value = compile_expression(source, self.bits, self.signed)(self.labels)
+		except (ValueError, ZeroDivisionError) as e:
+			raise LineError(str(e)) from None
+
+		if assignment:
+			self.labels[assignment.group(1).lower()] = value
+
+		return value
+
+	def _operands(self, simple):
+		"""
+		The operation and the two numbers of a one-operation line, wrapped
+		to the width. A shift count is left as it is, as in expressions.
+		"""
+		operation = operations[(operator_labels[simple.group(2).upper()], self.signed, self.bits)]
+		b = parse_number(simple.group(3))
+
+		return operation, resign(parse_number(simple.group(1)), self.signed, self.bits), \
+			b if operation.operation in _shifts else resign(b, self.signed, self.bits)
+
+	def _evaluate_simple(self, simple):
+		operation, a, b = self._operands(simple)
+
+		# the flag is also set on a signed quotient that wrapped (-128 / -1), which isn't an error
+		if operation.result_shape == QUOTIENT_REMAINDER and b == 0:
+			raise LineError("Division by zero")
+
+		return int(operation(a, b)[0])
+
+	def format(self, value):
+		if value is None:
+			return ""
+
+		text = format_number(value, self.base, self.bits, twos_complement = self.twos_complement, pad = self.pad, group = self.group)
+
+		if text[:1] == "-":
+			return "-" + self.prefix + text[1:]
+
+		return self.prefix + text
+
+	def evaluate_batch(self, lines):
+		"""
+		Works out a list of lines, putting the one-operation lines through
+		the batch functions. Returns a value, None or a LineError for each
+		line, in order.
+		"""
+		import numpy as np
+
+		results = [None] * len(lines)
+		groups = {} # operation -> (line indexes, first numbers, second numbers)
+
+		for index, line in enumerate(lines):
+			simple = _simple_line.match(line)
+			operation, a, b = self._operands(simple) if simple else (None, None, None)
+
+			# the 8-bit tables take a shift count as a byte, so a count they
+			# can't look up is left to the scalar function, which rejects it
+			if operation is not None and operation.operation in _shifts and not 0 <= b <= 0xFF:
+				operation = None
+
+			if operation is not None and operation.batch is not None:
+				indexes, first, second = groups.setdefault(operation, ([], [], []))
+				indexes.append(index)
+				first.append(a)
+				second.append(b)
+			else:
+				try:
+					results[index] = self.evaluate(line)
+				except LineError as e:
+					results[index] = e
+
+		for operation, (indexes, first, second) in groups.items():
+			# 64-bit values don't all fit in a NumPy integer
+			dtype = object if self.bits == 64 else np.int64
+			columns = operation.batch(np.array(first, dtype = dtype), np.array(second, dtype = dtype))
+
+			if operation.result_shape == QUOTIENT_REMAINDER:
+				divide_by_zero = [divisor == 0 for divisor in second]
+			else:
+				divide_by_zero = [False] * len(indexes)
+
+			for index, value, failed in zip(indexes, columns[0].tolist(), divide_by_zero):
+				results[index] = LineError("Division by zero") if failed else int(value)
+
+		return results
+
+def run(paths, calculator, batch = False, chunk_size = 4096, output = sys.stdout):
+	"""Works out every line and writes the results. Returns the number of lines that failed."""
+	errors = 0
+	lines = read_lines(paths)
+
+	def report(path, number, error):
+		nonlocal errors
+		errors += 1
+		print(f"t64calc: {path}:{number}: {error}", file = sys.stderr)
+
+		return "?"
+
+	if not batch:
+		for path, number, line in lines:
+			try:
+				text = calculator.format(calculator.evaluate(line))
+			except LineError as e:
+				text = report(path, number, e)
+
+			output.write(text + "\n")
+	else:
+		while chunk := list(islice(lines, chunk_size)):
+			results = calculator.evaluate_batch([line for _, _, line in chunk])
+			texts = [report(path, number, result) if isinstance(result, LineError) else calculator.format(result)
+						for (path, number, _), result in zip(chunk, results)]
+
+			output.write("\n".join(texts) + "\n")
+
+	return errors
+
+def main(arguments = None):
+	parser = argparse.ArgumentParser(description = "Works out T-64 expressions, one per line.")
+	parser.add_argument("files", nargs = "*", default = ["-"], help = "files to read (default: stdin)")
+	parser.add_argument("--bits", type = int, choices = supported_bit_widths, default = 8)
+	parser.add_argument("--signed", action = "store_true")
+	parser.add_argument("--base", choices = ("bin", "dec", "hex"), default = "dec", help = "base of the results")
+	parser.add_argument("--twos-complement", action = "store_true", help = "show negative results as their bit pattern")
+	parser.add_argument("--no-pad", action = "store_true", help = "don't zero-pad hex and binary results to the width")
+	parser.add_argument("--group", action = "store_true", help = "group digits: binary nibbles, hex bytes, decimal thousands")
+	parser.add_argument("--prefix", action = "store_true", help = "write hex results as $.. and binary as %%..")
+	parser.add_argument("--label", action = "append", default = [], metavar = "NAME=VALUE", help = "define a label")
+	parser.add_argument("--batch", action = "store_true", help = "put one-operation lines through the batch functions")
+	parser.add_argument("--chunk", type = int, default = 4096, help = "lines per chunk in batch mode")
+	parser.add_argument("--test", action = "store_true", help = "run the tests")
+	options = parser.parse_args(arguments)
+
+	if options.test:
+		test_t64calc()
+		return 0
+
+	calculator = Calculator(options.bits, options.signed, options.base, options.twos_complement,
+									not options.no_pad, options.group, options.prefix)
+
+	for definition in options.label:
+		try:
+			calculator.evaluate(definition)
+		except LineError as e:
+			parser.error(f"--label {definition}: {e}")
+
+	try:
+		errors = run(options.files, calculator, options.batch, max(options.chunk, 1))
+	except OSError as e:
+		print(f"t64calc: {e}", file = sys.stderr)
+		return 2
+
+	return 1 if errors else 0
+
+
+def test_t64calc():
+	import io
+
+	print("--- Testing t64calc ---")
+	calculator = Calculator(16, base = "hex", prefix = True)
+	assert calculator.format(calculator.evaluate("screen = $0400")) == "$0400"
+	assert calculator.evaluate("<screen + 40 * 2 ; a comment") == 80
+	assert calculator.evaluate("   ") is None and calculator.format(None) == ""
+
+	try:
+		calculator.evaluate("1 / 0")
+		assert False
+	except LineError:
+		pass
+
+	assert Calculator(8, True, "hex", prefix = True).format(-8) == "-$08"
+	assert Calculator(8, True, "bin", twos_complement = True).format(-1) == "11111111"
+
+	# batch mode gives exactly what evaluating each line does
+	lines = ["250 + 10", "$FF * 2", "%1010 / 3", "7 / 0", "100 - 200", "$0F AND 3", "1 << 9", "1 + 2 * 3", "", "x = 5", "x * x",
+				"$8000 >> 1", "nowhere", "1 << 200", "$FF >> 255", "1 << 300", "(1) << 200", "$80 / $FF", "1 << 256",
+				"$80 >> 257", "(1) << 256", "$8000 / $FFFF"]
+
+	for bits in supported_bit_widths:
+		for signed in (False, True):
+			one_at_a_time = Calculator(bits, signed)
+			expected = []
+
+			for line in lines:
+				try:
+					expected.append(one_at_a_time.evaluate(line))
+				except LineError as e:
+					expected.append(str(e))
+
+			got = [str(result) if isinstance(result, LineError) else result
+					 for result in Calculator(bits, signed).evaluate_batch(lines)]
+			assert got == expected, (bits, signed, got, expected)
+
+	# streamed, in chunks smaller than the input
+	source = io.StringIO("1 + 1\n2 * 3\n; nothing\nbad +\n$10 / 4\n")
+	stdin, stderr = sys.stdin, sys.stderr
+
+	for batch in (False, True):
+		source.seek(0)
+		output = io.StringIO()
+		sys.stdin, sys.stderr = source, io.StringIO()
+
+		try:
+			errors = run(["-"], Calculator(), batch, 2, output)
+		finally:
+			sys.stdin, sys.stderr = stdin, stderr
+
+		assert (output.getvalue(), errors) == ("2\n6\n\n?\n4\n", 1)
+
+	# shift counts aren't wrapped to the width (200 isn't -56 in signed 8-bit),
+	# and a negative one is an error, whichever way the line is worked out
+	for batch in (False, True):
+		output = io.StringIO()
+		sys.stdin, sys.stderr = io.StringIO("1 << 200\n1 << -1\n1 << 3\n$80 / $FF\n"), io.StringIO()
+
+		try:
+			errors = run(["-"], Calculator(8, True), batch, 2, output)
+		finally:
+			sys.stdin, sys.stderr = stdin, stderr
+
+		assert (output.getvalue(), errors) == ("0\n?\n8\n-128\n", 1), batch
+
+	print("t64calc tests passed!")
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,334 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+
+from t64_core.bit_widths import supported_bit_widths
+from t64_core.dispatch import operations
+from t64_core.expressions import compile_expression, parse_number
+from t64_core.formatting import format_number
+from t64_core.lookup_tables_8bit import table_functions
+
+'''
+T-64 evaluation server
+
+Keeps the engine loaded (8-bit tables built, expression grammar ready)
+and answers requests over a Unix domain socket, so an editor can ask
+for hundreds of answers a minute without starting Python each time:
+	python t64server.py &
+	echo '{"id": 1, "op": "+", "a": 250, "b": 10}' | nc -U /run/user/1000/t64calc-1000.sock
+	{"id": 1, "result": 4, "flag": true}
+
+Every request and every answer is one line of JSON. A request is one of:
+	{"op": "/", "a": 17, "b": "$05", "bits": 16, "signed": false}
+		one calculator operation, by its button label ("+", "AND", "<<",
+		"NOT"...). NOT only takes "a".
+	{"expr": "<screen + 40 * 2", "labels": {"screen": "$0400"}, "bits": 16}
+		an expression (see t64_core/expressions.py)
+	{"batch": [request, request, ...]}
+		any number of the two above in one message, answered together
+		as {"results": [answer, answer, ...]}
+
+bits (8 by default) and signed (false by default) are the calculator's
+width and sign mode. Numbers can be JSON integers or strings written as
+"$hex", "%binary" or decimal. An "id" is copied into the answer, and
+"base" ("bin", "dec" or "hex") adds a "text" with the result formatted
+the way the calculator shows it.
+
+An operation answers with what the operation gives, by name:
+	{"result": 4, "flag": true}
+	{"quotient": 3, "remainder": 2, "flag": false}
+"/" flags a divisor of 0, and in signed mode a quotient that wrapped
+(-128 / -1 in 8 bits) too. An expression answers {"result": value}. Anything that goes wrong
+answers {"error": "..."}.
+
+Operations run through the same dispatch table (t64_core/dispatch.py)
+and are given the numbers the same way as the calculator's equals
+button, so the GUI and the server always agree.
+'''
+
+default_socket_path = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), f"t64calc-{os.getuid()}.sock")
+
+# the longest request line accepted (big batches come in one line)
+line_limit = 16 * 1024 * 1024
+
+_flag_names = {"flag"}
+
+class RequestError(Exception):
+	"""A request that can't be answered."""
+
+def _number(value):
+	"""A number from a request: a JSON integer, or a string in any of the calculator's bases."""
+	if isinstance(value, int) and not isinstance(value, bool):
+		return value
+
+	if isinstance(value, str):
+		try:
+			return parse_number(value.strip())
+		except ValueError:
+			pass
+
+	raise RequestError(f"Not a number: {value!r}")
+
+def answer(request):
+	"""The answer to one request (a dict), without its id. Raises RequestError."""
+	if not isinstance(request, dict):
+		raise RequestError("A request has to be a JSON object")
+
+	bits = request.get("bits", 8)
+	signed = request.get("signed", False)
+
+	# 8.0 == 8 and True == 1, but neither is a width
+	if type(bits) is not int or bits not in supported_bit_widths:
+		raise RequestError(f"Unsupported bit width: {bits!r}")
+
+	if not isinstance(signed, bool):
+		raise RequestError("signed has to be true or false")
+
+	if "expr" in request:
+		labels = request.get("labels") or {}
+
+		if not isinstance(request["expr"], str) or not isinstance(labels, dict):
+			raise RequestError("expr has to be a string and labels an object")
+
+		try:
+			value = compile_expression(request["expr"], bits, signed)({name.lower(): _number(number) for name, number in labels.items()})
+		except (ValueError, ZeroDivisionError) as e:
+			raise RequestError(str(e)) from None
+
+		response = {"result": value}
+	else:
+		label = request.get("op")
+		operation = operations.get((label, signed, bits)) if isinstance(label, str) else None
+
+		if operation is None:
+			raise RequestError(f"Unknown operation: {label!r}")
+
+		operands = [_number(request.get(name)) for name in ("a", "b")[:operation.arity]]
+
+		try:
+			values = operation(*operands)
+		except (ValueError, ZeroDivisionError) as e:
+			# a shift by a negative count
+			raise RequestError(str(e)) from None
+
+		response = {name: bool(value) if name in _flag_names else int(value)
+						for name, value in zip(operation.result_shape, values)}
+		value = response[operation.result_shape[0]]
+
+	base = request.get("base")
+
+	if base is not None:
+		try:
+			response["text"] = format_number(value, base, bits)
+		except ValueError as e:
+			raise RequestError(str(e)) from None
+
+	return response
+
+def _answer_or_error(request):
+	try:
+		return answer(request)
+	except RequestError as e:
+		return {"error": str(e)}
+
+def respond(line):
+	"""The answer line (bytes) to a request line."""
+	try:
+		message = json.loads(line)
+	except ValueError:
+		return b'{"error": "Not a line of JSON"}\n'
+
+	if isinstance(message, dict) and "batch" in message:
+		if isinstance(message["batch"], list):
+			response = {"results": [_answer_or_error(request) for request in message["batch"]]}
+		else:
+			response = {"error": "batch has to be a list of requests"}
+	else:
+		response = _answer_or_error(message)
+
+	if isinstance(message, dict) and "id" in message:
+		response = {"id": message["id"], **response}
+
+	return (json.dumps(response) + "\n").encode()
+
+async def handle_connection(reader, writer):
+	"""Answers every line a client sends, in order, until it hangs up."""
+	try:
+		while True:
+			try:
+				line = await reader.readuntil(b"\n")
+			except asyncio.IncompleteReadError as e:
+				line = e.partial # a last line without a newline, or nothing once the client's done
+			except asyncio.LimitOverrunError:
+				# more than line_limit without a newline
+				writer.write(b'{"error": "Request too long"}\n')
+				break
+
+			if not line:
+				break
+
+			writer.write(respond(line))
+			await writer.drain()
+	except ConnectionError:
+		pass
+	finally:
+		writer.close()
+
+def warm_up():
+	"""Builds everything that's otherwise built on the first request."""
+	for table_function in table_functions.values():
+		table_function.table.load()
+
+	compile_expression("$FF AND %1 + <0 * (1 << 1)")
+
+async def serve(path = default_socket_path, warm = True, started = None):
+	"""Runs the server until it's cancelled. started, if given, is an asyncio.Event set once it's listening."""
+	if warm:
+		warm_up()
+
+	# a socket file left by a server that didn't shut down cleanly
+	if os.path.exists(path):
+		os.unlink(path)
+
+	server = await asyncio.start_unix_server(handle_connection, path, limit = line_limit)
+	os.chmod(path, 0o600) # only the user who started it can connect
+
+	try:
+		async with server:
+			if started is not None:
+				started.set()
+
+			await server.serve_forever()
+	finally:
+		if os.path.exists(path):
+			os.unlink(path)
+
+def query(requests, path = default_socket_path):
+	"""Sends requests (dicts) to a running server and returns the answers. For scripts and editor plugins."""
+	with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+		client.connect(path)
+		client.sendall(b"".join(json.dumps(request).encode() + b"\n" for request in requests))
+		client.shutdown(socket.SHUT_WR)
+
+		with client.makefile("rb") as replies:
+			return [json.loads(line) for line in replies]
+
+async def _serve_until_stopped(path, warm):
+	# kill (SIGTERM) stops it as cleanly as Ctrl-C, taking the socket file with it
+	asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+	await serve(path, warm)
+
+def main(arguments = None):
+	parser = argparse.ArgumentParser(description = "Answers T-64 calculations over a Unix socket, one JSON line at a time.")
+	parser.add_argument("--socket", default = default_socket_path, help = f"socket path (default: {default_socket_path})")
+	parser.add_argument("--no-warm-up", action = "store_true", help = "build the 8-bit tables when they're first used instead")
+	parser.add_argument("--test", action = "store_true", help = "run the tests")
+	options = parser.parse_args(arguments)
+
+	if options.test:
+		test_t64server()
+		return 0
+
+	print(f"t64server: listening on {options.socket}", file = sys.stderr)
+
+	try:
+		asyncio.run(_serve_until_stopped(options.socket, not options.no_warm_up))
+	except (KeyboardInterrupt, asyncio.CancelledError):
+		pass
+
+	return 0
+
+
+def test_t64server():
+	from t64_core.session import CalculatorSession
+
+	print("--- Testing t64server ---")
+	assert answer({"op": "+", "a": 250, "b": 10}) == {"result": 4, "flag": True}
+	assert answer({"op": "/", "a": "$11", "b": "%101", "bits": 16, "base": "hex"}) == \
+		{"quotient": 3, "remainder": 2, "flag": False, "text": "0003"}
+	assert answer({"op": "NOT", "a": 4, "signed": True}) == {"result": -5, "flag": True}
+	assert answer({"expr": "<screen + 40 * 2", "labels": {"SCREEN": "$0400"}, "bits": 16}) == {"result": 80}
+
+	for bad in ({"op": "%", "a": 1, "b": 2}, {"op": "+", "a": "one", "b": 2}, {"op": "+", "a": 1, "b": 2, "bits": 12},
+					{"expr": "1 +"}, {"expr": "1 / 0"}, {"op": "+", "a": 1, "b": 2, "base": "oct"}, [1, 2], {"op": ["+"]},
+					{"op": "<<", "a": 1, "b": -1}, {"op": ">>", "a": 1, "b": -1, "bits": 16, "signed": True},
+					{"op": "+", "a": 1, "b": 2, "bits": 8.0}, {"expr": "1+1", "bits": 16.0, "base": "hex"}, {"expr": "1", "bits": True}):
+		assert "error" in _answer_or_error(bad), bad
+
+	# any shift count, however big, shifts everything out
+	assert answer({"op": "<<", "a": 1, "b": 10**30}) == {"result": 0, "flag": True}
+	assert answer({"op": "/", "a": -128, "b": -1, "signed": True}) == {"quotient": -128, "remainder": 0, "flag": True}
+
+	assert json.loads(respond(b'{"id": 7, "batch": [{"op": "*", "a": 3, "b": 4}, {"expr": "x"}]}')) == \
+		{"id": 7, "results": [{"result": 12, "flag": False}, {"error": "Unknown label: x"}]}
+	assert "error" in json.loads(respond(b"not json"))
+
+	# the server gives what the calculator's equals button gives
+	for signed in (False, True):
+		for bits in (8, 16):
+			for label in ("+", "-", "*", "/", "AND", "OR", "XOR", "<<", ">>"):
+				for a, b in ((100, 7), (-100, 3) if signed else (200, 3), (5, 0)):
+					session = CalculatorSession(bitwidth = str(bits))
+
+					if signed:
+						session.sign_mode_toggle()
+
+					session.first_text = str(a)
+					session.set_math_operation(label)
+					session.second_text = str(b)
+					session.do_equals()
+
+					response = answer({"op": label, "a": a, "b": b, "bits": bits, "signed": signed})
+					assert session.result.value == response.get("result", response.get("quotient")), (label, a, b, bits, signed)
+
+	# and over a socket
+	async def over_a_socket(path):
+		started = asyncio.Event()
+		server = asyncio.create_task(serve(path, warm = False, started = started))
+		await started.wait()
+
+		reader, writer = await asyncio.open_unix_connection(path)
+		writer.write(b'{"id": 1, "op": "-", "a": 1, "b": 2}\n{"id": 2, "batch": [{"expr": "$FF", "signed": true}]}\n')
+		await writer.drain()
+		replies = [json.loads(await reader.readline()) for _ in range(2)]
+
+		# a request the operation rejects (a negative shift count) doesn't end the connection,
+		# and nor does a last line without a newline
+		writer.write(b'{"id": 3, "op": "<<", "a": 1, "b": -1}\n{"op": "+", "a": 1, "b": 1}\n'
+						 b'{"batch": [{"op": ">>", "a": 1, "b": -1}, {"op": "AND", "a": 6, "b": 3}]}')
+		writer.write_eof()
+		replies += [json.loads(line) for line in (await reader.read()).splitlines()]
+		writer.close()
+
+		# an editor plugin's blocking client
+		replies += await asyncio.to_thread(query, [{"op": "NOT", "a": 0, "bits": 16}], path)
+
+		server.cancel()
+
+		try:
+			await server
+		except asyncio.CancelledError:
+			pass
+
+		assert not os.path.exists(path)
+
+		return replies
+
+	with tempfile.TemporaryDirectory() as directory:
+		replies = asyncio.run(over_a_socket(os.path.join(directory, "t64.sock")))
+
+	assert replies == [{"id": 1, "result": 255, "flag": True}, {"id": 2, "results": [{"result": -1}]},
+							 {"id": 3, "error": "Number of bits to shift must be non-negative"}, {"result": 2, "flag": False},
+							 {"results": [{"error": "Number of bits to shift must be non-negative"}, {"result": 2, "flag": True}]},
+							 {"result": 0xFFFF, "flag": True}], replies
+
+	print("t64server tests passed!")
+
+
+if __name__ == "__main__":
+	sys.exit(main())
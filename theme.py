@@ -0,0 +1,73 @@
+# PySide6
+from PySide6.QtGui import QBrush, QColor, QPen
+
+from collections import namedtuple
+
+from c64_palette import C64Palette
+from button_specs import master_outline
+
+'''
+Button themes
+
+The brushes and pens the buttons paint with, made once for every
+palette in C64Palette when this is imported, so painting never has to
+make any:
+	theme = theme_for(C64Palette().digit)
+	painter.setBrush(theme.bg)
+	painter.setPen(theme.outline)
+
+Themes are namedtuples and are shared between buttons, so the brushes
+and pens in them mustn't be changed. theme_for() makes a new theme for
+a palette that isn't one of C64Palette's, or for another outline width.
+'''
+
+class Theme(namedtuple("Theme",
+	[
+		"bg", # brush for the button's top
+		"outline", # pen for the outline round the top
+		"font", # pen for the label
+		"text", # pen for a plain QPushButton label
+		"colours", # every colour in the palette as (name, rgba): tells themes apart
+	])):
+	__slots__ = ()
+
+black = QColor("#000000") # for anything a palette doesn't have
+
+shadow_brush = QBrush(C64Palette.shadow)
+
+def make_theme(palette, outline_width = master_outline):
+	"""The brushes and pens for a palette (a dict of "bg", "outline", "font"... -> colour)."""
+	def colour(name):
+		return QColor(palette.get(name, black))
+
+	return Theme(QBrush(colour("bg")), QPen(colour("outline"), outline_width), QPen(colour("font")), QPen(colour("text")),
+					 tuple((name, QColor(value).rgba()) for name, value in palette.items()))
+
+# palette name ("numsys", "digit"...) -> Theme, at the buttons' outline width
+themes = {name: make_theme(palette) for name, palette in vars(C64Palette).items() if isinstance(palette, dict)}
+
+# C64Palette's palettes are never replaced, so they can be found by identity
+_themes_by_palette = {id(getattr(C64Palette, name)): theme for name, theme in themes.items()}
+
+def theme_for(palette, outline_width = master_outline):
+	"""The theme for a palette: C64Palette's are already made, anything else is made now."""
+	theme = _themes_by_palette.get(id(palette)) if outline_width == master_outline else None
+
+	return theme or make_theme(palette, outline_width)
+
+
+'''
+Test
+'''
+if __name__ == "__main__":
+	assert set(themes) >= {"numsys", "bits", "digit", "math", "edit", "dark", "light"}
+	assert theme_for(C64Palette().digit) is themes["digit"]
+	assert themes["digit"].bg.color() == C64Palette().yellow
+	assert themes["numsys"].outline.widthF() == master_outline
+	assert themes["bits"].text.color() == black # bits has no "text"
+
+	custom = {"bg": "#123456", "outline": C64Palette().blue}
+	assert theme_for(custom).bg.color() == QColor("#123456")
+	assert theme_for(C64Palette().digit, 1).outline.widthF() == 1
+
+	print("theme tests passed!")